@@ -0,0 +1,72 @@
+"""
+冷启动耗时报告：逐模块测量 import 耗时
+
+每个模块在独立的 Python 子进程中导入（模拟 FC 冷启动），
+通过 `python -X importtime` 统计该模块自身及其依赖的累计导入耗时。
+
+用法：
+    python codes/bench_cold_start.py            # 默认测量流水线相关模块
+    python codes/bench_cold_start.py orchestrator trigger_layer
+"""
+
+import os
+import subprocess
+import sys
+from typing import List, Optional, Tuple
+
+CODES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_MODULES = [
+    "config",
+    "models",
+    "alerting",
+    "conflict_resolution",
+    "scraper_layer",
+    "dedup",
+    "watermark",
+    "storage_layer",
+    "database_layer",
+    "llm_cache",
+    "prompt_budget",
+    "incremental_analysis",
+    "orchestrator",
+    "trigger_layer",
+]
+
+
+def measure_import(module: str) -> Tuple[Optional[float], str]:
+    """在子进程中导入模块，返回 (累计耗时毫秒, 错误信息)"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [CODES_DIR, env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=CODES_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        last_line = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+        return None, last_line
+
+    # importtime 输出格式: "import time: self [us] | cumulative | imported package"
+    for line in proc.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000.0, ""
+    return None, "module not found in importtime output"
+
+
+def main(modules: List[str]) -> None:
+    print(f"{'module':<24}{'cumulative import (ms)':>24}")
+    print("-" * 48)
+    for module in modules:
+        elapsed, error = measure_import(module)
+        if elapsed is None:
+            print(f"{module:<24}{'FAILED':>24}  {error}")
+        else:
+            print(f"{module:<24}{elapsed:>24.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or DEFAULT_MODULES)
@@ -0,0 +1,84 @@
+"""
+数据库写入基准：测量 save_decisions 每秒写入的决策行数
+
+在临时目录中创建 SQLite 数据库，对比逐条 execute（旧写法）与
+DatabaseClient.save_decisions（executemany + 单事务）的吞吐。
+
+用法：
+    python codes/bench_database.py            # 默认 10000 条决策
+    python codes/bench_database.py 50000
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import List
+
+from database_layer import (
+    _INSERT_DECISION_SQL,
+    _UPSERT_STATE_SQL,
+    DatabaseClient,
+    parse_numeric_value,
+    sources_to_mask,
+)
+from models import ConflictDecision, SourceType, now_ts
+
+
+def make_decisions(n: int) -> List[ConflictDecision]:
+    return [
+        ConflictDecision(
+            field_name=f"指标{i % 500}",
+            final_value=f"{i % 100}%",
+            chosen_source=SourceType.OFFICIAL,
+            pending_sources=[SourceType.MEDIA, SourceType.RUMOR] if i % 3 == 0 else [],
+            reason=f"解读 {i}",
+        )
+        for i in range(n)
+    ]
+
+
+def save_row_by_row(db_path: str, run_id: str, keyword: str, decisions: List[ConflictDecision]) -> None:
+    """对照组：每条决策两次 execute"""
+    now = now_ts()
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        for d in decisions:
+            cursor.execute(_INSERT_DECISION_SQL, (
+                run_id, keyword, d.field_name, d.final_value, d.chosen_source.value,
+                ",".join([s.value for s in d.pending_sources]), d.reason, now,
+                parse_numeric_value(d.final_value), sources_to_mask(d.pending_sources),
+            ))
+            cursor.execute(_UPSERT_STATE_SQL, (
+                keyword, d.field_name, d.final_value, d.chosen_source.value, d.reason, now,
+            ))
+        conn.commit()
+
+
+def main(n: int) -> None:
+    decisions = make_decisions(n)
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        baseline = DatabaseClient(db_path=os.path.join(tmp_dir, "baseline.db"))
+        start = time.perf_counter()
+        save_row_by_row(baseline.db_path, "bench", "bench", decisions)
+        row_by_row = time.perf_counter() - start
+
+        client = DatabaseClient(db_path=os.path.join(tmp_dir, "batched.db"))
+        start = time.perf_counter()
+        client.save_decisions("bench", "bench", decisions)
+        batched = time.perf_counter() - start
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"{n} decisions")
+    print(f"{'method':<24}{'seconds':>12}{'rows/s':>16}")
+    print("-" * 52)
+    print(f"{'row-by-row execute':<24}{row_by_row:>12.3f}{n / row_by_row:>16,.0f}")
+    print(f"{'save_decisions':<24}{batched:>12.3f}{n / batched:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
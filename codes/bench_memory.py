@@ -0,0 +1,64 @@
+"""
+模型内存基准：比较 __slots__ 模型与普通（带 __dict__）dataclass 的每实例内存占用
+
+对 NewsItem / ChangeItem / ConflictDecision 分别创建 N 个实例，
+用 tracemalloc 统计实例本身占用的字节数（字段值使用共享对象，不计入）。
+
+用法：
+    python codes/bench_memory.py            # 默认 100000 个实例
+    python codes/bench_memory.py 50000
+"""
+
+import dataclasses
+import gc
+import sys
+import tracemalloc
+from typing import Callable, List, Tuple
+
+from models import ChangeItem, ConflictDecision, NewsItem, SourceType
+
+
+def without_slots(cls: type) -> type:
+    """构造字段相同、但不使用 __slots__ 的对照 dataclass"""
+    fields = [
+        (f.name, f.type, dataclasses.field(default=f.default, default_factory=f.default_factory))
+        for f in dataclasses.fields(cls)
+    ]
+    return dataclasses.make_dataclass(f"{cls.__name__}Dict", fields)
+
+
+def bytes_per_instance(factory: Callable[[], object], n: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objs = [factory() for _ in range(n)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # 扣除列表本身（每个元素一个指针）
+    size = after - before - sys.getsizeof(objs)
+    del objs
+    return size / n
+
+
+def cases() -> List[Tuple[type, Callable[[type], object]]]:
+    return [
+        (NewsItem, lambda cls: cls("标题", "内容", SourceType.MEDIA, "https://example.com", "2026-01-01")),
+        (ChangeItem, lambda cls: cls("产能利用率", "90%", "92%", "up", SourceType.OFFICIAL, "解读", 0.8)),
+        (ConflictDecision, lambda cls: cls("产能利用率", "92%", SourceType.OFFICIAL)),
+    ]
+
+
+def main(n: int) -> None:
+    print(f"{n} instances")
+    print(f"{'model':<20}{'__dict__ (B/item)':>20}{'__slots__ (B/item)':>20}{'saved':>10}")
+    print("-" * 70)
+    for cls, build in cases():
+        plain = without_slots(cls)
+        before = bytes_per_instance(lambda: build(plain), n)
+        after = bytes_per_instance(lambda: build(cls), n)
+        saved = 1 - after / before if before else 0.0
+        print(f"{cls.__name__:<20}{before:>20.1f}{after:>20.1f}{saved:>10.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
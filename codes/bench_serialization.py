@@ -0,0 +1,71 @@
+"""
+快照序列化吞吐基准：测量每秒可编码/解码的条目数
+
+分别测量 NewsItem 与字典之间的转换（serialization 层），
+以及各快照编码格式（snapshot_codec）完整的编码/解码吞吐。
+
+用法：
+    python codes/bench_serialization.py             # 默认 20000 条
+    python codes/bench_serialization.py 100000
+"""
+
+import sys
+import time
+from typing import Callable, List
+
+from models import NewsItem, ReportSnapshot, SourceType
+from serialization import items_from_dicts, items_to_dicts, snapshot_from_dict, snapshot_to_dict
+from snapshot_codec import get_codec
+
+CODECS = ["json", "json.gz", "ndjson", "ndjson.gz"]
+
+
+def make_items(n: int) -> List[NewsItem]:
+    sources = list(SourceType)
+    return [
+        NewsItem(
+            title=f"标题 {i}",
+            content=f"第 {i} 条资讯：产能利用率 {i % 100}%，价格 {1800 + i % 100} 元/吨",
+            source=sources[i % len(sources)],
+            url=f"https://example.com/news/{i}",
+            published_at="2026-01-01",
+        )
+        for i in range(n)
+    ]
+
+
+def measure(fn: Callable[[], object], n: int, repeat: int = 3) -> float:
+    """取 repeat 次中的最快一次，返回 items/sec"""
+    best = min(_timed(fn) for _ in range(repeat))
+    return n / best if best > 0 else float("inf")
+
+
+def _timed(fn: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(n: int) -> None:
+    items = make_items(n)
+    dicts = items_to_dicts(items)
+    snapshot = ReportSnapshot(keyword="bench", collected_at="20260101_000000", items=items)
+    data = snapshot_to_dict(snapshot)
+
+    print(f"{n} items")
+    print(f"{'stage':<24}{'encode (items/s)':>20}{'decode (items/s)':>20}")
+    print("-" * 64)
+    print(f"{'items <-> dict':<24}"
+          f"{measure(lambda: items_to_dicts(items), n):>20,.0f}"
+          f"{measure(lambda: items_from_dicts(dicts), n):>20,.0f}")
+
+    for name in CODECS:
+        codec = get_codec(name)
+        raw = codec.encode(data)
+        encode = measure(lambda: codec.encode(snapshot_to_dict(snapshot)), n)
+        decode = measure(lambda: snapshot_from_dict(codec.decode(raw)), n)
+        print(f"{name + f' ({len(raw) // 1024} KB)':<24}{encode:>20,.0f}{decode:>20,.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
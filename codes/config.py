@@ -1,14 +1,94 @@
 # config.py
+import json
+import logging
 import os
 
 DATA_DIR = os.getenv("DATA_DIR", "data")
+# 快照编码格式：ndjson.gz（默认，可流式读取）/ ndjson / json / json.gz / json.zst（需 zstandard）/ msgpack（需 msgpack）
+SNAPSHOT_CODEC = os.getenv("SNAPSHOT_CODEC", "ndjson.gz")
+# 流式读取快照时每次读取（OSS Range 请求）的字节数
+SNAPSHOT_STREAM_CHUNK_SIZE = int(os.getenv("SNAPSHOT_STREAM_CHUNK_SIZE", str(1024 * 1024)))
+# 快照增量编码：每隔多少份快照写一次完整快照（<= 1 表示始终写完整快照）
+SNAPSHOT_KEYFRAME_INTERVAL = int(os.getenv("SNAPSHOT_KEYFRAME_INTERVAL", "20"))
 DEFAULT_KEYWORD = "半导体"
 
+# --- SQLite 配置 ---
+# 每个线程复用一个长连接（WAL 模式，读写互不阻塞）；以下为连接级 pragma
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", str(20 * 1024)))
+DB_BUSY_TIMEOUT_SECONDS = float(os.getenv("DB_BUSY_TIMEOUT_SECONDS", "30"))
+
+# --- 采集配置 ---
+# 数据源列表（JSON 数组），每项形如
+#   {"name": "cninfo", "url": "https://.../search?q={keyword}", "source": "official", "timeout": 8}
+# 未配置时使用占位数据源
+SCRAPER_SOURCES = json.loads(os.getenv("SCRAPER_SOURCES", "[]") or "[]")
+SCRAPER_DEFAULT_TIMEOUT = float(os.getenv("SCRAPER_DEFAULT_TIMEOUT", "10"))
+SCRAPER_MAX_WORKERS = int(os.getenv("SCRAPER_MAX_WORKERS", "8"))
+SCRAPER_MAX_CONNECTIONS_PER_HOST = int(os.getenv("SCRAPER_MAX_CONNECTIONS_PER_HOST", "10"))
+
+# --- 近似重复合并 ---
+# LSH 分桶最多把 64 位指纹切成 8 段，只能保证距离 <= 7 的两条指纹落入同一个桶；
+# 更大的阈值会漏掉部分近似重复对，因此配置值超过上限时截断为上限
+DEDUP_SIMHASH_MAX_DISTANCE = 7
+
+
+def _clamp_dedup_distance(value: int) -> int:
+    if value > DEDUP_SIMHASH_MAX_DISTANCE:
+        logging.getLogger(__name__).warning(
+            f"DEDUP_SIMHASH_DISTANCE={value} exceeds the supported maximum "
+            f"{DEDUP_SIMHASH_MAX_DISTANCE}, using {DEDUP_SIMHASH_MAX_DISTANCE}"
+        )
+        return DEDUP_SIMHASH_MAX_DISTANCE
+    return value
+
+
+# SimHash 汉明距离 <= 该值的资讯视为同一条（转载/洗稿）并合并；< 0 表示不合并，最大为 DEDUP_SIMHASH_MAX_DISTANCE
+DEDUP_SIMHASH_DISTANCE = _clamp_dedup_distance(int(os.getenv("DEDUP_SIMHASH_DISTANCE", "3")))
+
+# --- 增量水位 ---
+# 按 keyword + 来源记录上次成功运行的最新发布时间与已见 URL（布隆过滤器），只分析新增资讯
+WATERMARK_ENABLED = os.getenv("WATERMARK_ENABLED", "true").lower() in ("1", "true", "yes")
+# 发布时间早于水位减去该回看窗口的资讯直接视为旧资讯；窗口内的资讯再查已见 URL
+WATERMARK_LOOKBACK_HOURS = float(os.getenv("WATERMARK_LOOKBACK_HOURS", "24"))
+# 布隆过滤器每一代的容量与误判率（写满后轮换，保留上一代）
+WATERMARK_BLOOM_CAPACITY = int(os.getenv("WATERMARK_BLOOM_CAPACITY", "20000"))
+WATERMARK_BLOOM_ERROR_RATE = float(os.getenv("WATERMARK_BLOOM_ERROR_RATE", "0.001"))
+# 新资讯与旧快照合并后保存的最大条数（<= 0 表示不限制）
+SNAPSHOT_MAX_ITEMS = int(os.getenv("SNAPSHOT_MAX_ITEMS", "500"))
+
+# --- 批量编排配置 ---
+# 单次调用内并发处理多个 keyword 时的最大线程数
+PIPELINE_MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", "4"))
+
 # --- LLM 运行配置 ---
 LLM_MODEL = os.getenv("LLM_MODEL", "deepseek-ai/DeepSeek-V3")
 LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://api.siliconflow.cn/v1")
 LLM_TEMPERATURE = 0.1
 LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+# LLM HTTP 连接池：连接在 FC 热实例的多次调用间保持复用
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20"))
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "300"))
+
+# --- LLM 响应缓存 ---
+# 相同 (模型, prompt, 温度) 的请求直接复用历史响应，避免重复调用
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(DATA_DIR, "llm_cache.db"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(3 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+
+# --- 分块增量对比 ---
+# 新资讯按估算 token 数切分为多个批次并行对比，最后合并去重；<= 0 表示不分块
+LLM_CHUNK_TOKEN_BUDGET = int(os.getenv("LLM_CHUNK_TOKEN_BUDGET", "6000"))
+LLM_CHUNK_MAX_WORKERS = int(os.getenv("LLM_CHUNK_MAX_WORKERS", "4"))
+
+# --- Prompt 预算 ---
+# 单次增量对比送入 LLM 的新资讯 token 总预算，超出时按来源权重/时效/新颖度排序后丢弃低分资讯；<= 0 表示不限制
+LLM_PROMPT_NEW_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_NEW_TOKEN_BUDGET", "24000"))
+# 每个 prompt 中旧快照（old_text）的 token 预算；<= 0 表示不限制
+LLM_PROMPT_OLD_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_OLD_TOKEN_BUDGET", "3000"))
+# 单条资讯的 token 上限，超出时截断正文；<= 0 表示不截断
+LLM_PROMPT_ITEM_MAX_TOKENS = int(os.getenv("LLM_PROMPT_ITEM_MAX_TOKENS", "1500"))
 
 def validate_api_key():
     """Validate that SILICONFLOW_API_KEY is set in environment.
@@ -35,6 +115,7 @@ SYSTEM_PROMPT = """你是一个专业的全行业分析助手。
 【核心要求】：
 1. 动态对齐：识别语义相同的指标。
 2. 深度洞察：请为每个变动增加一个名为 'insight' 的字段，用一句话通俗易懂地解释这个变动意味着什么（不要只是重复数值，要说背后的行业逻辑）。
+3. 证据溯源：每条新资讯前都有形如 [#0] 的编号，请在 'evidence' 字段中列出支撑该变动的资讯编号（整数数组）。
 
 【输出格式示例】：
 [
@@ -43,7 +124,8 @@ SYSTEM_PROMPT = """你是一个专业的全行业分析助手。
     "old": "80%",
     "new": "92%",
     "status": "increased",
-    "insight": "行业景气度爆发，头部厂家产线已接近满负荷运转。"
+    "insight": "行业景气度爆发，头部厂家产线已接近满负荷运转。",
+    "evidence": [0, 2]
   }
 ]"""
 
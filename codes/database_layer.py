@@ -2,15 +2,115 @@
 from __future__ import annotations
 
 import os
+import re
 import sqlite3
-from typing import List, Optional
+import threading
+from typing import Any, List, Optional, Tuple
 
-from config import DATA_DIR
+from config import DATA_DIR, DB_BUSY_TIMEOUT_SECONDS, DB_CACHE_SIZE_KB, DB_MMAP_SIZE
 from models import ConflictDecision, SourceType, now_ts
 
+# 固定的 SQL 文本会被 sqlite3 的语句缓存复用（预编译），executemany 时只编译一次
+_INSERT_DECISION_SQL = """
+    INSERT INTO conflict_decisions 
+    (run_id, keyword, field_name, final_value, chosen_source, 
+     pending_sources, reason, created_at, numeric_value, pending_mask)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_UPSERT_STATE_SQL = """
+    INSERT INTO indicator_states 
+    (keyword, field_name, final_value, chosen_source, reason, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(keyword, field_name) DO UPDATE SET
+        final_value = excluded.final_value,
+        chosen_source = excluded.chosen_source,
+        reason = excluded.reason,
+        updated_at = excluded.updated_at
+"""
+
+_HISTORY_INDEXES = [
+    ("idx_conflict_decisions_created", "created_at"),
+    ("idx_conflict_decisions_run_created", "run_id, created_at"),
+    ("idx_conflict_decisions_keyword_created", "keyword, created_at"),
+    ("idx_conflict_decisions_keyword_field_created", "keyword, field_name, created_at"),
+]
+
+_OBSOLETE_INDEXES = ["idx_conflict_decisions_run_id", "idx_conflict_decisions_keyword"]
+
+# pending_sources 的位掩码表示：每个 SourceType 占一位，便于在 SQL 中直接统计
+SOURCE_BITS = {source: 1 << i for i, source in enumerate(SourceType)}
+
+
+def sources_to_mask(sources: List[SourceType]) -> int:
+    mask = 0
+    for source in sources:
+        mask |= SOURCE_BITS.get(source, 0)
+    return mask
+
+
+def mask_to_sources(mask: int) -> List[SourceType]:
+    return [source for source, bit in SOURCE_BITS.items() if mask & bit]
+
+
+# 由逗号拼接的 pending_sources 字符串计算位掩码（用于旧数据回填）
+_PENDING_MASK_FROM_TEXT_SQL = " | ".join(
+    f"(CASE WHEN ',' || COALESCE(pending_sources, '') || ',' LIKE '%,{source.value},%' THEN {bit} ELSE 0 END)"
+    for source, bit in SOURCE_BITS.items()
+)
+
+# 来源覆盖统计的覆盖索引：统计只读索引，不回表
+_OVERRIDE_INDEXES = [
+    ("idx_conflict_decisions_chosen_pending", "chosen_source, pending_mask"),
+    ("idx_conflict_decisions_keyword_chosen_pending", "keyword, chosen_source, pending_mask"),
+]
+
+# 旧库升级时需要补充的列：(列名, 类型, 回填 SQL)
+_ADDED_COLUMNS = [
+    (
+        "numeric_value",
+        "REAL",
+        "UPDATE conflict_decisions SET numeric_value = parse_numeric_value(final_value)",
+    ),
+    (
+        "pending_mask",
+        "INTEGER NOT NULL DEFAULT 0",
+        f"UPDATE conflict_decisions SET pending_mask = {_PENDING_MASK_FROM_TEXT_SQL} "
+        "WHERE pending_sources IS NOT NULL AND pending_sources != ''",
+    ),
+]
+
+# get_indicator_series 的时间粒度 -> created_at（YYYYMMDD_HHMMSS）的前缀长度
+SERIES_BUCKETS = {
+    "raw": 15,
+    "hour": 11,
+    "day": 8,
+    "month": 6,
+    "year": 4,
+}
+
+_NUMBER_RE = re.compile(r"[-+]?\d[\d,]*(?:\.\d+)?")
+
+
+def parse_numeric_value(value: Any) -> Optional[float]:
+    """从指标值中提取第一个数字（"92%" -> 92.0，"1,850元/吨" -> 1850.0），无法解析时返回 None"""
+    if value is None:
+        return None
+    match = _NUMBER_RE.search(str(value))
+    if match is None:
+        return None
+    try:
+        return float(match.group().replace(",", ""))
+    except ValueError:
+        return None
+
 
 class DatabaseClient:
-    """SQLite 数据库客户端，用于持久化指标状态和决策历史"""
+    """SQLite 数据库客户端，用于持久化指标状态和决策历史
+
+    每个线程持有一个长连接（首次使用时创建并设置 WAL 等 pragma），
+    多 keyword 并发运行时不再为每次调用重新建立连接；WAL 模式下报表读取不阻塞写入。
+    """
 
     def __init__(self, db_path: Optional[str] = None) -> None:
         """初始化数据库客户端
@@ -22,6 +122,9 @@ class DatabaseClient:
             db_path = os.getenv("DB_PATH", os.path.join(DATA_DIR, "radar.db"))
         
         self.db_path = db_path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
         
         # 确保数据目录存在
         db_dir = os.path.dirname(self.db_path)
@@ -31,9 +134,35 @@ class DatabaseClient:
         # 初始化数据库表
         self._init_tables()
 
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的长连接（不存在时创建）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread=False 仅为允许 close() 在其他线程统一关闭，连接本身不跨线程使用
+            conn = sqlite3.connect(self.db_path, timeout=DB_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL 下 NORMAL 已能保证数据库一致性，只在断电时可能丢失最近的事务
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+            # 负数表示以 KB 为单位
+            conn.execute(f"PRAGMA cache_size={-DB_CACHE_SIZE_KB}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        """关闭所有线程的连接（之后再次调用方法会重新建立连接）"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
     def _init_tables(self) -> None:
         """初始化数据库表结构（如果不存在）"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             # 创建指标状态表（按 keyword + field_name 唯一）
@@ -60,22 +189,35 @@ class DatabaseClient:
                     chosen_source TEXT NOT NULL,
                     pending_sources TEXT,
                     reason TEXT,
-                    created_at TEXT NOT NULL
+                    created_at TEXT NOT NULL,
+                    numeric_value REAL,
+                    pending_mask INTEGER NOT NULL DEFAULT 0
                 )
             """)
             
-            # 为常用查询创建索引
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_conflict_decisions_run_id 
-                ON conflict_decisions(run_id)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_conflict_decisions_keyword 
-                ON conflict_decisions(keyword)
-            """)
+            self._migrate_columns(conn)
+            
+            # 为常用查询创建索引：与 get_decision_history 的过滤 + 排序方式一致，
+            # 按 created_at 倒序返回时可直接沿索引读取，无需对匹配结果排序
+            # （索引隐含 rowid，即 id，作为最后一列，可同时满足 id 的次级排序）
+            for name, columns in _HISTORY_INDEXES + _OVERRIDE_INDEXES:
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON conflict_decisions({columns})")
+            # 单列索引已被对应的组合索引覆盖
+            for name in _OBSOLETE_INDEXES:
+                cursor.execute(f"DROP INDEX IF EXISTS {name}")
             
             conn.commit()
 
+    @staticmethod
+    def _migrate_columns(conn: sqlite3.Connection) -> None:
+        """为旧库补充新增的派生列，并对已有数据回填"""
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(conflict_decisions)")}
+        conn.create_function("parse_numeric_value", 1, parse_numeric_value, deterministic=True)
+        for name, column_type, backfill_sql in _ADDED_COLUMNS:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE conflict_decisions ADD COLUMN {name} {column_type}")
+                conn.execute(backfill_sql)
+
     def save_decisions(
         self, 
         run_id: str, 
@@ -94,47 +236,33 @@ class DatabaseClient:
         
         now = now_ts()  # Use consistent timestamp format from models.py
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            for decision in decisions:
-                # 1. 插入到决策历史表
-                pending_sources_str = ",".join([s.value for s in decision.pending_sources])
-                cursor.execute("""
-                    INSERT INTO conflict_decisions 
-                    (run_id, keyword, field_name, final_value, chosen_source, 
-                     pending_sources, reason, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    run_id,
-                    keyword,
-                    decision.field_name,
-                    decision.final_value,
-                    decision.chosen_source.value,
-                    pending_sources_str,
-                    decision.reason,
-                    now
-                ))
-                
-                # 2. Upsert 到指标状态表（保留最新状态）
-                cursor.execute("""
-                    INSERT INTO indicator_states 
-                    (keyword, field_name, final_value, chosen_source, reason, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(keyword, field_name) DO UPDATE SET
-                        final_value = excluded.final_value,
-                        chosen_source = excluded.chosen_source,
-                        reason = excluded.reason,
-                        updated_at = excluded.updated_at
-                """, (
-                    keyword,
-                    decision.field_name,
-                    decision.final_value,
-                    decision.chosen_source.value,
-                    decision.reason,
-                    now
-                ))
-            
+        history_rows = [
+            (
+                run_id,
+                keyword,
+                d.field_name,
+                d.final_value,
+                d.chosen_source.value,
+                ",".join([s.value for s in d.pending_sources]),
+                d.reason,
+                now,
+                parse_numeric_value(d.final_value),
+                sources_to_mask(d.pending_sources),
+            )
+            for d in decisions
+        ]
+        # 同一批次内同一指标只需 upsert 最后一次的状态
+        latest = {d.field_name: d for d in decisions}
+        state_rows = [
+            (keyword, d.field_name, d.final_value, d.chosen_source.value, d.reason, now)
+            for d in latest.values()
+        ]
+        
+        with self._connect() as conn:
+            # 一个显式事务内批量写入：1. 决策历史 2. 指标最新状态
+            conn.execute("BEGIN")
+            conn.executemany(_INSERT_DECISION_SQL, history_rows)
+            conn.executemany(_UPSERT_STATE_SQL, state_rows)
             conn.commit()
 
     def get_latest_states(self, keyword: str) -> List[dict]:
@@ -146,8 +274,7 @@ class DatabaseClient:
         Returns:
             指标状态列表
         """
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -163,41 +290,181 @@ class DatabaseClient:
         self, 
         keyword: Optional[str] = None, 
         run_id: Optional[str] = None,
-        limit: int = 100
+        limit: int = 100,
+        field_name: Optional[str] = None,
+        cursor: Optional[str] = None,
     ) -> List[dict]:
-        """获取决策历史
+        """获取决策历史（按 created_at、id 倒序）
+        
+        使用游标（keyset）分页：将上一页最后一行传给 history_cursor() 得到 cursor，
+        下一页从该行之后继续读取，翻页深度不影响查询耗时。
         
         Args:
             keyword: 可选，按关键词过滤
             run_id: 可选，按运行 ID 过滤
             limit: 返回结果数量限制
+            field_name: 可选，按指标名过滤（需同时指定 keyword 才能使用对应索引）
+            cursor: 可选，上一页的游标，返回该游标之后（更早）的记录
             
         Returns:
             决策历史列表
         """
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
+        query, params = self._build_history_query(keyword, run_id, limit, field_name, cursor)
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+
+    @staticmethod
+    def history_cursor(row: dict) -> str:
+        """根据决策历史中的一行生成下一页游标"""
+        return f"{row['created_at']}:{row['id']}"
+
+    @staticmethod
+    def _build_history_query(
+        keyword: Optional[str],
+        run_id: Optional[str],
+        limit: int,
+        field_name: Optional[str] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[str, list]:
+        query = """
+            SELECT id, run_id, keyword, field_name, final_value, 
+                   chosen_source, pending_sources, reason, created_at
+            FROM conflict_decisions
+            WHERE 1=1
+        """
+        params: list = []
+        
+        if keyword:
+            query += " AND keyword = ?"
+            params.append(keyword)
+        
+        if field_name:
+            query += " AND field_name = ?"
+            params.append(field_name)
+        
+        if run_id:
+            query += " AND run_id = ?"
+            params.append(run_id)
+        
+        if cursor:
+            created_at, _, last_id = cursor.rpartition(":")
+            if not created_at or not last_id.isdigit():
+                raise ValueError(f"无效的分页游标: {cursor}")
+            # 冗余的 created_at <= ? 让 SQLite 能用索引直接定位起点，行值比较负责排除同秒已返回的行
+            query += " AND created_at <= ? AND (created_at, id) < (?, ?)"
+            params.extend([created_at, created_at, int(last_id)])
+        
+        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        return query, params
+
+    def get_indicator_series(
+        self,
+        keyword: str,
+        field_name: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        bucket: str = "day",
+    ) -> List[dict]:
+        """按时间粒度聚合单个指标的取值变化（在 SQL 中完成）
+        
+        Args:
+            keyword: 关键词
+            field_name: 指标名
+            start: 可选，时间下界（含），格式 YYYYMMDD 或 YYYYMMDD_HHMMSS
+            end: 可选，时间上界（含），格式同 start
+            bucket: 时间粒度：raw / hour / day / month / year
             
-            query = """
-                SELECT id, run_id, keyword, field_name, final_value, 
-                       chosen_source, pending_sources, reason, created_at
+        Returns:
+            按时间升序的列表，每项包含 bucket（时间前缀）、value / numeric_value（该时段最后的取值）、
+            first_value、min_value / max_value / avg_value（数值统计，无法解析为数字时为 None）、
+            decisions（决策条数）、changes（取值发生变化的次数）
+        """
+        if bucket not in SERIES_BUCKETS:
+            raise ValueError(f"不支持的时间粒度: {bucket}，可选: {', '.join(SERIES_BUCKETS)}")
+        
+        conditions = ["keyword = ?", "field_name = ?"]
+        params: list = [SERIES_BUCKETS[bucket], keyword, field_name]
+        if start:
+            conditions.append("created_at >= ?")
+            params.append(start)
+        if end:
+            # 上界按前缀包含："20260102" 包含当天所有时间（'~' 大于时间戳中的任何字符）
+            conditions.append("created_at <= ?")
+            params.append(end + "~")
+        
+        query = f"""
+            WITH points AS (
+                SELECT
+                    substr(created_at, 1, ?) AS bucket,
+                    created_at,
+                    id,
+                    final_value,
+                    numeric_value,
+                    LAG(final_value) OVER (ORDER BY created_at, id) AS prev_value
                 FROM conflict_decisions
-                WHERE 1=1
-            """
-            params = []
-            
-            if keyword:
-                query += " AND keyword = ?"
-                params.append(keyword)
-            
-            if run_id:
-                query += " AND run_id = ?"
-                params.append(run_id)
-            
-            query += " ORDER BY created_at DESC LIMIT ?"
-            params.append(limit)
-            
-            cursor.execute(query, params)
+                WHERE {" AND ".join(conditions)}
+            ),
+            ranked AS (
+                SELECT
+                    *,
+                    FIRST_VALUE(final_value) OVER w AS first_value,
+                    LAST_VALUE(final_value) OVER w AS last_value,
+                    LAST_VALUE(numeric_value) OVER w AS last_numeric
+                FROM points
+                WINDOW w AS (
+                    PARTITION BY bucket ORDER BY created_at, id
+                    ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+                )
+            )
+            SELECT
+                bucket,
+                MAX(last_value) AS value,
+                MAX(last_numeric) AS numeric_value,
+                MAX(first_value) AS first_value,
+                MIN(numeric_value) AS min_value,
+                MAX(numeric_value) AS max_value,
+                AVG(numeric_value) AS avg_value,
+                COUNT(*) AS decisions,
+                SUM(prev_value IS NOT NULL AND prev_value != final_value) AS changes
+            FROM ranked
+            GROUP BY bucket
+            ORDER BY bucket
+        """
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+
+    def get_source_override_stats(self, keyword: Optional[str] = None) -> List[dict]:
+        """统计各来源被其他来源否决的次数（例如传闻被官方来源推翻的频率）
+        
+        Args:
+            keyword: 可选，只统计该关键词
             
-            return [dict(row) for row in cursor.fetchall()]
+        Returns:
+            列表，每项包含 chosen_source（最终采纳的来源）、overruled_source（被否决的来源）、
+            count（次数），按次数降序
+        """
+        columns = ", ".join(
+            f"SUM((pending_mask & {bit}) != 0) AS {source.value}"
+            for source, bit in SOURCE_BITS.items()
+        )
+        query = f"""
+            SELECT chosen_source, {columns}
+            FROM conflict_decisions
+            WHERE {"keyword = ? AND " if keyword else ""}pending_mask != 0
+            GROUP BY chosen_source
+        """
+        params = [keyword] if keyword else []
+        
+        stats = []
+        with self._connect() as conn:
+            for row in conn.execute(query, params):
+                for source in SOURCE_BITS:
+                    if row[source.value]:
+                        stats.append({
+                            "chosen_source": row["chosen_source"],
+                            "overruled_source": source.value,
+                            "count": row[source.value],
+                        })
+        stats.sort(key=lambda s: s["count"], reverse=True)
+        return stats
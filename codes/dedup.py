@@ -0,0 +1,161 @@
+"""近似重复资讯合并：用 SimHash + LSH 分桶在近线性时间内聚类转载/洗稿的同一条资讯"""
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import logging
+import re
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+from config import DEDUP_SIMHASH_DISTANCE, DEDUP_SIMHASH_MAX_DISTANCE
+from models import SOURCE_WEIGHTS, NewsItem
+
+logger = logging.getLogger(__name__)
+
+SIMHASH_BITS = 64
+# 将 64 位指纹切成若干段分桶：汉明距离 <= 段数 - 1 的两条指纹至少有一段完全相同，
+# 因此只需比较落入同一个桶的候选对，而不是两两比较。
+# 最多 8 段（每段 8 位），阈值上限为 DEDUP_SIMHASH_MAX_DISTANCE = 7
+_MAX_BANDS = DEDUP_SIMHASH_MAX_DISTANCE + 1
+
+_TOKEN_RE = re.compile(r"[\u4e00-\u9fff]|[a-z0-9]+")
+
+
+def _features(text: str) -> List[str]:
+    # 中文按字、英文数字按词切分，再取相邻二元组作为特征（对少量改写不敏感）
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < 2:
+        return tokens
+    return [a + b for a, b in zip(tokens, tokens[1:])]
+
+
+# 位并行累加：把 64 位哈希的每一位展开到大整数中各自独立的 32 位"通道"里，
+# 每个特征只需一次大整数加法即可同时累加 64 个位计数（代替逐位循环）
+_LANE_BITS = 32
+_LANE_MASK = (1 << _LANE_BITS) - 1
+_SPREAD_TABLES = [
+    [
+        sum(((b >> j) & 1) << ((k * 8 + j) * _LANE_BITS) for j in range(8))
+        for b in range(256)
+    ]
+    for k in range(SIMHASH_BITS // 8)
+]
+
+
+def simhash(text: str) -> int:
+    """计算文本的 64 位 SimHash 指纹"""
+    tables = _SPREAD_TABLES
+    lanes = 0
+    total = 0
+    for feature, count in Counter(_features(text)).items():
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        spread = 0
+        for table, byte in zip(tables, digest):
+            spread |= table[byte]
+        lanes += spread * count
+        total += count
+
+    # 某一位在超过一半（按权重）的特征中为 1，则指纹该位为 1
+    fingerprint = 0
+    for i in range(SIMHASH_BITS):
+        if 2 * ((lanes >> (i * _LANE_BITS)) & _LANE_MASK) > total:
+            fingerprint |= 1 << i
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _item_text(item: NewsItem) -> str:
+    return f"{item.title}\n{item.content}"
+
+
+def _representative(items: Sequence[NewsItem], members: List[int]) -> int:
+    # 来源权重最高者优先；同权重时证据更完整（url/时间）者优先；再按原始顺序
+    return max(
+        members,
+        key=lambda i: (
+            SOURCE_WEIGHTS.get(items[i].source, 0.0),
+            bool(items[i].url) + bool(items[i].published_at),
+            -i,
+        ),
+    )
+
+
+def cluster_near_duplicates(
+    items: Sequence[NewsItem], max_distance: int = DEDUP_SIMHASH_DISTANCE
+) -> List[List[int]]:
+    """将近似重复的资讯聚类，返回按首个成员位置排序的编号列表
+
+    Args:
+        items: 资讯列表
+        max_distance: SimHash 汉明距离阈值（<= max_distance 视为近似重复），
+            最大为 DEDUP_SIMHASH_MAX_DISTANCE，超过时抛出 ValueError（分桶无法保证找全近似重复对）
+    """
+    if max_distance > DEDUP_SIMHASH_MAX_DISTANCE:
+        raise ValueError(
+            f"max_distance={max_distance} exceeds the supported maximum {DEDUP_SIMHASH_MAX_DISTANCE}"
+        )
+    n = len(items)
+    if n < 2 or max_distance < 0:
+        return [[i] for i in range(n)]
+
+    bands = min(max_distance + 1, _MAX_BANDS)
+    band_bits = SIMHASH_BITS // bands
+    mask = (1 << band_bits) - 1
+    fingerprints = [simhash(_item_text(item)) for item in items]
+
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets: Dict[tuple, List[int]] = {}
+    for i, fp in enumerate(fingerprints):
+        for band in range(bands):
+            buckets.setdefault((band, (fp >> (band * band_bits)) & mask), []).append(i)
+
+    for members in buckets.values():
+        for pos, i in enumerate(members):
+            for j in members[pos + 1:]:
+                root_i, root_j = find(i), find(j)
+                if root_i != root_j and hamming_distance(fingerprints[i], fingerprints[j]) <= max_distance:
+                    parent[root_j] = root_i
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(n):
+        clusters.setdefault(find(i), []).append(i)
+    return sorted(clusters.values(), key=lambda members: members[0])
+
+
+def group_near_duplicates(
+    items: Sequence[NewsItem], max_distance: int = DEDUP_SIMHASH_DISTANCE
+) -> List[Tuple[NewsItem, List[NewsItem]]]:
+    """合并近似重复的资讯，返回 [(代表条目, 聚类中的原始条目)]
+
+    代表条目为聚类中来源权重最高的一条，corroboration 记录聚类大小；
+    结果按各聚类首条资讯的原始顺序排列，不修改传入的条目。
+    """
+    groups: List[Tuple[NewsItem, List[NewsItem]]] = []
+    for members in cluster_near_duplicates(items, max_distance):
+        rep = items[_representative(items, members)]
+        size = sum(items[i].corroboration for i in members)
+        if size != rep.corroboration:
+            rep = dataclasses.replace(rep, corroboration=size)
+        groups.append((rep, [items[i] for i in members]))
+
+    if len(groups) < len(items):
+        logger.info(f"Collapsed {len(items)} items into {len(groups)} near-duplicate clusters")
+    return groups
+
+
+def collapse_near_duplicates(
+    items: Sequence[NewsItem], max_distance: int = DEDUP_SIMHASH_DISTANCE
+) -> List[NewsItem]:
+    """合并近似重复的资讯：每个聚类保留来源权重最高的一条，并在 corroboration 中记录聚类大小"""
+    return [rep for rep, _ in group_near_duplicates(items, max_distance)]
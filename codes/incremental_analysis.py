@@ -1,78 +1,248 @@
 import os
+import asyncio
 import json
+import logging
 import re
-from typing import List, Optional
-from langchain_openai import ChatOpenAI
-from models import ChangeItem, NewsItem, ReportSnapshot, SourceType, ConflictDecision, SOURCE_WEIGHTS
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from models import (
+    ChangeItem, NewsItem, ReportSnapshot, SourceType, ConflictDecision, SOURCE_WEIGHTS,
+    item_fingerprint,
+)
 from config import (
     SYSTEM_PROMPT, USER_PROMPT_TEMPLATE, 
     LLM_MODEL, LLM_BASE_URL, LLM_TEMPERATURE, LLM_MAX_RETRIES,
+    LLM_HTTP_MAX_CONNECTIONS, LLM_HTTP_KEEPALIVE_EXPIRY,
+    LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES,
+    LLM_CHUNK_TOKEN_BUDGET, LLM_CHUNK_MAX_WORKERS,
+    LLM_PROMPT_NEW_TOKEN_BUDGET, LLM_PROMPT_OLD_TOKEN_BUDGET, LLM_PROMPT_ITEM_MAX_TOKENS,
     validate_api_key
 )
+from llm_cache import LLMCache
+from prompt_budget import PackReport, estimate_tokens, pack_items
 
-api_key = validate_api_key()
+logger = logging.getLogger(__name__)
 
-llm = ChatOpenAI(
-    api_key=api_key,
-    base_url=LLM_BASE_URL,
-    model=LLM_MODEL,
-    max_retries=LLM_MAX_RETRIES,
-    temperature=LLM_TEMPERATURE
-)
+# LLM 客户端在首次调用时才创建（避免导入模块即校验 API Key、加载 langchain），
+# 之后在进程内复用，FC 热实例的多次调用共享同一个 HTTP 连接池。
+_llm: Optional[Any] = None
+_llm_lock = threading.Lock()
+# 异步客户端按事件循环分别创建：httpx.AsyncClient 的 keep-alive 连接绑定创建它的事件循环，
+# 多次 asyncio.run(...) 之间不能共用（事件循环关闭后即失效，随之被回收）
+_async_llms: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
 
 
-def _clamp(value: float, low: float = 0.2, high: float = 0.95) -> float:
-    return max(low, min(high, value))
+def _create_llm(async_http: bool = False) -> Any:
+    """创建 ChatOpenAI 客户端；async_http=True 时使用 httpx.AsyncClient（供 ainvoke），否则使用 httpx.Client"""
+    api_key = validate_api_key()
 
+    import httpx
+    from langchain_openai import ChatOpenAI
 
-def _compute_dynamic_confidence(
-    change: dict,
-    default_source: SourceType,
-    new_items: List[NewsItem],
-) -> float:
-    """根据来源权重、来源丰富度及 LLM 反馈动态计算置信度。
+    limits = httpx.Limits(
+        max_connections=LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_HTTP_MAX_CONNECTIONS,
+        keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+    )
+    http_kwargs = (
+        {"http_async_client": httpx.AsyncClient(limits=limits)}
+        if async_http
+        else {"http_client": httpx.Client(limits=limits)}
+    )
+    return ChatOpenAI(
+        api_key=api_key,
+        base_url=LLM_BASE_URL,
+        model=LLM_MODEL,
+        max_retries=LLM_MAX_RETRIES,
+        temperature=LLM_TEMPERATURE,
+        **http_kwargs,
+    )
 
-    优先使用 LLM 返回的 confidence（若有），并与来源信息融合。
+
+def get_llm() -> Any:
+    """获取进程级共享的 ChatOpenAI 客户端（懒加载，线程安全）"""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                _llm = _create_llm()
+    return _llm
+
+
+def get_async_llm() -> Any:
+    """获取当前事件循环专用的 ChatOpenAI 客户端（同一事件循环内共享连接池，须在协程中调用）"""
+    loop = asyncio.get_running_loop()
+    with _llm_lock:
+        llm = _async_llms.get(loop)
+        if llm is None:
+            llm = _async_llms[loop] = _create_llm(async_http=True)
+    return llm
+
+
+def __getattr__(name: str) -> Any:
+    # 兼容旧代码中的 `incremental_analysis.llm` 访问方式
+    if name == "llm":
+        return get_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+_llm_cache: Optional[LLMCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """获取 LLM 响应缓存单例；LLM_CACHE_ENABLED 关闭时返回 None"""
+    global _llm_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                _llm_cache = LLMCache(
+                    db_path=LLM_CACHE_PATH,
+                    ttl_seconds=LLM_CACHE_TTL_SECONDS,
+                    max_entries=LLM_CACHE_MAX_ENTRIES,
+                )
+    return _llm_cache
+
+
+def llm_cache_stats() -> Dict[str, Any]:
+    """返回 LLM 缓存命中/未命中统计（缓存关闭时返回空字典）"""
+    cache = get_llm_cache()
+    return cache.stats() if cache is not None else {}
+
+
+def _invoke_llm(messages: List[Tuple[str, str]], validate: Callable[[str], bool]) -> str:
+    """调用 LLM 并返回文本内容，优先读取响应缓存
+
+    只有通过 validate 校验的响应才会写入缓存：格式错误或截断的响应不缓存，
+    否则在 TTL 内重复调用都会命中同一个坏结果。
     """
+    cache = get_llm_cache()
+    key = LLMCache.make_key(LLM_MODEL, messages, LLM_TEMPERATURE) if cache else None
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    content = get_llm().invoke(messages).content
+    if cache is not None and validate(content):
+        cache.set(key, content)
+    return content
+
+
+async def _ainvoke_llm(messages: List[Tuple[str, str]], validate: Callable[[str], bool]) -> str:
+    """_invoke_llm 的异步版本（缓存读写放入线程池，LLM 调用使用 ainvoke）"""
+    cache = get_llm_cache()
+    key = LLMCache.make_key(LLM_MODEL, messages, LLM_TEMPERATURE) if cache else None
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            return cached
+
+    content = (await get_async_llm().ainvoke(messages)).content
+    if cache is not None and validate(content):
+        await asyncio.to_thread(cache.set, key, content)
+    return content
+
+
+def _clamp(value: float, low: float = 0.2, high: float = 0.95) -> float:
+    return max(low, min(high, value))
+
+
+def _parse_llm_confidence(change: dict) -> Optional[float]:
     llm_conf_raw = change.get("confidence")
-    llm_conf = None
     try:
         if llm_conf_raw is not None:
-            llm_conf = float(llm_conf_raw)
+            return float(llm_conf_raw)
     except (TypeError, ValueError):
-        llm_conf = None
-
-    # 来源权重
-    source_weight = float(SOURCE_WEIGHTS.get(default_source, 0.5))
-
-    # 来源丰富度：采集条数、来源多样性、证据完备度（url/时间）
-    total = max(len(new_items), 1)
-    count_score = min(1.0, total / 3)
-
-    distinct_sources = len({i.source for i in new_items if i.source is not None})
-    source_div_score = min(1.0, distinct_sources / 3)
-
-    evidence_hits = 0
-    for item in new_items:
-        if item.url:
-            evidence_hits += 1
-        if item.published_at:
-            evidence_hits += 1
-    evidence_score = evidence_hits / (2 * total)
-
-    computed = (
-        0.45 * source_weight
-        + 0.30 * source_div_score
-        + 0.15 * count_score
-        + 0.10 * evidence_score
-    )
+        pass
+    return None
 
-    if llm_conf is not None:
-        return _clamp(0.6 * llm_conf + 0.4 * computed)
-    return _clamp(computed)
 
-def robust_json_parse(text: str) -> list:
-    """JSON 强力提取与修复函数"""
+class EvidenceProfile:
+    """一批资讯的证据画像（整批共用一个，不区分来源），供该批次的所有变动复用。
+
+    构建时逐条记录每条资讯的来源与证据完备度（url/时间）。丰富度得分按支撑集合
+    （变动引用的资讯编号元组，未引用时为整批）懒计算并缓存：引用相同资讯的变动只扫描一次。
+    """
+
+    def __init__(self, items: List[NewsItem]) -> None:
+        self.sources: List[SourceType] = [i.source for i in items]
+        self.evidence_hits: List[int] = [bool(i.url) + bool(i.published_at) for i in items]
+        # 近似重复合并后，每条资讯额外被多少条转载印证
+        self.extra_corroboration: List[int] = [max(i.corroboration - 1, 0) for i in items]
+        self._all = tuple(range(len(items)))
+        self._richness_cache: Dict[Tuple[int, ...], Tuple[float, float, float]] = {}
+        self._strongest_cache: Dict[Tuple[int, ...], SourceType] = {}
+
+    def _key(self, indices: Optional[Sequence[int]]) -> Tuple[int, ...]:
+        return tuple(sorted(set(indices))) if indices else self._all
+
+    def richness(self, indices: Optional[Sequence[int]] = None) -> Tuple[float, float, float]:
+        """返回支撑集合的 (条数得分, 来源多样性得分, 证据完备度得分)；indices 为空表示整批"""
+        key = self._key(indices)
+        cached = self._richness_cache.get(key)
+        if cached is not None:
+            return cached
+
+        total = max(len(key), 1)
+        distinct_sources = len({self.sources[i] for i in key if self.sources[i] is not None})
+        evidence_hits = sum(self.evidence_hits[i] for i in key)
+        # 转载印证按半条独立资讯计入条数得分，避免同一消息的多次转载被当作多条独立证据
+        corroboration = sum(self.extra_corroboration[i] for i in key)
+        scores = (
+            min(1.0, (total + 0.5 * corroboration) / 3),
+            min(1.0, distinct_sources / 3),
+            evidence_hits / (2 * total),
+        )
+        self._richness_cache[key] = scores
+        return scores
+
+    def strongest_source(self, indices: Sequence[int]) -> SourceType:
+        """返回支撑资讯中权重最高的来源"""
+        key = self._key(indices)
+        cached = self._strongest_cache.get(key)
+        if cached is None:
+            cached = max((self.sources[i] for i in key), key=lambda s: SOURCE_WEIGHTS.get(s, 0.0))
+            self._strongest_cache[key] = cached
+        return cached
+
+
+def _score_confidences(
+    changes: Sequence[dict],
+    sources: Sequence[SourceType],
+    supports: Sequence[Sequence[int]],
+    profile: EvidenceProfile,
+) -> List[float]:
+    """逐个变动计算置信度：根据来源权重、来源丰富度及 LLM 反馈动态计算。
+
+    优先使用 LLM 返回的 confidence（若有），并与来源信息融合。
+    supports 为每个变动的支撑资讯编号（为空表示整批资讯），丰富度得分取自共享的 profile
+    （按支撑集合缓存），每个变动仍在循环中单独计算，并非向量化。
+    """
+    confidences: List[float] = []
+    for change, source, indices in zip(changes, sources, supports):
+        source_weight = float(SOURCE_WEIGHTS.get(source, 0.5))
+        count_score, source_div_score, evidence_score = profile.richness(indices)
+        computed = (
+            0.45 * source_weight
+            + 0.30 * source_div_score
+            + 0.15 * count_score
+            + 0.10 * evidence_score
+        )
+
+        llm_conf = _parse_llm_confidence(change)
+        if llm_conf is not None:
+            confidences.append(_clamp(0.6 * llm_conf + 0.4 * computed))
+        else:
+            confidences.append(_clamp(computed))
+    return confidences
+
+def _extract_json(text: str) -> Optional[Any]:
+    """从 LLM 响应中提取 JSON（兼容 ```json 代码块与尾随逗号），无法解析时返回 None"""
     try:
         text = text.strip()
         if text.startswith("```"):
@@ -85,50 +255,328 @@ def robust_json_parse(text: str) -> list:
                 clean_json = re.sub(r',\s*\]', ']', match.group())
                 return json.loads(clean_json)
             except: pass
-    return []
+    return None
 
-def incremental_compare(old_snapshot: Optional[ReportSnapshot], new_items: List[NewsItem]) -> List[ChangeItem]:
-    """对比新旧数据并生成带洞察的变动项"""
-    if not new_items:
+
+def robust_json_parse(text: str) -> list:
+    """JSON 强力提取与修复函数"""
+    parsed = _extract_json(text)
+    return [] if parsed is None else parsed
+
+
+def _is_change_list(content: str) -> bool:
+    """对比响应是否为预期的 JSON 数组（元素均为对象；空数组表示无变动，同样有效）"""
+    if not isinstance(content, str):
+        return False
+    parsed = _extract_json(content)
+    return isinstance(parsed, list) and all(isinstance(c, dict) for c in parsed)
+
+
+def _is_summary(content: str) -> bool:
+    """总结响应是否为非空文本"""
+    return bool(content and content.strip())
+
+def select_changed_items(
+    old_snapshot: Optional[ReportSnapshot],
+    new_items: List[NewsItem],
+) -> List[NewsItem]:
+    """预比对：按内容指纹剔除与旧快照完全相同的条目，只保留新增/变化的资讯"""
+    if not old_snapshot or not old_snapshot.items:
+        return list(new_items)
+
+    known = {item_fingerprint(i) for i in old_snapshot.items}
+    return [i for i in new_items if item_fingerprint(i) not in known]
+
+
+def _format_new_item(item: NewsItem, index: int) -> str:
+    return f"[#{index}][{item.source.value}] {item.title}: {item.content}"
+
+
+def _format_old_item(item: NewsItem) -> str:
+    return f"- {item.title}: {item.content}"
+
+
+def _log_pack_report(label: str, report: PackReport) -> None:
+    if report.truncated:
+        logger.info(f"Prompt budget truncated {len(report.truncated)} {label} items: {report.truncated[:5]}")
+    if report.dropped:
+        logger.warning(
+            f"Prompt budget ({report.budget} tokens) dropped {len(report.dropped)} {label} items "
+            f"({report.dropped_tokens} tokens), kept {report.kept}: {report.dropped[:5]}"
+        )
+
+
+def select_prompt_items(
+    old_snapshot: Optional[ReportSnapshot],
+    new_items: List[NewsItem],
+) -> Tuple[List[NewsItem], List[NewsItem]]:
+    """将新资讯控制在 LLM_PROMPT_NEW_TOKEN_BUDGET 内：过长正文截断，超出预算时按
+    来源权重/时效/新颖度（相对旧快照）丢弃低分资讯，使单次对比的 LLM 调用量有上限
+
+    Returns:
+        (送入 prompt 的资讯（可能已截断）, 与之一一对应的原始资讯)
+    """
+    reference = old_snapshot.items if old_snapshot else None
+    kept, report = pack_items(
+        new_items,
+        LLM_PROMPT_NEW_TOKEN_BUDGET,
+        lambda item: _format_new_item(item, len(new_items)),
+        reference=reference,
+        max_item_tokens=LLM_PROMPT_ITEM_MAX_TOKENS,
+    )
+    _log_pack_report("new", report)
+    return kept, [new_items[i] for i in report.kept_indices]
+
+
+def build_old_text(old_snapshot: Optional[ReportSnapshot]) -> str:
+    """拼装 prompt 中的旧快照文本（限制在 LLM_PROMPT_OLD_TOKEN_BUDGET 内，各批次共用）"""
+    if not old_snapshot or not old_snapshot.items:
+        return "尚未记录历史指标。"
+    kept, report = pack_items(
+        old_snapshot.items,
+        LLM_PROMPT_OLD_TOKEN_BUDGET,
+        _format_old_item,
+        max_item_tokens=LLM_PROMPT_ITEM_MAX_TOKENS,
+    )
+    _log_pack_report("old", report)
+    return "\n".join(_format_old_item(i) for i in kept)
+
+
+def split_into_chunks(items: List[NewsItem], token_budget: int) -> List[List[NewsItem]]:
+    """按 token 预算将资讯顺序切分为多个批次；单条超出预算的资讯独占一个批次"""
+    if token_budget <= 0 or not items:
+        return [list(items)] if items else []
+
+    chunks: List[List[NewsItem]] = []
+    current: List[NewsItem] = []
+    current_tokens = 0
+    for item in items:
+        tokens = estimate_tokens(_format_new_item(item, len(current))) + 1  # 换行符
+        if current and current_tokens + tokens > token_budget:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def merge_changes(changes: List[ChangeItem]) -> List[ChangeItem]:
+    """合并各批次的变动项：同一指标 + 同一来源只保留置信度最高的一条。
+
+    不同来源对同一指标的结论全部保留，交由 resolve_conflicts 按来源权重仲裁。
+    """
+    merged: Dict[Tuple[str, SourceType], ChangeItem] = {}
+    for c in changes:
+        key = (c.field_name, c.source)
+        existing = merged.get(key)
+        if existing is None or c.confidence > existing.confidence:
+            merged[key] = c
+    return list(merged.values())
+
+
+def _build_compare_messages(old_text: str, new_items: List[NewsItem]) -> List[Tuple[str, str]]:
+    """拼装增量对比的 LLM 消息（同步/异步版本共用）"""
+    new_text = "\n".join([_format_new_item(item, idx) for idx, item in enumerate(new_items)])
+
+    return [
+        ("system", SYSTEM_PROMPT),
+        ("user", USER_PROMPT_TEMPLATE.format(old_text=old_text, new_text=new_text))
+    ]
+
+
+def _parse_evidence(change: dict, total: int) -> List[int]:
+    """解析 LLM 返回的 evidence 编号（兼容 "#1"、"1" 等写法），丢弃越界与重复编号"""
+    raw = change.get("evidence")
+    if raw is None:
         return []
+    if not isinstance(raw, (list, tuple)):
+        raw = [raw]
 
-    old_text = "尚未记录历史指标。"
-    if old_snapshot and old_snapshot.items:
-        old_text = "\n".join([f"- {i.title}: {i.content}" for i in old_snapshot.items])
-    
-    new_text = "\n".join([f"[{i.source.value}] {i.title}: {i.content}" for i in new_items])
+    indices: List[int] = []
+    for value in raw:
+        try:
+            idx = int(str(value).strip().lstrip("#"))
+        except (TypeError, ValueError):
+            continue
+        if 0 <= idx < total and idx not in indices:
+            indices.append(idx)
+    return indices
 
+
+def _parse_changes(content: str, new_items: List[NewsItem]) -> List[ChangeItem]:
+    """将 LLM 返回内容解析为 ChangeItem 列表
+
+    每个变动的来源取其支撑资讯（evidence）中权重最高的来源，置信度也仅基于这些资讯计算；
+    LLM 未给出有效 evidence 时回退为整批资讯、来源取第一条资讯的来源。
+    """
+    raw_changes = [c for c in robust_json_parse(content) if isinstance(c, dict)]
+    if not raw_changes:
+        return []
+
+    profile = EvidenceProfile(new_items)
+    default_source = new_items[0].source
+    supports = [_parse_evidence(c, len(new_items)) for c in raw_changes]
+    sources = [
+        profile.strongest_source(indices) if indices else default_source
+        for indices in supports
+    ]
+    confidences = _score_confidences(raw_changes, sources, supports, profile)
+
+    return [
+        ChangeItem(
+            field_name=str(c.get("field", "未知指标")),
+            old=str(c.get("old", "N/A")),
+            new=str(c.get("new", "N/A")),
+            status=str(c.get("status", "changed")),
+            insight=str(c.get("insight", "指标发生变动，请关注。")),
+            source=source,
+            confidence=confidence,
+        )
+        for c, source, confidence in zip(raw_changes, sources, confidences)
+    ]
+
+
+def _compare_chunk(old_text: str, items: List[NewsItem]) -> Optional[List[ChangeItem]]:
+    """对单个批次调用 LLM 并解析结果；调用失败或响应不是预期的 JSON 数组时返回 None
+    （该批次视为未对比，下次运行重试），不影响其他批次"""
     try:
-        response = llm.invoke([
-            ("system", SYSTEM_PROMPT),
-            ("user", USER_PROMPT_TEMPLATE.format(old_text=old_text, new_text=new_text))
-        ])
-        
-        raw_changes = robust_json_parse(response.content)
-        changes: List[ChangeItem] = []
-
-        default_source = new_items[0].source
-        for c in raw_changes:
-            confidence = _compute_dynamic_confidence(c, default_source, new_items)
-            changes.append(ChangeItem(
-                field_name=str(c.get("field", "未知指标")),
-                old=str(c.get("old", "N/A")),
-                new=str(c.get("new", "N/A")),
-                status=str(c.get("status", "changed")),
-                insight=str(c.get("insight", "指标发生变动，请关注。")),
-                source=default_source,
-                confidence=confidence,
-            ))
-        return changes
+        content = _invoke_llm(_build_compare_messages(old_text, items), _is_change_list)
     except Exception as e:
         print(f"AI 增量分析失败: {e}")
-        return []
+        return None
+    return _checked_changes(content, items)
 
-def generate_global_summary(keyword: str, decisions: List[ConflictDecision]) -> str:
-    """基于所有仲裁后的决策，生成全局通俗综述"""
-    if not decisions:
-        return f"针对 {keyword} 行业，本次巡检未发现显著的指标变动。"
 
+def _checked_changes(content: str, items: List[NewsItem]) -> Optional[List[ChangeItem]]:
+    if not _is_change_list(content):
+        print(f"AI 增量分析失败: 响应不是 JSON 数组: {content[:200]!r}")
+        return None
+    try:
+        return _parse_changes(content, items)
+    except Exception as e:
+        print(f"AI 增量分析失败: {e}")
+        return None
+
+
+async def _compare_chunk_async(old_text: str, items: List[NewsItem]) -> Optional[List[ChangeItem]]:
+    """_compare_chunk 的异步版本"""
+    try:
+        content = await _ainvoke_llm(_build_compare_messages(old_text, items), _is_change_list)
+    except Exception as e:
+        print(f"AI 增量分析失败: {e}")
+        return None
+    return _checked_changes(content, items)
+
+
+@dataclass
+class CompareResult:
+    """增量对比结果
+
+    analyzed 为本次已处理的输入资讯：与旧快照相同而无需对比的资讯，以及所在批次成功调用 LLM
+    并解析的资讯；被 prompt 预算丢弃或所在批次失败的资讯不计入，供调用方下次重试。
+    """
+    changes: List[ChangeItem] = field(default_factory=list)
+    analyzed: List[NewsItem] = field(default_factory=list)
+
+
+def _plan_comparison(
+    old_snapshot: Optional[ReportSnapshot],
+    new_items: List[NewsItem],
+) -> Tuple[List[NewsItem], List[Tuple[List[NewsItem], List[NewsItem]]], str]:
+    """同步/异步版本共用的对比准备
+
+    Returns:
+        (与旧快照相同的资讯, [(送入 prompt 的批次, 对应的原始资讯)], 旧快照文本)
+    """
+    changed = select_changed_items(old_snapshot, new_items)
+    changed_ids = {id(i) for i in changed}
+    unchanged = [i for i in new_items if id(i) not in changed_ids]
+    if not changed:
+        logger.info("No new or changed items since last snapshot, skipping LLM comparison")
+        return unchanged, [], ""
+
+    # 在批次级异常兜底之外创建客户端：缺少 API Key 等配置错误应直接抛出，而不是被当作“无变动”
+    get_llm()
+
+    prompt_items, originals = select_prompt_items(old_snapshot, changed)
+    chunks = []
+    offset = 0
+    for chunk in split_into_chunks(prompt_items, LLM_CHUNK_TOKEN_BUDGET):
+        chunks.append((chunk, originals[offset:offset + len(chunk)]))
+        offset += len(chunk)
+    if len(chunks) > 1:
+        logger.info(f"Comparing {len(prompt_items)} items in {len(chunks)} chunks")
+    return unchanged, chunks, build_old_text(old_snapshot)
+
+
+def _collect_results(
+    unchanged: List[NewsItem],
+    chunks: List[Tuple[List[NewsItem], List[NewsItem]]],
+    results: List[Optional[List[ChangeItem]]],
+) -> CompareResult:
+    analyzed = list(unchanged)
+    changes: List[ChangeItem] = []
+    for (_, originals), result in zip(chunks, results):
+        if result is None:
+            continue
+        analyzed.extend(originals)
+        changes.extend(result)
+    if len(results) > 1:
+        changes = merge_changes(changes)
+    return CompareResult(changes=changes, analyzed=analyzed)
+
+
+def compare_items(old_snapshot: Optional[ReportSnapshot], new_items: List[NewsItem]) -> CompareResult:
+    """对比新旧数据，返回变动项与实际处理过的资讯
+
+    与旧快照完全相同的条目会在调用 LLM 前被剔除；若全部未变化则不调用 LLM。
+    新资讯与旧快照分别按 LLM_PROMPT_NEW_TOKEN_BUDGET / LLM_PROMPT_OLD_TOKEN_BUDGET 截断，
+    新资讯超出 LLM_CHUNK_TOKEN_BUDGET 时按批次并行对比，再按 (指标, 来源) 合并去重。
+    """
+    unchanged, chunks, old_text = _plan_comparison(old_snapshot, new_items)
+    if len(chunks) <= 1:
+        results = [_compare_chunk(old_text, prompt_items) for prompt_items, _ in chunks]
+    else:
+        # Map：各批次并行对比；Reduce：合并去重
+        workers = max(1, min(LLM_CHUNK_MAX_WORKERS, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="radar-compare") as executor:
+            results = list(executor.map(lambda chunk: _compare_chunk(old_text, chunk[0]), chunks))
+    return _collect_results(unchanged, chunks, results)
+
+
+async def compare_items_async(
+    old_snapshot: Optional[ReportSnapshot],
+    new_items: List[NewsItem],
+) -> CompareResult:
+    """compare_items 的异步版本（基于 llm.ainvoke，不阻塞事件循环）"""
+    unchanged, chunks, old_text = _plan_comparison(old_snapshot, new_items)
+    semaphore = asyncio.Semaphore(max(1, LLM_CHUNK_MAX_WORKERS))
+
+    async def _bounded(prompt_items: List[NewsItem]) -> Optional[List[ChangeItem]]:
+        async with semaphore:
+            return await _compare_chunk_async(old_text, prompt_items)
+
+    results = await asyncio.gather(*(_bounded(prompt_items) for prompt_items, _ in chunks))
+    return _collect_results(unchanged, chunks, list(results))
+
+
+def incremental_compare(old_snapshot: Optional[ReportSnapshot], new_items: List[NewsItem]) -> List[ChangeItem]:
+    """对比新旧数据并生成带洞察的变动项（只返回 compare_items 的变动项）"""
+    return compare_items(old_snapshot, new_items).changes
+
+
+async def incremental_compare_async(
+    old_snapshot: Optional[ReportSnapshot],
+    new_items: List[NewsItem],
+) -> List[ChangeItem]:
+    """incremental_compare 的异步版本"""
+    return (await compare_items_async(old_snapshot, new_items)).changes
+
+
+def _build_summary_messages(keyword: str, decisions: List[ConflictDecision]) -> List[Tuple[str, str]]:
+    """拼装全局总结的 LLM 消息（同步/异步版本共用）"""
     # 汇总上下文供 AI 总结
     summary_context = "\n".join([
         f"- {d.field_name}: 变为 {d.final_value}。专家分析: {d.reason}" 
@@ -140,9 +588,26 @@ def generate_global_summary(keyword: str, decisions: List[ConflictDecision]) ->
     
     【变动清单】：
     {summary_context}"""
-    
+    return [("user", prompt)]
+
+
+def generate_global_summary(keyword: str, decisions: List[ConflictDecision]) -> str:
+    """基于所有仲裁后的决策，生成全局通俗综述"""
+    if not decisions:
+        return f"针对 {keyword} 行业，本次巡检未发现显著的指标变动。"
+
+    try:
+        return _invoke_llm(_build_summary_messages(keyword, decisions), _is_summary).strip()
+    except Exception:
+        return "行业发生多项变动，整体处于调整期，建议持续关注核心指标。"
+
+
+async def generate_global_summary_async(keyword: str, decisions: List[ConflictDecision]) -> str:
+    """generate_global_summary 的异步版本"""
+    if not decisions:
+        return f"针对 {keyword} 行业，本次巡检未发现显著的指标变动。"
+
     try:
-        response = llm.invoke([("user", prompt)])
-        return response.content.strip()
+        return (await _ainvoke_llm(_build_summary_messages(keyword, decisions), _is_summary)).strip()
     except Exception:
         return "行业发生多项变动，整体处于调整期，建议持续关注核心指标。"
@@ -0,0 +1,152 @@
+"""LLM 响应缓存：按 (模型, 消息, 温度) 的内容哈希缓存模型输出，持久化在 SQLite 中"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from config import DATA_DIR
+
+
+class LLMCache:
+    """内容寻址的 LLM 响应缓存（TTL 过期 + 按条数 LRU 淘汰）"""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        ttl_seconds: int = 3 * 24 * 3600,
+        max_entries: int = 1000,
+    ) -> None:
+        """初始化缓存
+
+        Args:
+            db_path: 缓存数据库路径，默认使用 ${DATA_DIR}/llm_cache.db（与 radar.db 同目录）
+            ttl_seconds: 缓存有效期（秒），<= 0 表示永不过期
+            max_entries: 最大缓存条数，超出后按最近访问时间淘汰
+        """
+        if db_path is None:
+            db_path = os.path.join(DATA_DIR, "llm_cache.db")
+
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._init_tables()
+
+    def _init_tables(self) -> None:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access
+                ON llm_cache(last_access)
+            """)
+            conn.commit()
+
+    @staticmethod
+    def make_key(model: str, messages: Sequence[Tuple[str, str]], temperature: float) -> str:
+        """根据模型、完整消息（system + 渲染后的 user prompt）与温度计算缓存键"""
+        payload = json.dumps(
+            [model, float(temperature), [list(m) for m in messages]],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存，未命中或已过期返回 None"""
+        now = time.time()
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE cache_key = ?",
+                (key,),
+            ).fetchone()
+
+            if row is not None and self._is_expired(row[1], now):
+                conn.execute("DELETE FROM llm_cache WHERE cache_key = ?", (key,))
+                row = None
+            elif row is not None:
+                conn.execute(
+                    "UPDATE llm_cache SET last_access = ? WHERE cache_key = ?",
+                    (now, key),
+                )
+            conn.commit()
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return row[0]
+
+    def set(self, key: str, response: str) -> None:
+        """写入缓存，并清理过期条目与超出容量的最久未访问条目"""
+        now = time.time()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT INTO llm_cache (cache_key, response, created_at, last_access)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    response = excluded.response,
+                    created_at = excluded.created_at,
+                    last_access = excluded.last_access
+            """, (key, response, now, now))
+
+            if self.ttl_seconds > 0:
+                conn.execute(
+                    "DELETE FROM llm_cache WHERE created_at < ?",
+                    (now - self.ttl_seconds,),
+                )
+
+            if self.max_entries > 0:
+                conn.execute("""
+                    DELETE FROM llm_cache WHERE cache_key IN (
+                        SELECT cache_key FROM llm_cache
+                        ORDER BY last_access DESC
+                        LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+            conn.commit()
+
+    def clear(self) -> None:
+        """清空缓存并重置计数器"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM llm_cache")
+            conn.commit()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中/未命中计数与当前缓存条数"""
+        with sqlite3.connect(self.db_path) as conn:
+            size = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "size": size,
+        }
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
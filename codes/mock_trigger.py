@@ -184,6 +184,42 @@ def test_pipeline_error():
     print("✅ 测试通过")
 
 
+def test_keywords_event():
+    """测试 event 包含 keywords 列表时走批量模式，失败项被隔离"""
+    print("\n" + "="*60)
+    print("测试 7: event 为 keywords 批量模式")
+    print("="*60)
+
+    def mock_run_pipelines(keywords, max_workers=None):
+        results = []
+        for kw in keywords:
+            if kw == "光伏":
+                results.append({"status": "error", "keyword": kw,
+                                "error": "模拟的采集失败", "error_type": "RuntimeError"})
+            else:
+                results.append({"status": "success", **mock_run_pipeline(kw)})
+        return {"results": results, "succeeded": len(keywords) - 1, "failed": 1}
+
+    event = {"keywords": ["半导体", "光伏"], "max_workers": 2}
+    context = {}
+
+    with patch('trigger_layer.run_pipelines', side_effect=mock_run_pipelines), \
+            patch('trigger_layer.notify_failure') as mock_notify:
+        result = handler(event, context)
+
+    print(f"输入 event: {event}")
+    print(f"返回结果: {json.dumps(result, ensure_ascii=False, indent=2)}")
+
+    assert result["status"] == "partial", "部分失败时 status 应为 partial"
+    assert result["succeeded"] == 1 and result["failed"] == 1
+    assert result["results"][0]["keyword"] == "半导体"
+    assert result["results"][0]["conflicts_count"] == 2
+    assert result["results"][1]["status"] == "error"
+    assert mock_notify.call_count == 1, "每个失败的 keyword 应告警一次"
+
+    print("✅ 测试通过")
+
+
 def run_all_tests():
     """运行所有测试"""
     print("\n" + "#"*60)
@@ -197,6 +233,7 @@ def run_all_tests():
         test_empty_event,
         test_env_default_keyword,
         test_pipeline_error,
+        test_keywords_event,
     ]
     
     passed = 0
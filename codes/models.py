@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import hashlib
+import sys
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
@@ -12,6 +14,10 @@ class SourceType(str, Enum):
     RUMOR = "rumor"
 
 
+# 条目类使用 __slots__（Python 3.10+），去掉每个实例的 __dict__，大批量持有时显著节省内存
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
 SOURCE_WEIGHTS = {
     SourceType.OFFICIAL: 1.0,
     SourceType.MEDIA: 0.7,
@@ -19,13 +25,17 @@ SOURCE_WEIGHTS = {
 }
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class NewsItem:
     title: str
     content: str
     source: SourceType
     url: Optional[str] = None
     published_at: Optional[str] = None
+    # 本次采集中被合并到该条的近似重复资讯数（含自身），仅用于置信度计算，不写入快照
+    corroboration: int = 1
+    # 采集该条资讯的数据源名称（SourceAdapter.name），用于按数据源记录增量水位，不写入快照
+    feed: Optional[str] = None
 
 
 @dataclass
@@ -35,7 +45,7 @@ class ReportSnapshot:
     items: List[NewsItem] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ChangeItem:
     """表示单个指标的变化项"""
     field_name: str  # 使用 field_name 避免与 dataclass.field 命名冲突
@@ -47,7 +57,7 @@ class ChangeItem:
     confidence: float = 0.0
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ConflictDecision:
     """表示冲突仲裁的决策结果"""
     field_name: str  # 使用 field_name 避免与 dataclass.field 命名冲突
@@ -58,4 +68,11 @@ class ConflictDecision:
 
 
 def now_ts() -> str:
-    return datetime.utcnow().strftime("%Y%m%d_%H%M%S")
\ No newline at end of file
+    return datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+
+
+def item_fingerprint(item: NewsItem) -> str:
+    """基于 title + content + source + url 计算资讯条目的内容指纹"""
+    source = item.source.value if isinstance(item.source, SourceType) else str(item.source)
+    payload = "\x1f".join((item.title or "", item.content or "", source, item.url or ""))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
@@ -1,22 +1,109 @@
 from __future__ import annotations
+import asyncio
 import logging
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
 
 from scraper_layer import ScraperAgent
 from storage_layer import StorageClient
 from database_layer import DatabaseClient
-from incremental_analysis import incremental_compare, generate_global_summary
+from incremental_analysis import (
+    CompareResult, compare_items, generate_global_summary,
+    compare_items_async, generate_global_summary_async,
+)
 from conflict_resolution import resolve_conflicts
 from models import ChangeItem, ConflictDecision, now_ts
 from alerting import notify_failure
+from dedup import group_near_duplicates
+from watermark import Watermark, load_watermark, merge_snapshot_items, save_watermark
+from config import PIPELINE_MAX_WORKERS, WATERMARK_ENABLED
 
 logger = logging.getLogger(__name__)
 
-def run_pipeline(keyword: str) -> Dict[str, Any]:
-    """主流程编排：采集 -> 增量对比 -> 冲突仲裁 -> 生成全局总结 -> 存储"""
-    scraper = ScraperAgent()
-    storage = StorageClient()
-    database = DatabaseClient()
+def _alert_fetch_failure(keyword: str, run_id: str, e: Exception) -> None:
+    """采集异常时记录日志并发送告警"""
+    logger.error(f"Scraper fetch failed for keyword '{keyword}': {e}", exc_info=e)
+    # 发送告警
+    notify_failure({
+        "keyword": keyword,
+        "run_id": run_id,
+        "error": f"采集失败: {str(e)}",
+        "error_type": type(e).__name__,
+        "stage": "scraper.fetch"
+    })
+
+
+def _ensure_not_empty(keyword: str, run_id: str, new_items: List[Any]) -> None:
+    """空数据保护：采集结果为空时告警并抛出异常，避免覆盖旧快照"""
+    if new_items:
+        return
+    error_msg = f"采集返回空数据，拒绝覆盖旧快照（keyword: {keyword}）"
+    logger.warning(error_msg)
+    # 发送告警
+    notify_failure({
+        "keyword": keyword,
+        "run_id": run_id,
+        "error": error_msg,
+        "stage": "scraper.fetch",
+        "reason": "empty_data_protection"
+    })
+    # 抛出异常，不保存快照和数据库
+    raise RuntimeError(error_msg)
+
+
+def _filter_fresh(keyword: str, items: List[Any], watermark: Optional[Watermark]) -> List[Any]:
+    """按增量水位剔除上次成功运行已处理过的资讯"""
+    if watermark is None:
+        return items
+    fresh = watermark.filter_new(items)
+    logger.info(f"Watermark kept {len(fresh)}/{len(items)} fetched items for keyword '{keyword}'")
+    return fresh
+
+
+def _items_to_save(
+    old_snapshot: Any,
+    new_items: List[Any],
+    result: CompareResult,
+    watermark: Optional[Watermark],
+) -> List[Any]:
+    """计算本次要保存的快照条目：未启用水位时即本次采集结果；
+    启用水位时只把实际完成对比的新增资讯合并到旧快照之前（有上限），
+    未完成对比的资讯（LLM 失败、超出 prompt 预算）不写入快照，下次仍会作为新资讯对比；
+    没有可保存的资讯时返回空列表表示无需保存"""
+    if watermark is None:
+        return new_items
+    analyzed_ids = {id(i) for i in result.analyzed}
+    analyzed = [i for i in new_items if id(i) in analyzed_ids]
+    if not analyzed:
+        return []
+    old_items = old_snapshot.items if old_snapshot else []
+    return merge_snapshot_items(old_items, analyzed)
+
+
+def _processed_items(keyword: str, groups: List[Any], result: CompareResult) -> List[Any]:
+    """返回可以记入水位的原始资讯：代表条目完成对比的聚类中的全部成员"""
+    analyzed_ids = {id(i) for i in result.analyzed}
+    processed = [m for rep, members in groups if id(rep) in analyzed_ids for m in members]
+    skipped = sum(len(members) for rep, members in groups if id(rep) not in analyzed_ids)
+    if skipped:
+        logger.warning(f"{skipped} items were not compared for keyword '{keyword}' and will be retried next run")
+    return processed
+
+
+def run_pipeline(
+    keyword: str,
+    scraper: Optional[ScraperAgent] = None,
+    storage: Optional[StorageClient] = None,
+    database: Optional[DatabaseClient] = None,
+) -> Dict[str, Any]:
+    """主流程编排：采集 -> 增量对比 -> 冲突仲裁 -> 生成全局总结 -> 存储
+
+    scraper / storage / database 可由调用方传入以便在批量模式下共享客户端，
+    未传入时按默认配置各自创建。
+    """
+    storage = storage or StorageClient()
+    scraper = scraper or ScraperAgent(storage=storage)
+    database = database or DatabaseClient()
 
     # 生成本次运行的唯一标识
     run_id = now_ts()
@@ -25,38 +112,27 @@ def run_pipeline(keyword: str) -> Dict[str, Any]:
     try:
         new_items = scraper.fetch(keyword=keyword)
     except Exception as e:
-        logger.error(f"Scraper fetch failed for keyword '{keyword}': {e}", exc_info=True)
-        # 发送告警
-        notify_failure({
-            "keyword": keyword,
-            "run_id": run_id,
-            "error": f"采集失败: {str(e)}",
-            "error_type": type(e).__name__,
-            "stage": "scraper.fetch"
-        })
+        _alert_fetch_failure(keyword, run_id, e)
         # 向上抛出异常，不保存快照
         raise
     
     # 检查是否返回空数据（视为失败）
-    if not new_items:
-        error_msg = f"采集返回空数据，拒绝覆盖旧快照（keyword: {keyword}）"
-        logger.warning(error_msg)
-        # 发送告警
-        notify_failure({
-            "keyword": keyword,
-            "run_id": run_id,
-            "error": error_msg,
-            "stage": "scraper.fetch",
-            "reason": "empty_data_protection"
-        })
-        # 抛出异常，不保存快照和数据库
-        raise RuntimeError(error_msg)
+    _ensure_not_empty(keyword, run_id, new_items)
+    
+    # 只保留上次成功运行以来的新增资讯
+    watermark = load_watermark(storage, keyword) if WATERMARK_ENABLED else None
+    fresh_items = _filter_fresh(keyword, new_items, watermark)
+    
+    # 合并多渠道转载的近似重复资讯（保留权重最高的来源，记录印证次数）
+    groups = group_near_duplicates(fresh_items)
+    new_items = [rep for rep, _ in groups]
     
-    # 2. 加载旧快照
-    old_snapshot = storage.load_latest_snapshot()
+    # 2. 加载同一 keyword 的旧快照
+    old_snapshot = storage.load_latest_snapshot(keyword)
 
     # 3. 成员 B 的核心逻辑：增量对比
-    changes: List[ChangeItem] = incremental_compare(old_snapshot, new_items)
+    result = compare_items(old_snapshot, new_items)
+    changes: List[ChangeItem] = result.changes
     
     # 4. 成员 B 的核心逻辑：冲突仲裁
     conflicts: List[ConflictDecision] = resolve_conflicts(changes)
@@ -64,17 +140,150 @@ def run_pipeline(keyword: str) -> Dict[str, Any]:
     # 5. 新增：基于所有决策生成全局总评价
     global_report = generate_global_summary(keyword, conflicts)
 
-    # 6. 存储当前采集的内容作为未来的"旧快照"
-    storage.save_snapshot(keyword=keyword, items=new_items)
+    # 6. 存储当前采集的内容作为未来的"旧快照"（无新增资讯时沿用旧快照）
+    snapshot_items = _items_to_save(old_snapshot, new_items, result, watermark)
+    if snapshot_items:
+        storage.save_snapshot(keyword=keyword, items=snapshot_items)
 
     # 7. 新增：将决策结果落库（conflict_decisions + indicator_states）
     database.save_decisions(run_id=run_id, keyword=keyword, decisions=conflicts)
 
+    # 8. 运行成功后推进水位（只记入实际完成对比的资讯）
+    if watermark is not None:
+        processed = _processed_items(keyword, groups, result)
+        if processed:
+            watermark.advance(processed)
+            save_watermark(storage, keyword, watermark)
+
     # 返回给成员 C 进行展示的完整数据包
     return {
         "keyword": keyword,
         "run_id": run_id,
         "global_summary": global_report, # 全局总决策
         "decisions": conflicts,          # 各指标详细决策
-        "raw_changes_count": len(changes)
+        "raw_changes_count": len(changes),
+        "new_items_count": len(new_items), # 本次参与对比的新增资讯数
+    }
+
+
+async def run_pipeline_async(
+    keyword: str,
+    scraper: Optional[ScraperAgent] = None,
+    storage: Optional[StorageClient] = None,
+    database: Optional[DatabaseClient] = None,
+) -> Dict[str, Any]:
+    """run_pipeline 的异步版本，返回结构与 run_pipeline 一致。
+
+    相互独立的 I/O 阶段并发执行：
+    - 采集资讯与加载旧快照同时进行；
+    - 生成全局总结（LLM）与保存新快照同时进行。
+    阻塞式的采集/存储/数据库调用通过 asyncio.to_thread 放入线程池，LLM 调用使用 ainvoke。
+    """
+    storage = storage or StorageClient()
+    scraper = scraper or ScraperAgent(storage=storage)
+    database = database or DatabaseClient()
+
+    run_id = now_ts()
+
+    # 1 + 2. 并发采集最新资讯、加载旧快照与增量水位
+    fetched, old_snapshot, watermark = await asyncio.gather(
+        asyncio.to_thread(scraper.fetch, keyword=keyword),
+        asyncio.to_thread(storage.load_latest_snapshot, keyword),
+        asyncio.to_thread(load_watermark, storage, keyword) if WATERMARK_ENABLED else asyncio.sleep(0),
+        return_exceptions=True,
+    )
+    if isinstance(fetched, BaseException):
+        _alert_fetch_failure(keyword, run_id, fetched)
+        raise fetched
+    if isinstance(old_snapshot, BaseException):
+        raise old_snapshot
+    _ensure_not_empty(keyword, run_id, fetched)
+    fresh_items = _filter_fresh(keyword, fetched, watermark)
+    groups = group_near_duplicates(fresh_items)
+    new_items = [rep for rep, _ in groups]
+
+    # 3. 增量对比
+    result = await compare_items_async(old_snapshot, new_items)
+    changes: List[ChangeItem] = result.changes
+
+    # 4. 冲突仲裁（纯计算，无需放入线程池）
+    conflicts: List[ConflictDecision] = resolve_conflicts(changes)
+
+    # 5 + 6. 生成全局总结的同时保存新快照（无新增资讯时沿用旧快照）
+    snapshot_items = _items_to_save(old_snapshot, new_items, result, watermark)
+    global_report, _ = await asyncio.gather(
+        generate_global_summary_async(keyword, conflicts),
+        asyncio.to_thread(storage.save_snapshot, keyword=keyword, items=snapshot_items)
+        if snapshot_items else asyncio.sleep(0),
+    )
+
+    # 7. 决策落库
+    await asyncio.to_thread(database.save_decisions, run_id=run_id, keyword=keyword, decisions=conflicts)
+
+    # 8. 运行成功后推进水位（只记入实际完成对比的资讯）
+    if watermark is not None:
+        processed = _processed_items(keyword, groups, result)
+        if processed:
+            watermark.advance(processed)
+            await asyncio.to_thread(save_watermark, storage, keyword, watermark)
+
+    return {
+        "keyword": keyword,
+        "run_id": run_id,
+        "global_summary": global_report,
+        "decisions": conflicts,
+        "raw_changes_count": len(changes),
+        "new_items_count": len(new_items),
+    }
+
+
+def run_pipelines(
+    keywords: List[str],
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """批量编排：在一次调用内并发处理多个 keyword。
+
+    所有 keyword 共享同一组采集/存储/数据库客户端（LLM 客户端本身为模块级共享），
+    避免每个 keyword 单独触发一次函数调用带来的冷启动与认证开销。
+    单个 keyword 的失败被隔离在其结果项中，不影响其他 keyword。
+
+    Args:
+        keywords: 待处理的关键词列表（重复项会被去除，保持原有顺序）
+        max_workers: 最大并发线程数，默认使用 config.PIPELINE_MAX_WORKERS
+
+    Returns:
+        {"results": [...], "succeeded": int, "failed": int}，
+        results 与去重后的 keywords 顺序一致，每项包含 keyword 与 status
+        （success 时附带 run_pipeline 的返回内容，error 时附带 error / error_type）
+    """
+    unique_keywords = list(dict.fromkeys(k for k in keywords if k))
+    if not unique_keywords:
+        return {"results": [], "succeeded": 0, "failed": 0}
+
+    storage = StorageClient()
+    scraper = ScraperAgent(storage=storage)
+    database = DatabaseClient()
+
+    def _run_one(keyword: str) -> Dict[str, Any]:
+        try:
+            result = run_pipeline(keyword, scraper=scraper, storage=storage, database=database)
+            return {"status": "success", **result}
+        except Exception as e:
+            logger.error(f"Pipeline failed for keyword '{keyword}': {e}", exc_info=True)
+            return {
+                "status": "error",
+                "keyword": keyword,
+                "error": str(e),
+                "error_type": type(e).__name__,
+            }
+
+    workers = max(1, min(max_workers or PIPELINE_MAX_WORKERS, len(unique_keywords)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="radar-pipeline") as executor:
+        results = list(executor.map(_run_one, unique_keywords))
+
+    succeeded = sum(1 for r in results if r["status"] == "success")
+    return {
+        "results": results,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
     }
@@ -0,0 +1,136 @@
+"""Prompt 预算：估算 token 数，按来源权重、时效与新颖度为资讯排序，在预算内打包进 prompt"""
+from __future__ import annotations
+
+import dataclasses
+import re
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from dedup import SIMHASH_BITS, hamming_distance, simhash
+from models import SOURCE_WEIGHTS, NewsItem
+from watermark import parse_published_at
+
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+
+# 排序得分 = 来源权重、时效、新颖度的加权和
+_SCORE_WEIGHTS = (0.5, 0.3, 0.2)
+# 时效得分的半衰期（小时）：比本批最新资讯早 24 小时的资讯时效得分减半
+_RECENCY_HALF_LIFE_HOURS = 24.0
+# 与参考资讯的 SimHash 距离达到该值即视为完全新颖（无关文本的期望距离为 32）
+_NOVELTY_FULL_DISTANCE = SIMHASH_BITS // 4
+_TRUNCATION_MARK = "…（截断）"
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中日韩字符按 1 字 1 token，其余字符按 4 字符 1 token"""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+@dataclass
+class PackReport:
+    """一次打包的结果：保留/截断/丢弃的资讯与 token 用量"""
+    budget: int
+    used_tokens: int = 0
+    kept: int = 0
+    truncated: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+    # 保留的资讯在输入中的位置（截断后的资讯是副本，可据此找回原始资讯）
+    kept_indices: List[int] = field(default_factory=list)
+    dropped_tokens: int = 0
+
+
+def score_items(
+    items: Sequence[NewsItem],
+    reference: Optional[Sequence[NewsItem]] = None,
+) -> List[float]:
+    """为资讯打分（越高越值得放进 prompt）
+
+    - 来源权重：SOURCE_WEIGHTS；
+    - 时效：相对本批最新发布时间按半衰期衰减，缺少发布时间记 0.5；
+    - 新颖度：与 reference（如旧快照）中最相近条目的 SimHash 距离，未提供 reference 时记 1。
+    """
+    w_source, w_recency, w_novelty = _SCORE_WEIGHTS
+    published = [parse_published_at(i.published_at) for i in items]
+    newest = max((p for p in published if p is not None), default=None)
+    reference_fps = [simhash(f"{i.title}\n{i.content}") for i in reference] if reference else []
+
+    scores: List[float] = []
+    for item, ts in zip(items, published):
+        if ts is None or newest is None:
+            recency = 0.5
+        else:
+            age_hours = (newest - ts).total_seconds() / 3600
+            recency = 0.5 ** (age_hours / _RECENCY_HALF_LIFE_HOURS)
+        if reference_fps:
+            fp = simhash(f"{item.title}\n{item.content}")
+            distance = min(hamming_distance(fp, ref) for ref in reference_fps)
+            novelty = min(1.0, distance / _NOVELTY_FULL_DISTANCE)
+        else:
+            novelty = 1.0
+        scores.append(
+            w_source * SOURCE_WEIGHTS.get(item.source, 0.0) + w_recency * recency + w_novelty * novelty
+        )
+    return scores
+
+
+def truncate_item(item: NewsItem, max_tokens: int, format_item: Callable[[NewsItem], str]) -> NewsItem:
+    """正文过长时按比例截断，使格式化后的文本不超过 max_tokens；无需截断时原样返回"""
+    tokens = estimate_tokens(format_item(item))
+    if max_tokens <= 0 or tokens <= max_tokens:
+        return item
+    content = item.content
+    while content:
+        content = content[:int(len(content) * max_tokens / tokens * 0.95)]
+        truncated = dataclasses.replace(item, content=content + _TRUNCATION_MARK)
+        tokens = estimate_tokens(format_item(truncated))
+        if tokens <= max_tokens:
+            return truncated
+    return dataclasses.replace(item, content=_TRUNCATION_MARK)
+
+
+def pack_items(
+    items: Sequence[NewsItem],
+    budget: int,
+    format_item: Callable[[NewsItem], str],
+    reference: Optional[Sequence[NewsItem]] = None,
+    max_item_tokens: int = 0,
+) -> Tuple[List[NewsItem], PackReport]:
+    """在 token 预算内挑选资讯
+
+    超过 max_item_tokens 的资讯先截断正文；随后按 score_items 得分从高到低装入，
+    放不下的资讯跳过（仍尝试更短的资讯）。返回的资讯保持原有顺序，使相同输入得到相同 prompt。
+
+    Args:
+        items: 候选资讯
+        budget: token 预算（按 format_item 的结果估算，每条另计 1 个换行符）；<= 0 表示不限制
+        format_item: 资讯在 prompt 中的文本格式
+        reference: 计算新颖度的参考资讯（如旧快照条目）
+        max_item_tokens: 单条资讯的 token 上限；<= 0 表示不截断
+    """
+    report = PackReport(budget=budget)
+    candidates = [truncate_item(item, max_item_tokens, format_item) for item in items]
+    report.truncated = [c.title for c, item in zip(candidates, items) if c is not item]
+    costs = [estimate_tokens(format_item(c)) + 1 for c in candidates]
+
+    if budget <= 0 or sum(costs) <= budget:
+        report.kept = len(candidates)
+        report.used_tokens = sum(costs)
+        report.kept_indices = list(range(len(candidates)))
+        return candidates, report
+
+    scores = score_items(candidates, reference)
+    keep = set()
+    for i in sorted(range(len(candidates)), key=lambda i: (-scores[i], i)):
+        if report.used_tokens + costs[i] <= budget:
+            keep.add(i)
+            report.used_tokens += costs[i]
+        else:
+            report.dropped.append(candidates[i].title)
+            report.dropped_tokens += costs[i]
+
+    report.kept = len(keep)
+    report.kept_indices = sorted(keep)
+    return [candidates[i] for i in report.kept_indices], report
@@ -1,16 +1,291 @@
+"""采集层：按数据源适配器并发抓取资讯，所有数据源共用一个带连接池的 HTTP 客户端"""
 from __future__ import annotations
 
-from typing import List
+import hashlib
+import http.client
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
 
+from config import (
+    SCRAPER_DEFAULT_TIMEOUT,
+    SCRAPER_MAX_CONNECTIONS_PER_HOST,
+    SCRAPER_MAX_WORKERS,
+    SCRAPER_SOURCES,
+)
 from models import NewsItem, SourceType
+from serialization import items_from_dicts, items_to_dicts, parse_source
 
+logger = logging.getLogger(__name__)
 
-class ScraperAgent:
-    """采集层：根据行业关键词抓取最新资讯。"""
+USER_AGENT = "IndustryRadar/1.0"
+# 抓取缓存在存储层中的状态名（<keyword>/state/fetch_cache）
+FETCH_CACHE_STATE = "fetch_cache"
 
-    def fetch(self, keyword: str) -> List[NewsItem]:
-        # TODO: 接入新闻 API、雪球、巨潮资讯等数据源
-        # 下面是占位示例数据
+
+@dataclass
+class HttpResponse:
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+    def json(self) -> Any:
+        return json.loads(self.body.decode("utf-8"))
+
+
+class PooledHttpClient:
+    """线程安全的 HTTP/1.1 keep-alive 连接池（基于标准库 http.client，按 scheme+host+port 分池）
+
+    每个请求从池中取出一条空闲连接，用完归还；池中每个 host 最多保留
+    max_connections_per_host 条空闲连接。复用的连接被服务端关闭时自动重连一次。
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = SCRAPER_MAX_CONNECTIONS_PER_HOST,
+        timeout: float = SCRAPER_DEFAULT_TIMEOUT,
+    ) -> None:
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = timeout
+        self._idle: Dict[Tuple[str, str, Optional[int]], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> HttpResponse:
+        """发送 GET 请求并读取完整响应"""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"不支持的 URL: {url}")
+        pool_key = (parts.scheme, parts.hostname or "", parts.port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        request_headers = {"User-Agent": USER_AGENT, "Connection": "keep-alive", **(headers or {})}
+        timeout = self.timeout if timeout is None else timeout
+
+        conn, reused = self._acquire(pool_key, timeout)
+        try:
+            try:
+                response = self._send(conn, path, request_headers)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                if not reused:
+                    raise
+                # 空闲连接已被服务端关闭：换一条新连接重试一次
+                conn.close()
+                conn = self._new_connection(pool_key, timeout)
+                response = self._send(conn, path, request_headers)
+        except BaseException:
+            conn.close()
+            raise
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(pool_key, conn)
+        return HttpResponse(
+            status=response.status,
+            headers={k.lower(): v for k, v in response.getheaders()},
+            body=response.body,
+        )
+
+    def close(self) -> None:
+        """关闭所有空闲连接"""
+        with self._lock:
+            pools, self._idle = self._idle, {}
+        for conns in pools.values():
+            for conn in conns:
+                conn.close()
+
+    @staticmethod
+    def _send(conn: http.client.HTTPConnection, path: str, headers: Dict[str, str]) -> http.client.HTTPResponse:
+        conn.request("GET", path, headers=headers)
+        response = conn.getresponse()
+        # 必须读完响应体，连接才能复用
+        response.body = response.read()
+        return response
+
+    def _acquire(self, pool_key: Tuple[str, str, Optional[int]], timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(pool_key)
+            conn = idle.pop() if idle else None
+        if conn is None:
+            return self._new_connection(pool_key, timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _release(self, pool_key: Tuple[str, str, Optional[int]], conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(pool_key, [])
+            if len(idle) < self.max_connections_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    @staticmethod
+    def _new_connection(pool_key: Tuple[str, str, Optional[int]], timeout: float) -> http.client.HTTPConnection:
+        scheme, host, port = pool_key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=timeout)
+
+
+class FetchCache:
+    """按 URL 记录条件请求的校验信息（ETag / Last-Modified / 内容哈希）与上次解析出的条目
+
+    服务端返回 304，或返回内容的哈希与上次相同时，直接复用上次的条目，跳过解析。
+    """
+
+    def __init__(self, entries: Optional[Dict[str, dict]] = None) -> None:
+        self._entries: Dict[str, dict] = dict(entries or {})
+        self._lock = threading.Lock()
+        self.dirty = False
+        self.stats = {"fetched": 0, "not_modified": 0, "unchanged": 0}
+
+    def conditional_get(
+        self,
+        client: PooledHttpClient,
+        url: str,
+        parse: Any,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> List[NewsItem]:
+        """带校验信息发起请求；内容未变化时返回缓存条目，否则调用 parse(response) 并更新缓存"""
+        with self._lock:
+            entry = self._entries.get(url)
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry.get("etag"):
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = client.get(url, headers=request_headers, timeout=timeout)
+        if response.status == 304 and entry is not None:
+            self._count("not_modified")
+            return items_from_dicts(entry["items"])
+
+        content_hash = hashlib.sha1(response.body).hexdigest() if response.status == 200 else None
+        if entry is not None and content_hash is not None and content_hash == entry.get("content_hash"):
+            self._count("unchanged")
+            # 内容未变但校验信息可能更新（例如服务端首次返回 ETag）
+            self._store(url, response, content_hash, entry["items"])
+            return items_from_dicts(entry["items"])
+
+        items = parse(response)
+        self._count("fetched")
+        if content_hash is not None:
+            self._store(url, response, content_hash, items_to_dicts(items))
+        return items
+
+    def to_dict(self) -> Dict[str, dict]:
+        with self._lock:
+            return dict(self._entries)
+
+    def _store(self, url: str, response: HttpResponse, content_hash: str, item_dicts: List[dict]) -> None:
+        entry = {
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "content_hash": content_hash,
+            "items": item_dicts,
+        }
+        with self._lock:
+            if self._entries.get(url) != entry:
+                self._entries[url] = entry
+                self.dirty = True
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            self.stats[outcome] += 1
+
+
+class SourceAdapter(ABC):
+    """数据源适配器基类：每个数据源对应一个 SourceType 与独立的超时时间"""
+
+    name: str = ""
+    source_type: SourceType = SourceType.MEDIA
+    timeout: float = SCRAPER_DEFAULT_TIMEOUT
+
+    @abstractmethod
+    def fetch(self, keyword: str, client: PooledHttpClient, cache: Optional[FetchCache] = None) -> List[NewsItem]:
+        """抓取该数据源中与 keyword 相关的资讯（提供 cache 时应发起条件请求）"""
+        pass
+
+
+class JsonFeedAdapter(SourceAdapter):
+    """通用 JSON 资讯接口适配器
+
+    请求 url_template（其中的 {keyword} 替换为 URL 编码后的关键词），响应可以是条目列表，
+    或包含 items / data 列表的对象；条目字段兼容 title、content/summary/description、
+    url/link、published_at/pubDate/time 等常见命名。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        url_template: str,
+        source_type: SourceType = SourceType.MEDIA,
+        timeout: float = SCRAPER_DEFAULT_TIMEOUT,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.name = name
+        self.url_template = url_template
+        self.source_type = source_type
+        self.timeout = timeout
+        self.headers = headers or {}
+
+    def build_url(self, keyword: str) -> str:
+        return self.url_template.format(keyword=quote(keyword))
+
+    def fetch(self, keyword: str, client: PooledHttpClient, cache: Optional[FetchCache] = None) -> List[NewsItem]:
+        url = self.build_url(keyword)
+        if cache is not None:
+            return cache.conditional_get(client, url, self._parse_response, self.headers, self.timeout)
+        return self._parse_response(client.get(url, headers=self.headers, timeout=self.timeout))
+
+    def _parse_response(self, response: HttpResponse) -> List[NewsItem]:
+        if response.status != 200:
+            raise RuntimeError(f"{self.name} 返回 HTTP {response.status}")
+        return self.parse(response.json())
+
+    def parse(self, payload: Any) -> List[NewsItem]:
+        if isinstance(payload, dict):
+            payload = payload.get("items") or payload.get("data") or []
+        items = []
+        for entry in payload if isinstance(payload, list) else []:
+            if not isinstance(entry, dict):
+                continue
+            title = entry.get("title") or ""
+            content = entry.get("content") or entry.get("summary") or entry.get("description") or ""
+            if not title and not content:
+                continue
+            items.append(NewsItem(
+                title=title,
+                content=content,
+                source=self.source_type,
+                url=entry.get("url") or entry.get("link"),
+                published_at=entry.get("published_at") or entry.get("pubDate") or entry.get("time"),
+            ))
+        return items
+
+
+class PlaceholderAdapter(SourceAdapter):
+    """未配置任何数据源时使用的占位数据源（本地调试与模拟触发）"""
+
+    name = "placeholder"
+
+    def fetch(self, keyword: str, client: PooledHttpClient, cache: Optional[FetchCache] = None) -> List[NewsItem]:
         return [
             NewsItem(
                 title=f"{keyword} 行业预测更新",
@@ -20,3 +295,186 @@ class ScraperAgent:
                 published_at="2026-01-19",
             )
         ]
+
+
+def adapters_from_config(sources: Optional[List[dict]] = None) -> List[SourceAdapter]:
+    """根据 SCRAPER_SOURCES 配置创建适配器；未配置时返回占位数据源"""
+    sources = SCRAPER_SOURCES if sources is None else sources
+    if not sources:
+        return [PlaceholderAdapter()]
+    return [
+        JsonFeedAdapter(
+            name=s.get("name") or s["url"],
+            url_template=s["url"],
+            source_type=parse_source(s.get("source", "media")),
+            timeout=float(s.get("timeout", SCRAPER_DEFAULT_TIMEOUT)),
+            headers=s.get("headers"),
+        )
+        for s in sources
+    ]
+
+
+@dataclass
+class FetchReport:
+    """单次抓取中各数据源的结果"""
+    item_counts: Dict[str, int] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    elapsed: Dict[str, float] = field(default_factory=dict)
+    # 条件请求结果：fetched（重新解析）/ not_modified（304）/ unchanged（内容哈希未变）
+    cache: Dict[str, int] = field(default_factory=dict)
+
+
+class _SourceJob:
+    """一次抓取中单个数据源的任务：记录任务在线程池中实际开始运行的时间"""
+
+    def __init__(self, adapter: SourceAdapter) -> None:
+        self.adapter = adapter
+        self.started = threading.Event()
+        self.started_at = 0.0
+        self.future: Optional[Future] = None
+
+
+# 等待任务开始运行时检查其是否已被取消的间隔（秒）
+_JOB_START_POLL_INTERVAL = 0.05
+
+
+# 默认的 HTTP 连接池与抓取线程池在首次使用时创建，之后在进程内复用：
+# 同一进程中的所有 ScraperAgent（批量模式的各 keyword、FC 热实例的多次调用）共享同一组连接与线程。
+_shared_client: Optional[PooledHttpClient] = None
+_shared_executor: Optional[ThreadPoolExecutor] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_client() -> PooledHttpClient:
+    """获取进程级共享的 HTTP 连接池（懒加载，线程安全）"""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_lock:
+            if _shared_client is None:
+                _shared_client = PooledHttpClient()
+    return _shared_client
+
+
+def get_shared_executor() -> ThreadPoolExecutor:
+    """获取进程级共享的抓取线程池（SCRAPER_MAX_WORKERS 个线程，懒加载，线程安全）"""
+    global _shared_executor
+    if _shared_executor is None:
+        with _shared_lock:
+            if _shared_executor is None:
+                _shared_executor = ThreadPoolExecutor(
+                    max_workers=SCRAPER_MAX_WORKERS,
+                    thread_name_prefix="radar-scraper",
+                )
+    return _shared_executor
+
+
+class ScraperAgent:
+    """采集层：根据行业关键词并发抓取各数据源的最新资讯。
+
+    每个数据源在线程池中并发抓取，总耗时取决于最慢的数据源而非各数据源之和；
+    单个数据源超时或失败只记录告警，其余数据源的结果照常返回，全部失败时才抛出异常。
+    传入 storage 时按 keyword 持久化抓取缓存（FetchCache），后续抓取发起条件请求，
+    内容未变化的页面不再重复下载与解析。
+    """
+
+    def __init__(
+        self,
+        adapters: Optional[List[SourceAdapter]] = None,
+        client: Optional[PooledHttpClient] = None,
+        max_workers: Optional[int] = None,
+        storage: Optional[Any] = None,
+        executor: Optional[ThreadPoolExecutor] = None,
+    ) -> None:
+        """初始化采集器
+        
+        Args:
+            adapters: 数据源适配器列表，默认根据 SCRAPER_SOURCES 配置创建
+            client: HTTP 连接池，由调用方负责关闭；默认使用进程级共享的 get_shared_client()
+            max_workers: 并发抓取的线程数；指定时为本采集器单独创建线程池，
+                否则使用进程级共享的 get_shared_executor()
+            storage: 可选，StorageClient（或提供 load_state / save_state 的对象），用于持久化抓取缓存
+            executor: 抓取线程池，由调用方负责关闭；优先于 max_workers
+        """
+        self.adapters = adapters if adapters is not None else adapters_from_config()
+        self.client = client or get_shared_client()
+        self.storage = storage
+        self._owns_executor = executor is None and max_workers is not None
+        if executor is not None:
+            self._executor = executor
+        elif max_workers is not None:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="radar-scraper")
+        else:
+            self._executor = get_shared_executor()
+        self.last_report = FetchReport()
+
+    def fetch(self, keyword: str) -> List[NewsItem]:
+        report = FetchReport()
+        cache = self._load_cache(keyword)
+        jobs = [_SourceJob(adapter) for adapter in self.adapters]
+        for job in jobs:
+            job.future = self._executor.submit(self._fetch_source, job, keyword, cache)
+
+        items: List[NewsItem] = []
+        for job in jobs:
+            adapter, future = job.adapter, job.future
+            # 线程池可能被多个 keyword 共享：截止时间从任务开始运行时计算，排队等待不计入超时
+            while not job.started.wait(_JOB_START_POLL_INTERVAL) and not future.done():
+                pass
+            remaining = max(0.0, job.started_at + adapter.timeout - time.monotonic())
+            try:
+                source_items, elapsed = future.result(timeout=remaining)
+            except Exception as e:
+                future.cancel()
+                # Python 3.10 中 concurrent.futures.TimeoutError 与内置 TimeoutError 不是同一个类
+                if isinstance(e, (FutureTimeoutError, TimeoutError)):
+                    error = f"timeout after {adapter.timeout}s"
+                else:
+                    error = f"{type(e).__name__}: {e}"
+                report.errors[adapter.name] = error
+                logger.warning(f"Source '{adapter.name}' failed for keyword '{keyword}': {error}")
+                continue
+            items.extend(source_items)
+            report.item_counts[adapter.name] = len(source_items)
+            report.elapsed[adapter.name] = elapsed
+
+        if cache is not None:
+            report.cache = dict(cache.stats)
+            self._save_cache(keyword, cache)
+        self.last_report = report
+        if self.adapters and len(report.errors) == len(self.adapters):
+            raise RuntimeError(f"All sources failed for keyword '{keyword}': {report.errors}")
+        return items
+
+    def close(self) -> None:
+        """释放本采集器单独创建的线程池；共享或调用方传入的线程池与连接池不受影响"""
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    def _fetch_source(
+        self, job: _SourceJob, keyword: str, cache: Optional[FetchCache]
+    ) -> Tuple[List[NewsItem], float]:
+        job.started_at = start = time.monotonic()
+        job.started.set()
+        adapter = job.adapter
+        items = adapter.fetch(keyword, self.client, cache)
+        for item in items:
+            item.feed = adapter.name
+        return items, time.monotonic() - start
+
+    def _load_cache(self, keyword: str) -> Optional[FetchCache]:
+        if self.storage is None:
+            return None
+        try:
+            return FetchCache(self.storage.load_state(keyword, FETCH_CACHE_STATE))
+        except Exception as e:
+            # 缓存不可用时退化为普通请求
+            logger.warning(f"Failed to load fetch cache for keyword '{keyword}': {e}")
+            return FetchCache()
+
+    def _save_cache(self, keyword: str, cache: FetchCache) -> None:
+        if not cache.dirty:
+            return
+        try:
+            self.storage.save_state(keyword, FETCH_CACHE_STATE, cache.to_dict())
+        except Exception as e:
+            logger.warning(f"Failed to save fetch cache for keyword '{keyword}': {e}")
@@ -0,0 +1,81 @@
+"""快照序列化：在 ReportSnapshot / NewsItem 与可编码的字典之间转换，所有存储后端共用"""
+from __future__ import annotations
+
+from typing import Any, Iterable, List
+
+from models import NewsItem, ReportSnapshot, SourceType
+
+# 预先构建的来源查找表：SourceType 是 str 枚举，成员与其字符串值哈希相同，
+# 因此同一张表既能查 "media" 也能查 SourceType.MEDIA；未知值回退为 MEDIA
+_SOURCE_LOOKUP = {s.value: s for s in SourceType}
+_DEFAULT_SOURCE = SourceType.MEDIA
+
+
+def parse_source(value: Any) -> SourceType:
+    """将字符串或 SourceType 解析为 SourceType（未知值回退为 MEDIA）"""
+    try:
+        return _SOURCE_LOOKUP.get(value, _DEFAULT_SOURCE)
+    except TypeError:
+        # 不可哈希的脏数据
+        return _DEFAULT_SOURCE
+
+
+def item_from_dict(data: dict) -> NewsItem:
+    get = data.get
+    # 按位置参数构造，避免关键字参数匹配的开销
+    return NewsItem(
+        get("title", ""),
+        get("content", ""),
+        parse_source(get("source", "media")),
+        get("url"),
+        get("published_at"),
+    )
+
+
+def items_to_dicts(items: Iterable[NewsItem]) -> List[dict]:
+    return [
+        {
+            "title": i.title,
+            "content": i.content,
+            "source": i.source.value,
+            "url": i.url,
+            "published_at": i.published_at,
+        }
+        for i in items
+    ]
+
+
+def items_from_dicts(dicts: Iterable[dict]) -> List[NewsItem]:
+    # 批量路径：把全局查找提升为局部变量，逐条内联构造
+    lookup = _SOURCE_LOOKUP.get
+    default = _DEFAULT_SOURCE
+    cls = NewsItem
+    items = []
+    append = items.append
+    for d in dicts:
+        get = d.get
+        source = get("source", "media")
+        append(cls(
+            get("title", ""),
+            get("content", ""),
+            lookup(source, default) if isinstance(source, str) else parse_source(source),
+            get("url"),
+            get("published_at"),
+        ))
+    return items
+
+
+def snapshot_to_dict(snapshot: ReportSnapshot) -> dict:
+    return {
+        "keyword": snapshot.keyword,
+        "collected_at": snapshot.collected_at,
+        "items": items_to_dicts(snapshot.items),
+    }
+
+
+def snapshot_from_dict(data: dict) -> ReportSnapshot:
+    return ReportSnapshot(
+        keyword=data.get("keyword", ""),
+        collected_at=data.get("collected_at", ""),
+        items=items_from_dicts(data.get("items", [])),
+    )
@@ -0,0 +1,237 @@
+"""快照编解码：在快照字典与存储字节之间转换，按文件扩展名识别格式"""
+from __future__ import annotations
+
+import gzip
+import json
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class SnapshotCodec(ABC):
+    """快照编解码器基类"""
+
+    name: str = ""
+    extension: str = ""
+    # 是否支持逐条流式读取（iter_records）
+    streaming: bool = False
+
+    @abstractmethod
+    def encode(self, data: dict) -> bytes:
+        """将快照字典编码为字节"""
+        pass
+
+    @abstractmethod
+    def decode(self, raw: bytes) -> dict:
+        """将字节解码为快照字典"""
+        pass
+
+    def iter_records(self, stream: BinaryIO) -> Iterator[dict]:
+        """从字节流逐条读取记录：首条为快照头，其后每条对应一个条目（仅流式格式支持）"""
+        raise NotImplementedError(f"{self.name} 不支持流式读取")
+
+
+# 复用同一个编码器实例：json.dumps 带参数调用时每次都会新建编码器，NDJSON 逐行编码时开销明显
+_COMPACT_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def _dumps_compact(data: dict) -> bytes:
+    return _COMPACT_ENCODER.encode(data).encode("utf-8")
+
+
+class JsonCodec(SnapshotCodec):
+    """紧凑 JSON（无缩进），同时兼容读取旧版 indent=2 的 report_*.json"""
+
+    name = "json"
+    extension = ".json"
+
+    def encode(self, data: dict) -> bytes:
+        return _dumps_compact(data)
+
+    def decode(self, raw: bytes) -> dict:
+        return json.loads(raw.decode("utf-8"))
+
+
+class GzipJsonCodec(SnapshotCodec):
+    """gzip 压缩的紧凑 JSON（仅依赖标准库）"""
+
+    name = "json.gz"
+    extension = ".json.gz"
+
+    def __init__(self, level: int = 6) -> None:
+        self.level = level
+
+    def encode(self, data: dict) -> bytes:
+        # mtime=0 保证相同内容得到相同字节
+        return gzip.compress(_dumps_compact(data), compresslevel=self.level, mtime=0)
+
+    def decode(self, raw: bytes) -> dict:
+        return json.loads(gzip.decompress(raw).decode("utf-8"))
+
+
+class ZstdJsonCodec(SnapshotCodec):
+    """zstd 压缩的紧凑 JSON（需要 zstandard 库）"""
+
+    name = "json.zst"
+    extension = ".json.zst"
+
+    def __init__(self, level: int = 3) -> None:
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError(
+                "SNAPSHOT_CODEC=json.zst 需要 zstandard 库。请运行: pip install zstandard"
+            )
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def encode(self, data: dict) -> bytes:
+        return self._compressor.compress(_dumps_compact(data))
+
+    def decode(self, raw: bytes) -> dict:
+        return json.loads(self._decompressor.decompress(raw).decode("utf-8"))
+
+
+class MsgpackCodec(SnapshotCodec):
+    """MessagePack 二进制格式（需要 msgpack 库）"""
+
+    name = "msgpack"
+    extension = ".msgpack"
+
+    def __init__(self) -> None:
+        try:
+            import msgpack
+        except ImportError:
+            raise RuntimeError(
+                "SNAPSHOT_CODEC=msgpack 需要 msgpack 库。请运行: pip install msgpack"
+            )
+        self._msgpack = msgpack
+
+    def encode(self, data: dict) -> bytes:
+        return self._msgpack.packb(data, use_bin_type=True)
+
+    def decode(self, raw: bytes) -> dict:
+        return self._msgpack.unpackb(raw, raw=False)
+
+
+class NdjsonCodec(SnapshotCodec):
+    """NDJSON：首行为快照头，其后每行一个条目，可逐行流式读取
+
+    完整快照的条目行为 {"item": {...}}；增量快照的快照头带 depth/base，
+    条目行为 {"hash": ..., "item": {...}}，继承自 base 的条目省略 item。
+    """
+
+    name = "ndjson"
+    extension = ".ndjson"
+    streaming = True
+
+    def encode(self, data: dict) -> bytes:
+        return b"".join(_dumps_compact(r) + b"\n" for r in _to_records(data))
+
+    def decode(self, raw: bytes) -> dict:
+        return _from_records(_iter_lines(raw.splitlines()))
+
+    def iter_records(self, stream: BinaryIO) -> Iterator[dict]:
+        return _iter_lines(stream)
+
+
+class GzipNdjsonCodec(NdjsonCodec):
+    """gzip 压缩的 NDJSON（解压同样可流式进行）"""
+
+    name = "ndjson.gz"
+    extension = ".ndjson.gz"
+
+    def encode(self, data: dict) -> bytes:
+        return gzip.compress(super().encode(data), mtime=0)
+
+    def decode(self, raw: bytes) -> dict:
+        return super().decode(gzip.decompress(raw))
+
+    def iter_records(self, stream: BinaryIO) -> Iterator[dict]:
+        with gzip.GzipFile(fileobj=stream, mode="rb") as f:
+            yield from _iter_lines(f)
+
+
+def _iter_lines(lines: Iterable[bytes]) -> Iterator[dict]:
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _to_records(data: dict) -> Iterator[dict]:
+    if "item_hashes" in data:
+        header = {k: v for k, v in data.items() if k not in ("item_hashes", "new_items")}
+        yield header
+        bodies = data.get("new_items", {})
+        written = set()
+        for h in data["item_hashes"]:
+            if h in bodies and h not in written:
+                written.add(h)
+                yield {"hash": h, "item": bodies[h]}
+            else:
+                yield {"hash": h}
+    else:
+        yield {k: v for k, v in data.items() if k != "items"}
+        for item in data.get("items", []):
+            yield {"item": item}
+
+
+def _from_records(records: Iterator[dict]) -> dict:
+    data = dict(next(records, {}))
+    if "depth" in data:
+        hashes: List[str] = []
+        new_items: Dict[str, dict] = {}
+        for r in records:
+            hashes.append(r["hash"])
+            if "item" in r:
+                new_items[r["hash"]] = r["item"]
+        data["item_hashes"] = hashes
+        data["new_items"] = new_items
+    else:
+        data["items"] = [r["item"] for r in records]
+    return data
+
+
+_CODEC_CLASSES = {
+    cls.name: cls
+    for cls in (JsonCodec, GzipJsonCodec, ZstdJsonCodec, MsgpackCodec, NdjsonCodec, GzipNdjsonCodec)
+}
+
+# 按扩展名长度降序匹配，避免 ".json" 抢先匹配 ".json.gz"
+SNAPSHOT_EXTENSIONS: List[str] = sorted(
+    (cls.extension for cls in _CODEC_CLASSES.values()), key=len, reverse=True
+)
+
+_codec_instances: Dict[str, SnapshotCodec] = {}
+
+
+def get_codec(name: str) -> SnapshotCodec:
+    """按名称获取编解码器（json / json.gz / json.zst / msgpack / ndjson / ndjson.gz）"""
+    name = (name or "json").lower()
+    if name not in _CODEC_CLASSES:
+        raise ValueError(
+            f"不支持的快照格式: {name}\n"
+            f"请设置 SNAPSHOT_CODEC 为以下之一: {', '.join(_CODEC_CLASSES)}"
+        )
+    if name not in _codec_instances:
+        _codec_instances[name] = _CODEC_CLASSES[name]()
+    return _codec_instances[name]
+
+
+def split_extension(filename: str) -> Optional[Tuple[str, str]]:
+    """拆分快照文件名为 (主干, 扩展名)；不是已知快照格式时返回 None"""
+    for ext in SNAPSHOT_EXTENSIONS:
+        if filename.endswith(ext):
+            return filename[:-len(ext)], ext
+    return None
+
+
+def codec_for_key(key: str) -> SnapshotCodec:
+    """根据对象 key 的扩展名选择编解码器（读取旧格式时透明识别）"""
+    parts = split_extension(key)
+    if parts is None:
+        raise ValueError(f"无法识别的快照格式: {key}")
+    ext = parts[1]
+    for cls in _CODEC_CLASSES.values():
+        if cls.extension == ext:
+            return get_codec(cls.name)
+    raise ValueError(f"无法识别的快照格式: {key}")
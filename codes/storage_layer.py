@@ -1,109 +1,631 @@
 from __future__ import annotations
 
+import hashlib
+import io
 import json
+import logging
 import os
+import re
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from collections import Counter
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
 
-from config import DATA_DIR
-from models import NewsItem, ReportSnapshot, SourceType, now_ts
+from config import DATA_DIR, SNAPSHOT_CODEC, SNAPSHOT_KEYFRAME_INTERVAL, SNAPSHOT_STREAM_CHUNK_SIZE
+from models import NewsItem, ReportSnapshot, item_fingerprint, now_ts
+from serialization import item_from_dict, items_to_dicts, snapshot_from_dict
+from snapshot_codec import SnapshotCodec, codec_for_key, get_codec, split_extension
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PREFIX = "report_"
+LATEST_POINTER = "latest.json"
+MANIFEST_KEY = "manifest.jsonl"
+# keyword 分区下保存采集状态（抓取缓存等）的子目录，不参与快照列举
+STATE_DIR = "state"
+_STATE_CODEC = get_codec("json.gz")
+
+# "~" 只出现在带哈希后缀的分区名中，因此也视为需要替换的字符
+_UNSAFE_KEY_CHARS = re.compile(r'[\\/:*?"<>|\s~]+')
+DEFAULT_PARTITION = "_default"
+
+
+def _slugify(keyword: str) -> str:
+    return _UNSAFE_KEY_CHARS.sub("_", keyword).strip("._")
+
+
+def keyword_partition(keyword: str) -> str:
+    """将 keyword 转换为安全的分区目录名（保留中文）
+
+    只含安全字符的 keyword 原样作为目录名；否则替换路径分隔符等特殊字符，
+    并追加原始 keyword 的哈希（"<清洗后名称>~<哈希>"），保证 "a/b"、"a b"、"a_b" 等不会落入同一分区。
+    """
+    if not keyword:
+        return DEFAULT_PARTITION
+    slug = _slugify(keyword)
+    if slug == keyword and keyword != DEFAULT_PARTITION:
+        return keyword
+    digest = hashlib.sha1(keyword.encode("utf-8")).hexdigest()[:10]
+    return f"{slug or DEFAULT_PARTITION}~{digest}"
+
+
+def _is_snapshot_name(name: str) -> bool:
+    return name.startswith(SNAPSHOT_PREFIX) and split_extension(name) is not None
+
+
+def _collected_at_from_name(name: str) -> str:
+    return split_extension(name)[0][len(SNAPSHOT_PREFIX):]
+
+
+def _is_oss_not_found(e: Exception) -> bool:
+    # oss2.exceptions.NoSuchKey 等 404 异常
+    return getattr(e, "status", None) == 404
+
+
+def _check_chain(base_key: str, visited: Set[str]) -> None:
+    """沿 base 链读取前检查是否成环（如同名快照以自身为 base），成环时抛出异常而不是无限循环"""
+    if base_key in visited:
+        raise ValueError(f"快照 base 链存在环: {base_key}")
+    visited.add(base_key)
+
+
+def _snapshot_sort_key(key: str) -> str:
+    # report_YYYYMMDD_HHMMSS.json 的文件名本身即按时间有序
+    return key.rsplit("/", 1)[-1]
+
+
+def _partition_of_key(key: str) -> str:
+    """快照 key 所在的分区目录名；根目录旧布局的快照返回空字符串"""
+    parts = key.split("/")
+    return parts[0] if len(parts) == 2 else ""
+
+
+def _manifest_entry(key: str, collected_at: str) -> dict:
+    """清单中的一行：保存时追加与重建时写入相同的字段，按分区目录名（而非原始关键词）过滤"""
+    return {"key": key, "partition": _partition_of_key(key), "collected_at": collected_at}
 
 
 class StorageBackend(ABC):
-    """存储后端抽象基类"""
+    """存储后端抽象基类
+
+    快照按 keyword 分区存放：<keyword>/report_<ts>.json，
+    每次保存后更新 <keyword>/latest.json 指针，加载最新快照只需一次读取；
+    同时向根目录的 manifest.jsonl 清单追加一行，列举快照只需读取清单。
+    旧版本写在根目录下的 report_*.json 仍可被读取（按 keyword 过滤）。
+    子类只需实现对象级读写与列举。
+
+    快照按条目做内容寻址的增量编码：每份快照记录全部条目指纹（item_hashes），
+    只保存上一份快照中没有的条目正文（new_items），并通过 base 指向上一份快照，
+    加载时沿 base 链补齐正文。每隔 keyframe_interval 份写一次完整快照，限制链长。
+    快照依赖其 base 链，不应单独删除链中间的快照。
+    """
+    
+    # 本进程内是否已确认清单存在（避免每次保存都检查一次）
+    _manifest_ready = False
+    # 串行化本进程内的清单重建与追加：重建期间的追加若落在旧清单上会被随后的替换覆盖
+    _manifest_lock = threading.RLock()
+    # 新快照的编码格式（由子类在初始化时根据 SNAPSHOT_CODEC 设置）
+    codec: SnapshotCodec = get_codec("json")
+    # 增量链长度上限：每隔多少份快照写一次完整快照（<= 1 表示始终写完整快照）
+    keyframe_interval: int = SNAPSHOT_KEYFRAME_INTERVAL
     
     @abstractmethod
-    def save_snapshot(self, keyword: str, items: List[NewsItem]) -> str:
-        """保存快照并返回路径/key"""
+    def _read_object(self, key: str) -> Optional[bytes]:
+        """读取对象内容，不存在时返回 None（key 为相对存储根的路径）"""
         pass
     
     @abstractmethod
-    def load_latest_snapshot(self) -> Optional[ReportSnapshot]:
-        """加载最新快照"""
+    def _write_object(self, key: str, data: bytes) -> str:
+        """写入对象并返回完整路径/key"""
         pass
     
     @abstractmethod
-    def list_snapshots(self) -> List[str]:
-        """列出所有快照文件名/key"""
+    def _append_object(self, key: str, data: bytes) -> None:
+        """向对象末尾追加内容（对象不存在时创建）"""
         pass
+    
+    @abstractmethod
+    def _delete_object(self, key: str) -> None:
+        """删除对象（不存在时忽略）"""
+        pass
+    
+    @abstractmethod
+    def _object_exists(self, key: str) -> bool:
+        """判断对象是否存在"""
+        pass
+    
+    @abstractmethod
+    def _list_keys(self, prefix: str = "", recursive: bool = False) -> List[str]:
+        """列出 prefix 目录下的对象 key（相对存储根）；recursive=False 时只列出当前层级"""
+        pass
+    
+    def _replace_object(self, key: str, data: bytes) -> None:
+        """整体替换一个可追加对象的内容（替换后仍可继续追加）
 
-
-class LocalStorageBackend(StorageBackend):
-    """本地文件存储后端（用于本地调试）"""
+        默认先删除再追加写入，两步之间对象短暂缺失；能原子替换的后端应覆盖此方法。
+        OSS 的 PutObject 会把对象变为不可追加的普通对象，因此 OSS 后端沿用默认实现。
+        """
+        self._delete_object(key)
+        if data:
+            self._append_object(key, data)
     
-    def __init__(self, base_dir: str = DATA_DIR) -> None:
-        self.base_dir = base_dir
-        os.makedirs(self.base_dir, exist_ok=True)
-        self.history_dir = os.path.join(self.base_dir, "history")
-        os.makedirs(self.history_dir, exist_ok=True)
+    def _open_object_stream(self, key: str) -> Optional[BinaryIO]:
+        """以字节流方式打开对象，不存在时返回 None（默认整体读取，子类可覆盖为真正的流式读取）"""
+        data = self._read_object(key)
+        return io.BytesIO(data) if data is not None else None
     
     def save_snapshot(self, keyword: str, items: List[NewsItem]) -> str:
+        """保存快照并返回路径/key"""
         snapshot = ReportSnapshot(keyword=keyword, collected_at=now_ts(), items=items)
-        filename = f"report_{snapshot.collected_at}.json"
-        path = os.path.join(self.base_dir, filename)
-        snapshot_dict = self._snapshot_to_dict(snapshot)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(snapshot_dict, f, ensure_ascii=False, indent=2)
-        # also keep history copy for incremental diff inputs
-        history_path = os.path.join(self.history_dir, filename)
-        with open(history_path, "w", encoding="utf-8") as f:
-            json.dump(snapshot_dict, f, ensure_ascii=False, indent=2)
-        return path
+        partition = keyword_partition(keyword)
+        key = self._unique_snapshot_key(partition, snapshot.collected_at)
+        
+        location = self._write_object(key, self.codec.encode(self._encode_delta(snapshot, partition, key)))
+        
+        # 快照写入成功后再更新 latest 指针与清单
+        pointer = {"key": key, "collected_at": snapshot.collected_at}
+        self._write_object(f"{partition}/{LATEST_POINTER}", json.dumps(pointer).encode("utf-8"))
+        self._record_in_manifest(key, snapshot.collected_at)
+        return location
     
-    def load_latest_snapshot(self) -> Optional[ReportSnapshot]:
-        files = self.list_snapshots()
-        if not files:
+    def _unique_snapshot_key(self, partition: str, collected_at: str) -> str:
+        """生成快照 key；时间戳只精确到秒，同一秒内再次保存时追加序号，避免覆盖上一份快照"""
+        stem = f"{partition}/{SNAPSHOT_PREFIX}{collected_at}"
+        key = f"{stem}{self.codec.extension}"
+        seq = 0
+        while self._object_exists(key):
+            seq += 1
+            key = f"{stem}_{seq:03d}{self.codec.extension}"
+        return key
+    
+    def load_latest_snapshot(self, keyword: Optional[str] = None) -> Optional[ReportSnapshot]:
+        """加载最新快照
+
+        Args:
+            keyword: 指定时只加载该 keyword 的最新快照（优先读取 latest 指针）；
+                为 None 时加载所有 keyword 中最新的一份快照
+        """
+        if keyword is None:
+            keys = self.list_snapshots()
+            return self._load_snapshot(max(keys, key=_snapshot_sort_key)) if keys else None
+        
+        snapshot = self._load_from_pointer(keyword_partition(keyword), keyword)
+        if snapshot is not None:
+            return snapshot
+        
+        # 指针缺失或损坏：回退为列举该分区
+        keys = self.list_snapshots(keyword)
+        if keys:
+            return self._checked_keyword(self._load_snapshot(max(keys, key=_snapshot_sort_key)), keyword)
+        
+        # 兼容旧版分区名：含特殊字符的 keyword 曾直接使用清洗后的名称（不同 keyword 可能共用）
+        legacy_partition = _slugify(keyword) or DEFAULT_PARTITION
+        if legacy_partition != keyword_partition(keyword):
+            snapshot = self._load_from_pointer(legacy_partition, keyword)
+            if snapshot is not None:
+                return snapshot
+        
+        # 兼容旧布局：根目录下的 report_*.json，从新到旧找到第一份同 keyword 的快照
+        for key in sorted(self._list_legacy_keys(), key=_snapshot_sort_key, reverse=True):
+            snapshot = self._load_snapshot(key)
+            if snapshot is not None and snapshot.keyword == keyword:
+                return snapshot
+        return None
+    
+    def _load_from_pointer(self, partition: str, keyword: str) -> Optional[ReportSnapshot]:
+        pointer_data = self._read_object(f"{partition}/{LATEST_POINTER}")
+        if pointer_data is None:
+            return None
+        try:
+            return self._checked_keyword(self._load_snapshot(json.loads(pointer_data)["key"]), keyword)
+        except (ValueError, KeyError, TypeError):
+            return None
+    
+    @staticmethod
+    def _checked_keyword(snapshot: Optional[ReportSnapshot], keyword: str) -> Optional[ReportSnapshot]:
+        """快照属于其他 keyword 时视为没有快照，避免与其他 keyword 的条目做增量对比"""
+        if snapshot is not None and snapshot.keyword != keyword:
+            logger.warning(f"Ignoring snapshot of keyword '{snapshot.keyword}' found for keyword '{keyword}'")
+            return None
+        return snapshot
+    
+    def iter_snapshot_items(self, key: str) -> Iterator[NewsItem]:
+        """逐条读取快照中的条目，内存占用与快照大小无关（NDJSON 格式时）
+
+        完整快照按原顺序产出；增量快照先产出本快照新增的条目，
+        再沿 base 链产出继承的条目，过程中只在内存中保留待补齐的条目指纹。
+        非流式格式（json / json.gz 等）会整体解码后再逐条产出。
+        """
+        opened = self._iter_entries(key)
+        if opened is None:
+            return
+        header, entries = opened
+        if "depth" not in header:
+            for _, body in entries:
+                yield item_from_dict(body)
+            return
+        
+        missing: Counter = Counter()
+        for h, body in entries:
+            if body is not None:
+                yield item_from_dict(body)
+            else:
+                missing[h] += 1
+        
+        base_key = header.get("base")
+        visited = {key}
+        while missing and base_key:
+            _check_chain(base_key, visited)
+            opened = self._iter_entries(base_key)
+            if opened is None:
+                logger.warning(f"Snapshot base {base_key} is missing; {sum(missing.values())} items cannot be restored")
+                return
+            base_header, base_entries = opened
+            for h, body in base_entries:
+                if body is None:
+                    continue
+                item = item_from_dict(body)
+                count = missing.pop(h if h is not None else item_fingerprint(item), 0)
+                for _ in range(count):
+                    yield item
+            base_key = base_header.get("base") if "depth" in base_header else None
+    
+    def load_state(self, keyword: str, name: str) -> Optional[dict]:
+        """读取 keyword 分区下的采集状态（如抓取缓存），不存在或损坏时返回 None"""
+        data = self._read_object(self._state_key(keyword, name))
+        if data is None:
+            return None
+        try:
+            return _STATE_CODEC.decode(data)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring corrupted state '{name}' for keyword '{keyword}': {e}")
             return None
-        latest = sorted(files)[-1]
-        path = os.path.join(self.base_dir, latest)
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return self._dict_to_snapshot(data)
-    
-    def list_snapshots(self) -> List[str]:
-        if not os.path.isdir(self.base_dir):
-            return []
-        return [f for f in os.listdir(self.base_dir) if f.startswith("report_") and f.endswith(".json")]
     
-    def _snapshot_to_dict(self, snapshot: ReportSnapshot) -> dict:
+    def save_state(self, keyword: str, name: str, data: dict) -> None:
+        """保存 keyword 分区下的采集状态（整体覆盖写入）"""
+        self._write_object(self._state_key(keyword, name), _STATE_CODEC.encode(data))
+    
+    @staticmethod
+    def _state_key(keyword: str, name: str) -> str:
+        return f"{keyword_partition(keyword)}/{STATE_DIR}/{name}{_STATE_CODEC.extension}"
+    
+    def snapshot_item_hashes(self, key: str) -> Set[str]:
+        """读取快照的条目指纹集合（只读取该快照本身，不还原条目正文）"""
+        data = self._read_snapshot_dict(key)
+        if data is None:
+            return set()
+        return set(self._item_hashes_of(data))
+    
+    def diff_snapshots(self, old_key: str, new_key: str) -> Dict[str, List[str]]:
+        """比较两份快照的条目指纹集合
+
+        Returns:
+            {"added": 新快照独有的指纹, "removed": 旧快照独有的指纹}（均已排序）
+        """
+        old_hashes = self.snapshot_item_hashes(old_key)
+        new_hashes = self.snapshot_item_hashes(new_key)
         return {
-            "keyword": snapshot.keyword,
-            "collected_at": snapshot.collected_at,
-            "items": [
-                {
-                    "title": i.title,
-                    "content": i.content,
-                    "source": i.source.value,
-                    "url": i.url,
-                    "published_at": i.published_at,
-                }
-                for i in snapshot.items
-            ],
+            "added": sorted(new_hashes - old_hashes),
+            "removed": sorted(old_hashes - new_hashes),
         }
     
-    def _dict_to_snapshot(self, data: dict) -> ReportSnapshot:
-        items = []
-        for i in data.get("items", []):
-            source_str = i.get("source", "media")
-            # Convert string to SourceType enum
+    def list_snapshots(
+        self,
+        keyword: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> List[str]:
+        """列出快照 key（相对存储根），读取清单索引，只需一次请求
+
+        Args:
+            keyword: 可选，只列出该 keyword 分区的快照
+            start: 可选，采集时间下界（含），格式 YYYYMMDD 或 YYYYMMDD_HHMMSS
+            end: 可选，采集时间上界（含），格式同 start
+        """
+        entries = self._read_manifest()
+        if entries is None:
+            entries = self.rebuild_manifest()
+        
+        partition = keyword_partition(keyword) if keyword is not None else None
+        keys: Dict[str, None] = {}
+        for entry in entries:
+            key = entry.get("key", "")
+            collected_at = entry.get("collected_at", "")
+            # 旧版清单行没有 partition 字段（keyword 字段混有原始关键词与分区名），按 key 推导
+            entry_partition = entry["partition"] if "partition" in entry else _partition_of_key(key)
+            if partition is not None and entry_partition != partition:
+                continue
+            if start and collected_at[:len(start)] < start:
+                continue
+            if end and collected_at[:len(end)] > end:
+                continue
+            keys[key] = None
+        return list(keys)
+    
+    def rebuild_manifest(self) -> List[dict]:
+        """通过真实列举重建清单索引（清单缺失或损坏时自动调用）
+
+        持有 _manifest_lock 完成列举与替换，本进程内并发保存的快照要么已被列举到，
+        要么在重建完成后才追加，不会因旧清单被替换而丢失。
+        """
+        with self._manifest_lock:
+            entries = [
+                _manifest_entry(key, _collected_at_from_name(key.split("/")[-1]))
+                for key in sorted(self._scan_snapshot_keys(), key=_snapshot_sort_key)
+            ]
+            
+            content = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries)
+            self._replace_object(MANIFEST_KEY, content.encode("utf-8"))
+            return entries
+    
+    def _read_manifest(self) -> Optional[List[dict]]:
+        data = self._read_object(MANIFEST_KEY)
+        if data is None:
+            return None
+        entries = []
+        for line in data.decode("utf-8", errors="replace").splitlines():
             try:
-                source = SourceType(source_str) if isinstance(source_str, str) else source_str
+                entry = json.loads(line)
             except ValueError:
-                source = SourceType.MEDIA  # Default to MEDIA if invalid
-            
-            items.append(NewsItem(
-                title=i.get("title", ""),
-                content=i.get("content", ""),
-                source=source,
-                url=i.get("url"),
-                published_at=i.get("published_at"),
-            ))
+                # 跳过并发追加中断等原因产生的残缺行
+                continue
+            if isinstance(entry, dict) and "key" in entry:
+                entries.append(entry)
+        return entries
+    
+    def _record_in_manifest(self, key: str, collected_at: str) -> None:
+        entry = _manifest_entry(key, collected_at)
+        try:
+            with self._manifest_lock:
+                # 清单尚不存在（首次升级到清单布局）时整体重建，避免遗漏已有快照
+                if not self._manifest_ready and not self._object_exists(MANIFEST_KEY):
+                    self.rebuild_manifest()
+                else:
+                    self._append_object(MANIFEST_KEY, (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8"))
+                self._manifest_ready = True
+        except Exception as e:
+            # 快照与 latest 指针已写入，清单失败不影响主流程，可通过 rebuild_manifest 修复
+            logger.warning(f"Failed to append snapshot {key} to manifest: {e}")
+    
+    def _scan_snapshot_keys(self) -> List[str]:
+        """真实列举存储中的全部快照（根目录旧布局 + 一级 keyword 分区）"""
+        keys = []
+        for key in self._list_keys("", recursive=True):
+            parts = key.split("/")
+            if len(parts) <= 2 and _is_snapshot_name(parts[-1]):
+                keys.append(key)
+        return keys
+    
+    def _list_legacy_keys(self) -> List[str]:
+        return [k for k in self._list_keys("") if _is_snapshot_name(k)]
+    
+    def _read_snapshot_dict(self, key: str) -> Optional[dict]:
+        data = self._read_object(key)
+        if data is None:
+            return None
+        # 按扩展名选择解码器，旧格式（report_*.json）可透明读取
+        return codec_for_key(key).decode(data)
+    
+    def _iter_entries(
+        self, key: str
+    ) -> Optional[Tuple[dict, Iterator[Tuple[Optional[str], Optional[dict]]]]]:
+        """返回 (快照头, 条目迭代器)，条目为 (指纹, 正文)；完整快照指纹为 None，继承条目正文为 None"""
+        codec = codec_for_key(key)
+        if not codec.streaming:
+            data = self._read_snapshot_dict(key)
+            if data is None:
+                return None
+            if "item_hashes" in data:
+                bodies = data.get("new_items", {})
+                return data, ((h, bodies.get(h)) for h in data["item_hashes"])
+            return data, ((None, i) for i in data.get("items", []))
+        
+        stream = self._open_object_stream(key)
+        if stream is None:
+            return None
+        records = codec.iter_records(stream)
+        try:
+            header = next(records, {})
+        except Exception:
+            stream.close()
+            raise
+        
+        def entries() -> Iterator[Tuple[Optional[str], Optional[dict]]]:
+            try:
+                for r in records:
+                    yield r.get("hash"), r.get("item")
+            finally:
+                stream.close()
+        
+        return header, entries()
+    
+    def _item_hashes_of(self, data: dict) -> List[str]:
+        if "item_hashes" in data:
+            return data["item_hashes"]
+        # 完整快照（旧格式）：现场计算指纹
+        return [item_fingerprint(i) for i in snapshot_from_dict(data).items]
+    
+    def _encode_delta(self, snapshot: ReportSnapshot, partition: str, key: str) -> dict:
+        """将快照编码为相对 latest 指针所指快照的增量（key 为本快照将写入的 key）"""
+        item_dicts = items_to_dicts(snapshot.items)
+        hashes = [item_fingerprint(i) for i in snapshot.items]
         
-        return ReportSnapshot(
-            keyword=data.get("keyword", ""),
-            collected_at=data.get("collected_at", ""),
-            items=items,
-        )
+        base_key, base_data = None, None
+        if self.keyframe_interval > 1:
+            pointer_data = self._read_object(f"{partition}/{LATEST_POINTER}")
+            try:
+                base_key = json.loads(pointer_data)["key"] if pointer_data is not None else None
+            except (ValueError, KeyError, TypeError):
+                base_key = None
+            if base_key == key:
+                # 指针已指向本快照将写入的 key：以自身为 base 会丢失继承的正文，改写关键帧
+                base_key = None
+            if base_key is not None:
+                base_data = self._read_snapshot_dict(base_key)
+        
+        depth = base_data.get("depth", 0) + 1 if base_data is not None else 0
+        if base_data is None or depth >= self.keyframe_interval:
+            # 完整快照（关键帧）：没有 base，携带全部条目正文
+            base_key, base_hashes, depth = None, set(), 0
+        else:
+            base_hashes = set(self._item_hashes_of(base_data))
+        
+        new_items: Dict[str, dict] = {}
+        for h, item in zip(hashes, item_dicts):
+            if h not in base_hashes:
+                new_items.setdefault(h, item)
+        return {
+            "keyword": snapshot.keyword,
+            "collected_at": snapshot.collected_at,
+            "base": base_key,
+            "depth": depth,
+            "item_hashes": hashes,
+            "new_items": new_items,
+        }
+    
+    def _resolve_delta(self, data: dict, key: str) -> dict:
+        """沿 base 链补齐增量快照缺失的条目正文，还原为完整快照字典"""
+        hashes = data["item_hashes"]
+        bodies: Dict[str, dict] = dict(data.get("new_items", {}))
+        missing = set(hashes) - bodies.keys()
+        base_key = data.get("base")
+        visited = {key}
+        while missing and base_key:
+            _check_chain(base_key, visited)
+            base_data = self._read_snapshot_dict(base_key)
+            if base_data is None:
+                logger.warning(f"Snapshot base {base_key} is missing; {len(missing)} items cannot be restored")
+                break
+            if "item_hashes" in base_data:
+                candidates = base_data.get("new_items", {})
+                base_key = base_data.get("base")
+            else:
+                candidates = dict(zip(self._item_hashes_of(base_data), base_data.get("items", [])))
+                base_key = None
+            for h in list(missing):
+                if h in candidates:
+                    bodies[h] = candidates[h]
+                    missing.discard(h)
+        
+        return {
+            "keyword": data.get("keyword", ""),
+            "collected_at": data.get("collected_at", ""),
+            "items": [bodies[h] for h in hashes if h in bodies],
+        }
+    
+    def _load_snapshot(self, key: str) -> Optional[ReportSnapshot]:
+        data = self._read_snapshot_dict(key)
+        if data is None:
+            return None
+        if "item_hashes" in data:
+            data = self._resolve_delta(data, key)
+        return snapshot_from_dict(data)
+
+
+class LocalStorageBackend(StorageBackend):
+    """本地文件存储后端（用于本地调试）"""
+    
+    def __init__(self, base_dir: str = DATA_DIR, codec: Optional[SnapshotCodec] = None) -> None:
+        """初始化本地存储后端
+        
+        Args:
+            base_dir: 存储根目录，默认使用 DATA_DIR
+            codec: 可选，新快照的编码格式，默认根据 SNAPSHOT_CODEC 选择
+        """
+        self.base_dir = base_dir
+        self.codec = codec or get_codec(SNAPSHOT_CODEC)
+        os.makedirs(self.base_dir, exist_ok=True)
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.base_dir, *key.split("/"))
+    
+    def _read_object(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+    
+    def _open_object_stream(self, key: str) -> Optional[BinaryIO]:
+        try:
+            return open(self._path(key), "rb")
+        except FileNotFoundError:
+            return None
+    
+    def _write_object(self, key: str, data: bytes) -> str:
+        """先写临时文件再原子替换，避免并发读取到写了一半的快照"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return path
+    
+    def _append_object(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "ab") as f:
+            f.write(data)
+    
+    def _replace_object(self, key: str, data: bytes) -> None:
+        """写临时文件后原子替换，读取方不会看到清单缺失或写了一半"""
+        self._write_object(key, data)
+    
+    def _delete_object(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+    
+    def _object_exists(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+    
+    def _list_keys(self, prefix: str = "", recursive: bool = False) -> List[str]:
+        root = self._path(prefix) if prefix else self.base_dir
+        if not os.path.isdir(root):
+            return []
+        if not recursive:
+            return [
+                prefix + name for name in os.listdir(root)
+                if os.path.isfile(os.path.join(root, name))
+            ]
+        
+        # 旧版本在根目录 history/ 下保留的重复副本不参与列举；
+        # 名为 "history" 的 keyword 分区写有 latest 指针，照常列举
+        skip_history = not os.path.isfile(os.path.join(self.base_dir, "history", LATEST_POINTER))
+        keys = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            rel_dir = os.path.relpath(dirpath, self.base_dir).replace(os.sep, "/")
+            if skip_history and (rel_dir == "history" or rel_dir.startswith("history/")):
+                continue
+            for name in filenames:
+                keys.append(name if rel_dir == "." else f"{rel_dir}/{name}")
+        return keys
+
+
+class _OSSRangeReader(io.RawIOBase):
+    """以 Range 请求分段读取 OSS 对象的只读流"""
+    
+    def __init__(self, bucket: Any, key: str, size: int) -> None:
+        self.bucket = bucket
+        self.key = key
+        self.size = size
+        self.position = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer: Any) -> int:
+        if self.position >= self.size:
+            return 0
+        end = min(self.position + len(buffer), self.size) - 1
+        # byte_range 为闭区间
+        data = self.bucket.get_object(self.key, byte_range=(self.position, end)).read()
+        n = len(data)
+        buffer[:n] = data
+        self.position += n
+        return n
 
 
 class OSSStorageBackend(StorageBackend):
@@ -113,7 +635,9 @@ class OSSStorageBackend(StorageBackend):
         self,
         endpoint: Optional[str] = None,
         bucket_name: Optional[str] = None,
-        prefix: str = "radar/"
+        prefix: str = "radar/",
+        bucket: Optional[Any] = None,
+        codec: Optional[SnapshotCodec] = None,
     ) -> None:
         """初始化 OSS 存储后端
         
@@ -121,7 +645,20 @@ class OSSStorageBackend(StorageBackend):
             endpoint: OSS endpoint，默认从环境变量 OSS_ENDPOINT 读取
             bucket_name: OSS bucket 名称，默认从环境变量 OSS_BUCKET 读取
             prefix: OSS 对象 key 前缀，默认从环境变量 OSS_PREFIX 读取（默认 "radar/"）
+            bucket: 可选，直接注入已创建的 oss2.Bucket（或接口兼容的对象，便于测试），
+                注入时跳过认证与连接检查
+            codec: 可选，新快照的编码格式，默认根据 SNAPSHOT_CODEC 选择
         """
+        self._append_lock = threading.Lock()
+        self.codec = codec or get_codec(SNAPSHOT_CODEC)
+        
+        if bucket is not None:
+            self.endpoint = endpoint or os.getenv("OSS_ENDPOINT")
+            self.bucket_name = bucket_name or os.getenv("OSS_BUCKET")
+            self.prefix = os.getenv("OSS_PREFIX", prefix)
+            self.bucket = bucket
+            return
+        
         try:
             import oss2
             from oss2.credentials import EnvironmentVariableCredentialsProvider
@@ -183,85 +720,78 @@ class OSSStorageBackend(StorageBackend):
                     "   export ALIBABA_CLOUD_ACCESS_KEY_SECRET=your_key_secret"
                 )
     
-    def save_snapshot(self, keyword: str, items: List[NewsItem]) -> str:
-        snapshot = ReportSnapshot(keyword=keyword, collected_at=now_ts(), items=items)
-        filename = f"report_{snapshot.collected_at}.json"
-        key = self.prefix + filename
-        
-        snapshot_dict = self._snapshot_to_dict(snapshot)
-        content = json.dumps(snapshot_dict, ensure_ascii=False, indent=2)
-        
-        self.bucket.put_object(key, content.encode("utf-8"))
-        return key
+    def _read_object(self, key: str) -> Optional[bytes]:
+        try:
+            return self.bucket.get_object(self.prefix + key).read()
+        except Exception as e:
+            if _is_oss_not_found(e):
+                return None
+            raise
     
-    def load_latest_snapshot(self) -> Optional[ReportSnapshot]:
-        files = self.list_snapshots()
-        if not files:
-            return None
-        
-        # 获取最新的快照
-        latest = sorted(files)[-1]
-        key = self.prefix + latest
-        
-        obj = self.bucket.get_object(key)
-        content = obj.read().decode("utf-8")
-        data = json.loads(content)
-        
-        return self._dict_to_snapshot(data)
+    def _open_object_stream(self, key: str) -> Optional[BinaryIO]:
+        """按 Range 分段读取对象，每次请求 SNAPSHOT_STREAM_CHUNK_SIZE 字节"""
+        full_key = self.prefix + key
+        try:
+            size = self.bucket.head_object(full_key).content_length
+        except Exception as e:
+            if _is_oss_not_found(e):
+                return None
+            raise
+        return io.BufferedReader(_OSSRangeReader(self.bucket, full_key, size), SNAPSHOT_STREAM_CHUNK_SIZE)
     
-    def list_snapshots(self) -> List[str]:
-        """列出所有 report_*.json 快照（不含前缀）"""
-        import oss2  # Import oss2 locally to handle the case where it's not installed
-        
-        snapshots = []
-        for obj in oss2.ObjectIterator(self.bucket, prefix=self.prefix):
-            key = obj.key
-            # 提取文件名（去掉前缀）
-            if key.startswith(self.prefix):
-                filename = key[len(self.prefix):]
-                if filename.startswith("report_") and filename.endswith(".json"):
-                    snapshots.append(filename)
-        return snapshots
-    
-    def _snapshot_to_dict(self, snapshot: ReportSnapshot) -> dict:
-        return {
-            "keyword": snapshot.keyword,
-            "collected_at": snapshot.collected_at,
-            "items": [
-                {
-                    "title": i.title,
-                    "content": i.content,
-                    "source": i.source.value,
-                    "url": i.url,
-                    "published_at": i.published_at,
-                }
-                for i in snapshot.items
-            ],
-        }
+    def _write_object(self, key: str, data: bytes) -> str:
+        full_key = self.prefix + key
+        self.bucket.put_object(full_key, data)
+        return full_key
     
-    def _dict_to_snapshot(self, data: dict) -> ReportSnapshot:
-        items = []
-        for i in data.get("items", []):
-            source_str = i.get("source", "media")
-            # Convert string to SourceType enum
-            try:
-                source = SourceType(source_str) if isinstance(source_str, str) else source_str
-            except ValueError:
-                source = SourceType.MEDIA  # Default to MEDIA if invalid
-            
-            items.append(NewsItem(
-                title=i.get("title", ""),
-                content=i.get("content", ""),
-                source=source,
-                url=i.get("url"),
-                published_at=i.get("published_at"),
-            ))
-        
-        return ReportSnapshot(
-            keyword=data.get("keyword", ""),
-            collected_at=data.get("collected_at", ""),
-            items=items,
-        )
+    def _append_object(self, key: str, data: bytes) -> None:
+        """追加写入（OSS Appendable Object）；位置冲突（其他实例并发追加）时重新获取长度后重试"""
+        full_key = self.prefix + key
+        with self._append_lock:
+            for attempt in range(3):
+                try:
+                    position = self.bucket.head_object(full_key).content_length
+                except Exception as e:
+                    if not _is_oss_not_found(e):
+                        raise
+                    position = 0
+                try:
+                    self.bucket.append_object(full_key, position, data)
+                    return
+                except Exception as e:
+                    # 409: PositionNotEqualToLength
+                    if getattr(e, "status", None) != 409 or attempt == 2:
+                        raise
+    
+    def _delete_object(self, key: str) -> None:
+        try:
+            self.bucket.delete_object(self.prefix + key)
+        except Exception as e:
+            if not _is_oss_not_found(e):
+                raise
+    
+    def _object_exists(self, key: str) -> bool:
+        return self.bucket.object_exists(self.prefix + key)
+    
+    def _list_keys(self, prefix: str = "", recursive: bool = False) -> List[str]:
+        """分页列举（每页最多 1000 个），recursive=False 时用 "/" 分隔只列出当前层级"""
+        keys = []
+        delimiter = "" if recursive else "/"
+        marker = ""
+        while True:
+            result = self.bucket.list_objects(
+                prefix=self.prefix + prefix,
+                delimiter=delimiter,
+                marker=marker,
+                max_keys=1000,
+            )
+            for obj in result.object_list:
+                # 去掉全局前缀
+                if obj.key.startswith(self.prefix):
+                    keys.append(obj.key[len(self.prefix):])
+            if not result.is_truncated:
+                return keys
+            marker = result.next_marker
 
 
 class StorageClient:
@@ -292,11 +822,32 @@ class StorageClient:
         """保存快照并返回路径/key"""
         return self.backend.save_snapshot(keyword, items)
     
-    def load_latest_snapshot(self) -> Optional[ReportSnapshot]:
-        """加载最新快照"""
-        return self.backend.load_latest_snapshot()
+    def load_latest_snapshot(self, keyword: Optional[str] = None) -> Optional[ReportSnapshot]:
+        """加载最新快照（指定 keyword 时只加载该 keyword 的快照）"""
+        return self.backend.load_latest_snapshot(keyword)
+    
+    def iter_snapshot_items(self, key: str) -> Iterator[NewsItem]:
+        """逐条流式读取快照中的条目"""
+        return self.backend.iter_snapshot_items(key)
+    
+    def load_state(self, keyword: str, name: str) -> Optional[dict]:
+        """读取 keyword 分区下的采集状态"""
+        return self.backend.load_state(keyword, name)
+    
+    def save_state(self, keyword: str, name: str, data: dict) -> None:
+        """保存 keyword 分区下的采集状态"""
+        self.backend.save_state(keyword, name, data)
+    
+    def list_snapshots(
+        self,
+        keyword: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> List[str]:
+        """列出快照 key（可按 keyword 与采集时间范围过滤）"""
+        return self.backend.list_snapshots(keyword, start, end)
     
-    def list_snapshots(self) -> List[str]:
-        """列出所有快照文件名/key"""
-        return self.backend.list_snapshots()
+    def diff_snapshots(self, old_key: str, new_key: str) -> Dict[str, List[str]]:
+        """比较两份快照的条目指纹集合（新增/移除）"""
+        return self.backend.diff_snapshots(old_key, new_key)
 
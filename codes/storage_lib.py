@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 from models import NewsItem, ReportSnapshot
 from storage_layer import StorageClient
@@ -31,21 +31,40 @@ def save_snapshot(keyword: str, items: List[NewsItem]) -> str:
     return client.save_snapshot(keyword, items)
 
 
-def load_latest_snapshot() -> Optional[ReportSnapshot]:
+def load_latest_snapshot(keyword: Optional[str] = None) -> Optional[ReportSnapshot]:
     """加载最新快照
     
+    Args:
+        keyword: 可选，只加载该关键词的最新快照；为 None 时返回所有关键词中最新的快照
+        
     Returns:
         最新快照对象，如果不存在则返回 None
     """
     client = _get_storage_client()
-    return client.load_latest_snapshot()
+    return client.load_latest_snapshot(keyword)
+
+
+def list_snapshots(keyword: Optional[str] = None) -> List[str]:
+    """列出快照文件名/key
+    
+    Args:
+        keyword: 可选，只列出该关键词的快照
+        
+    Returns:
+        快照 key 列表（形如 <keyword>/report_<ts>.ndjson.gz，扩展名取决于 SNAPSHOT_CODEC）
+    """
+    client = _get_storage_client()
+    return client.list_snapshots(keyword)
 
 
-def list_snapshots() -> List[str]:
-    """列出所有快照文件名/key
+def iter_snapshot_items(key: str) -> Iterator[NewsItem]:
+    """逐条流式读取快照中的条目（适合条目数很多的快照）
     
+    Args:
+        key: 快照 key（list_snapshots 的返回值之一）
+        
     Returns:
-        快照文件名列表
+        NewsItem 迭代器
     """
     client = _get_storage_client()
-    return client.list_snapshots()
+    return client.iter_snapshot_items(key)
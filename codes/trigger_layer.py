@@ -3,9 +3,9 @@ from __future__ import annotations
 import json
 import logging
 import os
-from typing import Any, Dict
+from typing import Any, Dict, List
 
-from orchestrator import run_pipeline
+from orchestrator import run_pipeline, run_pipelines
 from config import DEFAULT_KEYWORD
 from logging_setup import setup_logging
 from alerting import notify_failure
@@ -19,6 +19,8 @@ def handler(event: Any, context: Any) -> Dict[str, Any]:
 
     event 可能是 bytes / str（来自触发器 payload），也可能已是 dict。
     keyword 获取优先级：event.keyword > env.DEFAULT_KEYWORD > config.DEFAULT_KEYWORD
+    若 event 中包含 keywords 列表（如 {"keywords": ["半导体", "光伏"]}），
+    则在本次调用内批量处理，可选 max_workers 控制并发度。
     """
     # 设置统一日志配置
     setup_logging(context)
@@ -44,25 +46,15 @@ def handler(event: Any, context: Any) -> Dict[str, Any]:
         evt = {}
         keyword = default_keyword
 
+    keywords = evt.get("keywords") if isinstance(evt, dict) else None
+    if isinstance(keywords, list) and keywords:
+        return _handle_batch(keywords, evt)
+
     try:
         # 调用已有编排逻辑
         result = run_pipeline(keyword=keyword)
 
-        # 正确读取 orchestrator 返回的字段
-        raw_changes_count = result.get("raw_changes_count", 0)
-        decisions = result.get("decisions", [])
-        conflicts_count = len(decisions)
-        run_id = result.get("run_id", "")
-        global_summary = result.get("global_summary", "")
-
-        return {
-            "status": "success",
-            "keyword": keyword,
-            "run_id": run_id,
-            "raw_changes_count": raw_changes_count,
-            "conflicts_count": conflicts_count,
-            "global_summary": global_summary,
-        }
+        return _summarize_result(keyword, result)
     except Exception as e:
         logger.error(f"Pipeline execution failed: {e}", exc_info=True)
         
@@ -93,3 +85,85 @@ def handler(event: Any, context: Any) -> Dict[str, Any]:
             "keyword": keyword,
             "error": str(e),
         }
+
+
+def _summarize_result(keyword: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """将 orchestrator 返回的完整数据包整理为触发器响应字段"""
+    # 正确读取 orchestrator 返回的字段
+    raw_changes_count = result.get("raw_changes_count", 0)
+    decisions = result.get("decisions", [])
+    conflicts_count = len(decisions)
+    run_id = result.get("run_id", "")
+    global_summary = result.get("global_summary", "")
+
+    return {
+        "status": "success",
+        "keyword": keyword,
+        "run_id": run_id,
+        "raw_changes_count": raw_changes_count,
+        "conflicts_count": conflicts_count,
+        "global_summary": global_summary,
+    }
+
+
+def _handle_batch(keywords: List[Any], evt: Dict[str, Any]) -> Dict[str, Any]:
+    """批量模式：单次调用内并发处理多个 keyword，失败项逐个告警且互不影响
+
+    keywords 中存在非字符串或空白项时整批拒绝并返回错误响应（不做类型转换，
+    避免把 null / 数字 / 对象当作关键词去采集与落库）。
+    """
+    max_workers = evt.get("max_workers")
+    try:
+        max_workers = int(max_workers) if max_workers is not None else None
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid max_workers in event, using default: {max_workers!r}")
+        max_workers = None
+
+    invalid = [k for k in keywords if not isinstance(k, str) or not k.strip()]
+    if invalid:
+        logger.error(f"Rejected batch with invalid keywords: {invalid!r}")
+        return {
+            "status": "error",
+            "error": f"keywords must be non-empty strings, got invalid entries: {invalid!r}",
+            "succeeded": 0,
+            "failed": 0,
+            "results": [],
+        }
+
+    batch = run_pipelines([k.strip() for k in keywords], max_workers=max_workers)
+
+    results = []
+    for item in batch["results"]:
+        keyword = item.get("keyword", "")
+        if item.get("status") == "success":
+            results.append(_summarize_result(keyword, item))
+            continue
+
+        from alerting import _sanitize_dict
+        from models import now_ts
+        notify_failure({
+            "keyword": keyword,
+            "run_id": now_ts(),
+            "error": item.get("error", ""),
+            "error_type": item.get("error_type", ""),
+            "event": _sanitize_dict(evt),
+        })
+        results.append({
+            "status": "error",
+            "keyword": keyword,
+            "error": item.get("error", ""),
+        })
+
+    if batch["failed"] == 0:
+        status = "success"
+    elif batch["succeeded"] == 0:
+        status = "error"
+    else:
+        status = "partial"
+
+    return {
+        "status": status,
+        "succeeded": batch["succeeded"],
+        "failed": batch["failed"],
+        "results": results,
+    }
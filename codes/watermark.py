@@ -0,0 +1,240 @@
+"""增量水位：按 keyword + 数据源记录上次成功运行看到的最新发布时间与已见 URL，只放行新增资讯"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import logging
+import math
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from config import (
+    SNAPSHOT_MAX_ITEMS,
+    WATERMARK_BLOOM_CAPACITY,
+    WATERMARK_BLOOM_ERROR_RATE,
+    WATERMARK_LOOKBACK_HOURS,
+)
+from models import NewsItem, SourceType, item_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# 水位在存储层 keyword 分区下的状态名（<keyword>/state/watermark.json.gz）
+WATERMARK_STATE = "watermark"
+
+
+class BloomFilter:
+    """定长布隆过滤器：记录已见 URL，不会漏判已见条目，只会以约 error_rate 的概率把新条目误判为已见"""
+
+    def __init__(
+        self,
+        capacity: int = WATERMARK_BLOOM_CAPACITY,
+        error_rate: float = WATERMARK_BLOOM_ERROR_RATE,
+        bits: Optional[bytes] = None,
+        count: int = 0,
+    ) -> None:
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        size = (self.num_bits + 7) // 8
+        self.bits = bytearray(bits) if bits is not None and len(bits) == size else bytearray(size)
+        self.count = count
+
+    def _positions(self, key: str) -> List[int]:
+        # 双重哈希：用一次 128 位摘要的两半模拟 k 个独立哈希函数
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "count": self.count,
+            "bits": base64.b64encode(bytes(self.bits)).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BloomFilter":
+        return cls(
+            capacity=int(data["capacity"]),
+            error_rate=float(data["error_rate"]),
+            bits=base64.b64decode(data["bits"]),
+            count=int(data.get("count", 0)),
+        )
+
+
+def parse_published_at(value: Optional[str]) -> Optional[datetime]:
+    """解析 published_at（ISO 8601 / RFC 2822），无时区时按 UTC 处理；无法解析时返回 None"""
+    if not value:
+        return None
+    text = value.strip()
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(text)
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def item_key(item: NewsItem) -> str:
+    """条目在水位中的身份：优先使用 URL，没有 URL 时使用内容指纹"""
+    return item.url or item_fingerprint(item)
+
+
+class FeedWatermark:
+    """单个数据源的水位：已见条目的最新发布时间 + 两代布隆过滤器（当前代写满后轮换）"""
+
+    def __init__(
+        self,
+        latest: Optional[datetime] = None,
+        current: Optional[BloomFilter] = None,
+        previous: Optional[BloomFilter] = None,
+    ) -> None:
+        self.latest = latest
+        self.current = current or BloomFilter()
+        self.previous = previous
+
+    def seen(self, key: str) -> bool:
+        return key in self.current or (self.previous is not None and key in self.previous)
+
+    def add(self, key: str, published: Optional[datetime]) -> None:
+        if self.current.is_full:
+            self.previous = self.current
+            self.current = BloomFilter(self.current.capacity, self.current.error_rate)
+        self.current.add(key)
+        if published is not None and (self.latest is None or published > self.latest):
+            self.latest = published
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "latest": self.latest.isoformat() if self.latest else None,
+            "current": self.current.to_dict(),
+            "previous": self.previous.to_dict() if self.previous else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FeedWatermark":
+        return cls(
+            latest=parse_published_at(data.get("latest")),
+            current=BloomFilter.from_dict(data["current"]),
+            previous=BloomFilter.from_dict(data["previous"]) if data.get("previous") else None,
+        )
+
+
+class Watermark:
+    """一个 keyword 下各数据源的增量水位
+
+    水位按采集该条资讯的数据源（NewsItem.feed，即 SourceAdapter.name）分别记录：
+    多个数据源可能共用同一 SourceType，更新较慢的数据源不应被其他数据源的水位过滤。
+    没有 feed 的条目（非 ScraperAgent 产出）按来源类型记录。
+
+    条目满足以下条件之一即视为旧资讯：
+    - 发布时间早于该数据源水位减去回看窗口（lookback_hours）；
+    - URL（无 URL 时为内容指纹）已记录在该数据源的布隆过滤器中。
+    水位只应在快照保存成功后通过 advance() 推进，且只记入实际完成对比的资讯，
+    未对比的资讯下次运行会重新处理。
+    """
+
+    def __init__(
+        self,
+        data: Optional[Dict[str, Any]] = None,
+        lookback_hours: float = WATERMARK_LOOKBACK_HOURS,
+    ) -> None:
+        self.lookback = timedelta(hours=lookback_hours)
+        self.feeds: Dict[str, FeedWatermark] = {}
+        for name, entry in ((data or {}).get("feeds") or {}).items():
+            try:
+                self.feeds[name] = FeedWatermark.from_dict(entry)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Ignoring corrupted watermark for feed '{name}': {e}")
+
+    @staticmethod
+    def _feed_name(item: NewsItem) -> str:
+        if item.feed:
+            return item.feed
+        return item.source.value if isinstance(item.source, SourceType) else str(item.source)
+
+    def is_new(self, item: NewsItem) -> bool:
+        mark = self.feeds.get(self._feed_name(item))
+        if mark is None:
+            return True
+        published = parse_published_at(item.published_at)
+        if published is not None and mark.latest is not None and published < mark.latest - self.lookback:
+            return False
+        return not mark.seen(item_key(item))
+
+    def filter_new(self, items: Sequence[NewsItem]) -> List[NewsItem]:
+        """返回自上次成功运行以来的新增资讯（同一批次内重复的 URL 只保留第一条）"""
+        fresh: List[NewsItem] = []
+        batch_keys = set()
+        for item in items:
+            key = (self._feed_name(item), item_key(item))
+            if key in batch_keys or not self.is_new(item):
+                continue
+            batch_keys.add(key)
+            fresh.append(item)
+        return fresh
+
+    def advance(self, items: Sequence[NewsItem]) -> None:
+        """将本次成功处理的资讯记入水位"""
+        for item in items:
+            mark = self.feeds.setdefault(self._feed_name(item), FeedWatermark())
+            mark.add(item_key(item), parse_published_at(item.published_at))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"feeds": {name: mark.to_dict() for name, mark in self.feeds.items()}}
+
+
+def load_watermark(storage: Any, keyword: str) -> Watermark:
+    """从存储层读取 keyword 的水位；读取失败时退化为空水位（即全量处理）"""
+    try:
+        return Watermark(storage.load_state(keyword, WATERMARK_STATE))
+    except Exception as e:
+        logger.warning(f"Failed to load watermark for keyword '{keyword}': {e}")
+        return Watermark()
+
+
+def save_watermark(storage: Any, keyword: str, watermark: Watermark) -> None:
+    """保存 keyword 的水位；失败只记录告警，下次运行会重新处理这批资讯"""
+    try:
+        storage.save_state(keyword, WATERMARK_STATE, watermark.to_dict())
+    except Exception as e:
+        logger.warning(f"Failed to save watermark for keyword '{keyword}': {e}")
+
+
+def merge_snapshot_items(
+    old_items: Sequence[NewsItem],
+    new_items: Sequence[NewsItem],
+    max_items: int = SNAPSHOT_MAX_ITEMS,
+) -> List[NewsItem]:
+    """将新增资讯合并到旧快照条目之前，按内容指纹去重，并截断到 max_items 条（<= 0 不限制）"""
+    merged: List[NewsItem] = []
+    known = set()
+    for item in list(new_items) + list(old_items):
+        fingerprint = item_fingerprint(item)
+        if fingerprint in known:
+            continue
+        known.add(fingerprint)
+        merged.append(item)
+        if 0 < max_items <= len(merged):
+            break
+    return merged
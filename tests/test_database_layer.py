@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+# Add codes directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'codes'))
+
+from database_layer import DatabaseClient, mask_to_sources, parse_numeric_value, sources_to_mask
+from models import ConflictDecision, SourceType
+
+
+def _decision(field_name, value, source=SourceType.OFFICIAL, pending=None):
+    return ConflictDecision(
+        field_name=field_name,
+        final_value=value,
+        chosen_source=source,
+        pending_sources=pending or [],
+        reason=f"{field_name}={value}",
+    )
+
+
+class TestSaveDecisions(unittest.TestCase):
+    """测试决策的批量写入"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseClient(db_path=os.path.join(self.tmp_dir, "radar.db"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_batch_writes_history_and_latest_state(self):
+        """测试历史逐条写入，同一指标的最新状态取批次中最后一条"""
+        self.db.save_decisions("run-1", "半导体", [
+            _decision("产能利用率", "90%", pending=[SourceType.MEDIA, SourceType.RUMOR]),
+            _decision("价格", "1850元/吨"),
+            _decision("产能利用率", "92%", source=SourceType.MEDIA),
+        ])
+
+        history = self.db.get_decision_history(keyword="半导体")
+        self.assertEqual(len(history), 3)
+        self.assertIn("media,rumor", [h["pending_sources"] for h in history])
+
+        states = {s["field_name"]: s for s in self.db.get_latest_states("半导体")}
+        self.assertEqual(states["产能利用率"]["final_value"], "92%")
+        self.assertEqual(states["产能利用率"]["chosen_source"], "media")
+        self.assertEqual(len(states), 2)
+
+    def test_failed_batch_is_rolled_back(self):
+        """测试批次中途失败时整个事务回滚"""
+        bad = _decision("价格", None)  # final_value NOT NULL
+        with self.assertRaises(Exception):
+            self.db.save_decisions("run-1", "半导体", [_decision("产能利用率", "90%"), bad])
+
+        self.assertEqual(self.db.get_decision_history(keyword="半导体"), [])
+
+
+class TestDecisionHistoryQueries(unittest.TestCase):
+    """测试决策历史的游标分页与查询计划"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseClient(db_path=os.path.join(self.tmp_dir, "radar.db"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_keyset_pagination_walks_all_rows_once(self):
+        """测试游标分页按倒序不重不漏（含同一秒内的多条记录）"""
+        for ts in ["20260101_000000", "20260102_000000", "20260103_000000"]:
+            with patch("database_layer.now_ts", return_value=ts):
+                self.db.save_decisions(f"run-{ts}", "半导体", [_decision(f"指标{i}", ts) for i in range(3)])
+
+        seen, cursor = [], None
+        while True:
+            page = self.db.get_decision_history(keyword="半导体", limit=2, cursor=cursor)
+            if not page:
+                break
+            seen.extend(page)
+            cursor = self.db.history_cursor(page[-1])
+
+        self.assertEqual(len(seen), 9)
+        self.assertEqual(len({row["id"] for row in seen}), 9)
+        order = [(row["created_at"], row["id"]) for row in seen]
+        self.assertEqual(order, sorted(order, reverse=True))
+
+    def test_field_filter(self):
+        """测试按 keyword + field_name 过滤"""
+        self.db.save_decisions("run-1", "半导体", [_decision("价格", "1"), _decision("产能", "2")])
+        rows = self.db.get_decision_history(keyword="半导体", field_name="价格")
+        self.assertEqual([r["final_value"] for r in rows], ["1"])
+
+    def test_invalid_cursor_raises(self):
+        """测试无效游标报错"""
+        with self.assertRaises(ValueError):
+            self.db.get_decision_history(cursor="bogus")
+
+    def test_query_plans_use_indexes_without_sorting(self):
+        """查询计划回归：常用过滤组合都走索引，且不需要临时排序"""
+        conn = self.db._connect()
+        combos = [
+            (None, None, None, None),
+            ("半导体", None, None, None),
+            ("半导体", None, "价格", None),
+            (None, "run-1", None, None),
+            ("半导体", "run-1", None, None),
+            ("半导体", None, None, "20260101_000000:5"),
+            ("半导体", None, "价格", "20260101_000000:5"),
+            (None, None, None, "20260101_000000:5"),
+        ]
+        for keyword, run_id, field_name, cursor in combos:
+            query, params = self.db._build_history_query(keyword, run_id, 10, field_name, cursor)
+            plan = " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params))
+            with self.subTest(keyword=keyword, run_id=run_id, field_name=field_name, cursor=cursor):
+                self.assertIn("USING INDEX", plan)
+                self.assertNotIn("TEMP B-TREE", plan)
+                if keyword or run_id or cursor:
+                    self.assertIn("SEARCH", plan)
+
+
+class TestIndicatorSeries(unittest.TestCase):
+    """测试指标时间序列聚合与数值派生列"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "radar.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _save(self, db, ts, value):
+        with patch("database_layer.now_ts", return_value=ts):
+            db.save_decisions(f"run-{ts}", "半导体", [_decision("价格", value)])
+
+    def test_parse_numeric_value(self):
+        """测试从带单位的指标值中提取数字"""
+        self.assertEqual(parse_numeric_value("92%"), 92.0)
+        self.assertEqual(parse_numeric_value("1,850元/吨"), 1850.0)
+        self.assertEqual(parse_numeric_value("-0.5个百分点"), -0.5)
+        self.assertIsNone(parse_numeric_value("持平"))
+
+    def test_daily_series(self):
+        """测试按天聚合：最后取值、数值统计与变化次数"""
+        db = DatabaseClient(db_path=self.db_path)
+        for ts, value in [
+            ("20260101_080000", "1800元/吨"),
+            ("20260101_120000", "1850元/吨"),
+            ("20260101_180000", "1850元/吨"),
+            ("20260102_090000", "持平"),
+            ("20260103_090000", "1900元/吨"),
+        ]:
+            self._save(db, ts, value)
+
+        series = db.get_indicator_series("半导体", "价格", start="20260101", end="20260102")
+        db.close()
+
+        self.assertEqual([p["bucket"] for p in series], ["20260101", "20260102"])
+        day1, day2 = series
+        self.assertEqual((day1["first_value"], day1["value"]), ("1800元/吨", "1850元/吨"))
+        self.assertEqual((day1["min_value"], day1["max_value"], day1["numeric_value"]), (1800.0, 1850.0, 1850.0))
+        self.assertEqual((day1["decisions"], day1["changes"]), (3, 1))
+        self.assertEqual((day2["value"], day2["numeric_value"], day2["changes"]), ("持平", None, 1))
+
+    def test_series_query_uses_index(self):
+        """测试时间序列查询走 keyword + field_name + created_at 组合索引"""
+        db = DatabaseClient(db_path=self.db_path)
+        conn = db._connect()
+        traced = []
+        conn.set_trace_callback(traced.append)
+        db.get_indicator_series("半导体", "价格", start="20260101", bucket="month")
+        conn.set_trace_callback(None)
+        plan = " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + traced[-1]))
+        db.close()
+        self.assertIn("idx_conflict_decisions_keyword_field_created", plan)
+
+    def test_existing_rows_are_backfilled(self):
+        """测试旧库升级时补充 numeric_value 列并回填"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE conflict_decisions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL, keyword TEXT NOT NULL,
+                    field_name TEXT NOT NULL, final_value TEXT NOT NULL, chosen_source TEXT NOT NULL,
+                    pending_sources TEXT, reason TEXT, created_at TEXT NOT NULL
+                )
+            """)
+            conn.execute(
+                "INSERT INTO conflict_decisions "
+                "(run_id, keyword, field_name, final_value, chosen_source, pending_sources, created_at) "
+                "VALUES ('r', '半导体', '价格', '92%', 'official', 'media,rumor', '20250101_000000')"
+            )
+        conn.close()
+
+        db = DatabaseClient(db_path=self.db_path)
+        series = db.get_indicator_series("半导体", "价格", bucket="year")
+        mask = db._connect().execute("SELECT pending_mask FROM conflict_decisions").fetchone()[0]
+        db.close()
+        self.assertEqual(series[0]["numeric_value"], 92.0)
+        self.assertEqual(mask_to_sources(mask), [SourceType.MEDIA, SourceType.RUMOR])
+
+
+class TestSourceOverrideStats(unittest.TestCase):
+    """测试基于 pending_mask 位掩码的来源覆盖统计"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseClient(db_path=os.path.join(self.tmp_dir, "radar.db"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_mask_round_trip(self):
+        """测试来源列表与位掩码互相转换"""
+        sources = [SourceType.OFFICIAL, SourceType.RUMOR]
+        self.assertEqual(mask_to_sources(sources_to_mask(sources)), sources)
+        self.assertEqual(sources_to_mask([]), 0)
+
+    def test_override_stats(self):
+        """测试统计各来源被否决的次数，可按关键词过滤"""
+        self.db.save_decisions("run-1", "半导体", [
+            _decision("价格", "1", SourceType.OFFICIAL, [SourceType.RUMOR]),
+            _decision("产能", "2", SourceType.OFFICIAL, [SourceType.RUMOR, SourceType.MEDIA]),
+            _decision("库存", "3", SourceType.MEDIA, [SourceType.RUMOR]),
+            _decision("订单", "4", SourceType.OFFICIAL),
+        ])
+        self.db.save_decisions("run-2", "光伏", [
+            _decision("价格", "1", SourceType.OFFICIAL, [SourceType.RUMOR]),
+        ])
+
+        stats = self.db.get_source_override_stats(keyword="半导体")
+        counts = {(s["chosen_source"], s["overruled_source"]): s["count"] for s in stats}
+        self.assertEqual(counts, {("official", "rumor"): 2, ("official", "media"): 1, ("media", "rumor"): 1})
+        self.assertEqual(stats[0]["count"], 2)
+
+        overall = self.db.get_source_override_stats()
+        self.assertEqual(overall[0], {"chosen_source": "official", "overruled_source": "rumor", "count": 3})
+
+    def test_override_stats_use_covering_index(self):
+        """测试统计查询只读取覆盖索引"""
+        conn = self.db._connect()
+        for keyword in ("半导体", None):
+            traced = []
+            conn.set_trace_callback(traced.append)
+            self.db.get_source_override_stats(keyword=keyword)
+            conn.set_trace_callback(None)
+            plan = " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + traced[-1]))
+            with self.subTest(keyword=keyword):
+                self.assertIn("COVERING INDEX", plan)
+
+
+class TestConnectionManagement(unittest.TestCase):
+    """测试每线程长连接与 WAL 配置"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseClient(db_path=os.path.join(self.tmp_dir, "radar.db"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_connection_is_reused_per_thread(self):
+        """测试同一线程复用连接，不同线程各自持有连接"""
+        conn = self.db._connect()
+        self.db.save_decisions("run-1", "半导体", [_decision("价格", "1")])
+        self.db.get_latest_states("半导体")
+        self.assertIs(self.db._connect(), conn)
+
+        other = []
+        t = threading.Thread(target=lambda: other.append(self.db._connect()))
+        t.start()
+        t.join()
+        self.assertIsNot(other[0], conn)
+
+    def test_wal_and_pragmas(self):
+        """测试连接启用 WAL 与 synchronous=NORMAL"""
+        conn = self.db._connect()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)
+
+    def test_reader_not_blocked_by_open_write_transaction(self):
+        """测试写事务未提交时，其他线程仍可读取已提交的数据"""
+        self.db.save_decisions("run-1", "半导体", [_decision("价格", "1")])
+        writer = self.db._connect()
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("DELETE FROM indicator_states")
+        try:
+            result = []
+            t = threading.Thread(target=lambda: result.append(self.db.get_latest_states("半导体")))
+            t.start()
+            t.join(timeout=5)
+            self.assertEqual(len(result[0]), 1)
+        finally:
+            writer.rollback()
+
+
+if __name__ == '__main__':
+    unittest.main()
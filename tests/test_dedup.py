@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Add codes directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'codes'))
+
+import config
+from dedup import cluster_near_duplicates, collapse_near_duplicates, hamming_distance, simhash
+from incremental_analysis import EvidenceProfile
+from models import NewsItem, SourceType
+
+BASE_CONTENT = "某公司发布第三季度财报，营收同比增长百分之二十五，净利润达到十二亿元，毛利率提升至百分之四十一。"
+# 样例文本较短，少量改写对应的汉明距离比长文更大，测试中使用允许的最大阈值 7
+
+
+class TestSimHash(unittest.TestCase):
+    """测试 SimHash 指纹"""
+
+    def test_near_duplicates_have_small_distance(self):
+        """测试少量改写的文本指纹距离远小于无关文本"""
+        a = simhash(BASE_CONTENT)
+        b = simhash(BASE_CONTENT + "（记者 张三）")
+        c = simhash("新能源车企公布十月交付量，多款车型销量创新高，海外市场持续扩张。")
+        self.assertEqual(a, simhash(BASE_CONTENT))
+        self.assertLess(hamming_distance(a, b), hamming_distance(a, c))
+
+
+class TestCollapseNearDuplicates(unittest.TestCase):
+    """测试近似重复资讯合并"""
+
+    def setUp(self):
+        self.items = [
+            NewsItem(title="财报", content=BASE_CONTENT + "（转载）", source=SourceType.MEDIA),
+            NewsItem(title="业绩速递", content="新能源车企公布十月交付量，多款车型销量创新高。", source=SourceType.MEDIA),
+            NewsItem(title="财报", content=BASE_CONTENT, source=SourceType.OFFICIAL, url="https://example.com/ir"),
+            NewsItem(title="财报", content=BASE_CONTENT + "！", source=SourceType.RUMOR),
+        ]
+
+    def test_collapse_keeps_highest_weight_source(self):
+        """测试多渠道转载合并为权重最高的官方来源，并记录印证次数"""
+        collapsed = collapse_near_duplicates(self.items, max_distance=7)
+        self.assertEqual(len(collapsed), 2)
+        self.assertEqual(collapsed[0].source, SourceType.OFFICIAL)
+        self.assertEqual(collapsed[0].corroboration, 3)
+        self.assertEqual(collapsed[1].title, "业绩速递")
+        self.assertEqual(collapsed[1].corroboration, 1)
+
+    def test_input_items_not_mutated(self):
+        """测试合并不修改传入的条目"""
+        collapse_near_duplicates(self.items, max_distance=7)
+        self.assertTrue(all(item.corroboration == 1 for item in self.items))
+
+    def test_negative_distance_disables_collapse(self):
+        """测试阈值为负数时不做合并"""
+        self.assertEqual(cluster_near_duplicates(self.items, max_distance=-1), [[0], [1], [2], [3]])
+        self.assertEqual(collapse_near_duplicates(self.items, max_distance=-1), self.items)
+
+    def test_corroboration_raises_count_score(self):
+        """测试转载印证按半条计入证据条数得分"""
+        collapsed = collapse_near_duplicates(self.items, max_distance=7)
+        single = [NewsItem(title="财报", content=BASE_CONTENT, source=SourceType.OFFICIAL)]
+        self.assertAlmostEqual(EvidenceProfile(single).richness()[0], 1 / 3)
+        self.assertAlmostEqual(EvidenceProfile(collapsed[:1]).richness()[0], 2 / 3)
+
+
+
+class TestDistanceLimit(unittest.TestCase):
+    """测试 LSH 分桶支持的汉明距离上限（8 段 × 8 位，最大阈值 7）"""
+
+    def _items_with_fingerprints(self, fingerprints):
+        items = [NewsItem(title=str(i), content="", source=SourceType.MEDIA) for i in range(len(fingerprints))]
+        by_text = {f"{i}\n": fp for i, fp in enumerate(fingerprints)}
+        return items, patch("dedup.simhash", side_effect=lambda text: by_text[text])
+
+    def test_pair_at_max_distance_differing_in_every_band_is_found(self):
+        """测试距离恰为 7 且差异位分散在 7 个不同分段的指纹对仍被合并"""
+        other = sum(1 << (band * 8) for band in range(7))
+        items, simhash_patch = self._items_with_fingerprints([0, other])
+        with simhash_patch:
+            self.assertEqual(hamming_distance(0, other), config.DEDUP_SIMHASH_MAX_DISTANCE)
+            self.assertEqual(cluster_near_duplicates(items, max_distance=7), [[0, 1]])
+            self.assertEqual(cluster_near_duplicates(items, max_distance=6), [[0], [1]])
+
+    def test_distance_above_limit_is_rejected(self):
+        """测试显式传入超过上限的阈值时抛出 ValueError"""
+        with self.assertRaises(ValueError):
+            cluster_near_duplicates([], max_distance=config.DEDUP_SIMHASH_MAX_DISTANCE + 1)
+
+    def test_config_clamps_distance_above_limit(self):
+        """测试配置值超过上限时截断为上限并记录告警，上限以内保持不变"""
+        with self.assertLogs("config", level="WARNING") as logs:
+            self.assertEqual(config._clamp_dedup_distance(12), 7)
+        self.assertIn("DEDUP_SIMHASH_DISTANCE=12", logs.output[0])
+        for value in (-1, 0, 3, 7):
+            self.assertEqual(config._clamp_dedup_distance(value), value)
+
+
+if __name__ == '__main__':
+    unittest.main()
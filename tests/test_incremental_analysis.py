@@ -0,0 +1,383 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+import unittest.mock
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add codes directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'codes'))
+
+from incremental_analysis import (
+    EvidenceProfile,
+    _compare_chunk,
+    _compare_chunk_async,
+    _parse_changes,
+    _parse_evidence,
+    compare_items,
+    compare_items_async,
+    incremental_compare,
+    merge_changes,
+    select_changed_items,
+    split_into_chunks,
+)
+from conflict_resolution import resolve_conflicts
+from config import SYSTEM_PROMPT
+from llm_cache import LLMCache
+from models import ChangeItem, NewsItem, ReportSnapshot, SourceType, item_fingerprint
+
+
+def _item(title, source=SourceType.MEDIA, url=None, published_at=None, content="内容"):
+    return NewsItem(title=title, content=content, source=source, url=url, published_at=published_at)
+
+
+class TestSelectChangedItems(unittest.TestCase):
+    """测试调用 LLM 前的指纹预比对"""
+
+    def test_identical_items_are_skipped(self):
+        """测试与旧快照相同的条目被剔除"""
+        old = ReportSnapshot(keyword="k", collected_at="t", items=[_item("a"), _item("b")])
+        new_items = [_item("a"), _item("b"), _item("c")]
+
+        changed = select_changed_items(old, new_items)
+
+        self.assertEqual([i.title for i in changed], ["c"])
+
+    def test_no_old_snapshot_keeps_everything(self):
+        """测试无旧快照时保留全部条目"""
+        new_items = [_item("a")]
+        self.assertEqual(select_changed_items(None, new_items), new_items)
+
+
+class RecordingLLM:
+    """替代 _invoke_llm：记录每次对比请求的 user prompt，按 reply(prompt) 返回响应"""
+
+    def __init__(self, reply=lambda prompt: "[]"):
+        self.reply = reply
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def __call__(self, messages, validate=None):
+        prompt = messages[-1][1]
+        with self.lock:
+            self.prompts.append(prompt)
+        return self.reply(prompt)
+
+    def patch(self):
+        """替换 LLM 调用与客户端创建；get_llm 被调用即说明未跳过 LLM"""
+        return _patches(
+            ("incremental_analysis._invoke_llm", self),
+            ("incremental_analysis.get_llm", unittest.mock.Mock(return_value=object())),
+        )
+
+
+def _patches(*targets):
+    stack = contextlib.ExitStack()
+    for target, value in targets:
+        stack.enter_context(patch(target, value))
+    return stack
+
+
+class TestPreDiff(unittest.TestCase):
+    """测试预比对跳过 LLM：全部未变化时不调用模型，否则只发送新增/变化的资讯"""
+
+    def setUp(self):
+        self.old = ReportSnapshot(keyword="k", collected_at="t", items=[_item("a", url="u1"), _item("b")])
+
+    def test_fingerprint_covers_title_content_source_and_url(self):
+        """测试指纹随标题、正文、来源、URL 任一字段变化"""
+        base = _item("a", url="u1")
+        self.assertEqual(item_fingerprint(base), item_fingerprint(_item("a", url="u1")))
+        for changed in (
+            _item("a2", url="u1"),
+            _item("a", url="u1", content="新内容"),
+            _item("a", source=SourceType.OFFICIAL, url="u1"),
+            _item("a", url="u2"),
+        ):
+            self.assertNotEqual(item_fingerprint(changed), item_fingerprint(base))
+
+    def test_unchanged_items_skip_the_llm(self):
+        """测试与旧快照完全相同时不创建客户端、不调用 LLM"""
+        llm = RecordingLLM()
+        with llm.patch():
+            import incremental_analysis
+            changes = incremental_compare(self.old, [_item("b"), _item("a", url="u1")])
+            self.assertEqual(changes, [])
+            self.assertEqual(llm.prompts, [])
+            incremental_analysis.get_llm.assert_not_called()
+
+    def test_only_changed_items_are_sent(self):
+        """测试只有新增/变化的资讯进入 prompt，相同条目计为已处理"""
+        llm = RecordingLLM()
+        new_items = [_item("a", url="u1"), _item("b", content="更新后的内容"), _item("c")]
+        with llm.patch():
+            result = compare_items(self.old, new_items)
+
+        self.assertEqual(len(llm.prompts), 1)
+        new_text = llm.prompts[0].split("【新采集的行业资讯】")[1]
+        self.assertNotIn("a: 内容", new_text)
+        self.assertIn("b: 更新后的内容", new_text)
+        self.assertIn("c: 内容", new_text)
+        self.assertEqual({id(i) for i in result.analyzed}, {id(i) for i in new_items})
+
+
+class TestChunking(unittest.TestCase):
+    """测试按 token 预算分块与结果合并"""
+
+    def test_split_respects_budget(self):
+        """测试每个批次不超过预算，且顺序与条目不丢失"""
+        items = [_item(f"标题{i}", content="内容" * 20) for i in range(10)]
+        chunks = split_into_chunks(items, token_budget=120)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual([i for c in chunks for i in c], items)
+
+    def test_split_disabled(self):
+        """测试预算 <= 0 时不分块"""
+        items = [_item("a"), _item("b")]
+        self.assertEqual(split_into_chunks(items, token_budget=0), [items])
+
+    def test_merge_keeps_cross_source_conflicts(self):
+        """测试同指标同来源去重，不同来源保留供仲裁"""
+        changes = [
+            ChangeItem("产能", "1", "2", "increased", SourceType.MEDIA, confidence=0.5),
+            ChangeItem("产能", "1", "3", "increased", SourceType.MEDIA, confidence=0.8),
+            ChangeItem("产能", "1", "4", "increased", SourceType.OFFICIAL, confidence=0.6),
+        ]
+        merged = merge_changes(changes)
+
+        self.assertEqual(len(merged), 2)
+        media = [c for c in merged if c.source == SourceType.MEDIA][0]
+        self.assertEqual(media.new, "3")
+
+
+class TestChunkedCompare(unittest.TestCase):
+    """测试分块对比：每个批次单独调用 LLM 并行执行，失败批次互不影响，结果按 (指标, 来源) 合并"""
+
+    def setUp(self):
+        self.items = [_item("a"), _item("b"), _item("c")]
+        # 预算小于单条资讯：每条资讯独占一个批次
+        patcher = patch("incremental_analysis.LLM_CHUNK_TOKEN_BUDGET", 1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _reply(prompt):
+        new_text = prompt.split("【新采集的行业资讯】")[1]
+        if "] b:" in new_text:
+            raise RuntimeError("chunk failed")
+        confidence = 0.9 if "] c:" in new_text else 0.3
+        value = "c" if confidence == 0.9 else "a"
+        return json.dumps([{"field": "产能", "new": value, "confidence": confidence, "evidence": [0]}])
+
+    def _assert_result(self, llm, result):
+        self.assertEqual(len(llm.prompts), 3)
+        for prompt in llm.prompts:
+            self.assertEqual(prompt.split("【新采集的行业资讯】")[1].count("[#"), 1)
+        # 同一指标同一来源只保留置信度最高的一条
+        self.assertEqual([(c.field_name, c.new) for c in result.changes], [("产能", "c")])
+        # 失败批次的资讯不计为已处理
+        self.assertEqual([i.title for i in result.analyzed], ["a", "c"])
+
+    def test_chunks_are_compared_separately(self):
+        """测试同步版本逐批调用 LLM 并合并结果"""
+        llm = RecordingLLM(self._reply)
+        with llm.patch():
+            result = compare_items(None, self.items)
+        self._assert_result(llm, result)
+
+    def test_chunks_run_in_parallel(self):
+        """测试各批次在线程池中同时执行"""
+        # 三个批次必须同时到达屏障才能继续，串行执行会超时
+        barrier = threading.Barrier(3, timeout=5)
+
+        def _reply(prompt):
+            barrier.wait()
+            return "[]"
+
+        llm = RecordingLLM(_reply)
+        with llm.patch(), patch("incremental_analysis.LLM_CHUNK_MAX_WORKERS", 3):
+            result = compare_items(None, self.items)
+        self.assertEqual(len(result.analyzed), 3)
+
+    def test_async_chunks_are_compared_separately(self):
+        """测试异步版本同样逐批调用 LLM 并合并结果"""
+        llm = RecordingLLM(self._reply)
+
+        async def _ainvoke(messages, validate=None):
+            return llm(messages, validate)
+
+        with llm.patch(), patch("incremental_analysis._ainvoke_llm", _ainvoke):
+            result = asyncio.run(compare_items_async(None, self.items))
+        self._assert_result(llm, result)
+
+
+class TestEvidenceAttribution(unittest.TestCase):
+    """测试按 evidence 归属来源与置信度"""
+
+    def setUp(self):
+        self.items = [
+            _item("传闻", source=SourceType.RUMOR),
+            _item("公告", source=SourceType.OFFICIAL, url="https://example.com", published_at="2026-01-20"),
+            _item("报道", source=SourceType.MEDIA, url="https://example.com/2"),
+        ]
+
+    def test_source_from_supporting_items(self):
+        """测试来源取支撑资讯中权重最高者"""
+        content = json.dumps([
+            {"field": "增速", "new": "2%", "evidence": [0, "#1"]},
+            {"field": "价格", "new": "100", "evidence": [0]},
+            {"field": "库存", "new": "低", "evidence": [99]},
+        ])
+        changes = _parse_changes(content, self.items)
+
+        self.assertEqual(changes[0].source, SourceType.OFFICIAL)
+        self.assertEqual(changes[1].source, SourceType.RUMOR)
+        # 无有效 evidence 时回退为第一条资讯的来源
+        self.assertEqual(changes[2].source, SourceType.RUMOR)
+        self.assertGreater(changes[0].confidence, changes[1].confidence)
+
+    def test_parse_evidence_normalizes_indices(self):
+        """测试 evidence 兼容整数、"#1"、"1" 与单个值，丢弃越界、重复与无法解析的编号"""
+        cases = [
+            ([0, "#1", "2"], [0, 1, 2]),
+            ("#2", [2]),
+            (1, [1]),
+            ([1, 1, "#1"], [1]),
+            ([-1, 3, 99, "x", None, 2], [2]),
+            (None, []),
+        ]
+        for raw, expected in cases:
+            with self.subTest(raw=raw):
+                self.assertEqual(_parse_evidence({"evidence": raw}, len(self.items)), expected)
+        self.assertEqual(_parse_evidence({}, len(self.items)), [])
+
+    def test_compare_attributes_each_change_to_its_evidence(self):
+        """测试 prompt 为资讯编号，各变动按自己的 evidence 归属来源，仲裁据此选择权重更高的来源"""
+        self.assertIn("evidence", SYSTEM_PROMPT)
+        reply = json.dumps([
+            {"field": "增速", "new": "5%", "evidence": [0]},
+            {"field": "增速", "new": "2%", "evidence": [1]},
+        ])
+        llm = RecordingLLM(lambda prompt: reply)
+        with llm.patch():
+            changes = compare_items(None, self.items).changes
+
+        new_text = llm.prompts[0].split("【新采集的行业资讯】")[1]
+        self.assertIn("[#0][rumor] 传闻", new_text)
+        self.assertIn("[#1][official] 公告", new_text)
+        self.assertEqual(
+            sorted((c.new, c.source) for c in changes),
+            [("2%", SourceType.OFFICIAL), ("5%", SourceType.RUMOR)],
+        )
+        decision = resolve_conflicts(changes)[0]
+        self.assertEqual((decision.final_value, decision.chosen_source), ("2%", SourceType.OFFICIAL))
+
+    def test_evidence_indices_are_local_to_each_chunk(self):
+        """测试分块对比时 evidence 编号按批次内的编号解析"""
+        llm = RecordingLLM(lambda prompt: json.dumps([{"field": "增速", "new": "x", "evidence": [0]}]))
+        with llm.patch(), patch("incremental_analysis.LLM_CHUNK_TOKEN_BUDGET", 1):
+            changes = compare_items(None, self.items).changes
+
+        self.assertEqual(len(llm.prompts), 3)
+        self.assertEqual(
+            {c.source for c in changes}, {SourceType.RUMOR, SourceType.OFFICIAL, SourceType.MEDIA}
+        )
+
+    def test_profile_matches_direct_computation(self):
+        """测试证据画像的丰富度得分与逐条统计一致"""
+        profile = EvidenceProfile(self.items)
+
+        count_score, div_score, evidence_score = profile.richness()
+        self.assertEqual(count_score, 1.0)
+        self.assertEqual(div_score, 1.0)
+        self.assertAlmostEqual(evidence_score, 3 / 6)
+
+        count_score, div_score, evidence_score = profile.richness([1])
+        self.assertAlmostEqual(count_score, 1 / 3)
+        self.assertAlmostEqual(div_score, 1 / 3)
+        self.assertEqual(evidence_score, 1.0)
+        self.assertIs(profile.richness([1]), profile.richness([1]))
+
+
+
+class FakeChatModel:
+    """按顺序返回预设响应的 LLM 替身"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return SimpleNamespace(content=self.responses.pop(0))
+
+    async def ainvoke(self, messages):
+        return self.invoke(messages)
+
+
+class TestLLMResponseCaching(unittest.TestCase):
+    """测试只有解析为预期 JSON 的 LLM 响应才会写入缓存"""
+
+    VALID = json.dumps([{"field": "产能", "old": "1", "new": "2", "status": "increased"}])
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = LLMCache(db_path=os.path.join(self.tmp_dir, "llm_cache.db"))
+        patcher = patch("incremental_analysis.get_llm_cache", return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.items = [_item("a")]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _compare_twice(self, responses, compare):
+        llm = FakeChatModel(responses)
+        with patch("incremental_analysis.get_llm", return_value=llm), \
+                patch("incremental_analysis.get_async_llm", return_value=llm):
+            first = compare("旧", self.items)
+            second = compare("旧", self.items)
+        return llm, first, second
+
+    def test_malformed_response_is_not_cached(self):
+        """测试无法解析的响应不缓存，下一次调用重新请求 LLM 并缓存有效结果"""
+        llm, first, second = self._compare_twice(["抱歉，我无法给出 JSON", self.VALID], _compare_chunk)
+        self.assertIsNone(first)
+        self.assertEqual(len(second), 1)
+        self.assertEqual(llm.calls, 2)
+
+        llm, _, third = self._compare_twice([], _compare_chunk)
+        self.assertEqual(llm.calls, 0)
+        self.assertEqual(len(third), 1)
+
+    def test_non_list_json_is_not_cached(self):
+        """测试解析为 JSON 但不是对象数组的响应同样不缓存"""
+        llm, _, _ = self._compare_twice(['{"field": "产能"}', "[1, 2]"], _compare_chunk)
+        self.assertEqual(llm.calls, 2)
+
+    def test_empty_change_list_is_cached(self):
+        """测试空数组（无变动）是有效响应，会被缓存"""
+        llm, first, second = self._compare_twice(["[]"], _compare_chunk)
+        self.assertEqual((first, second), ([], []))
+        self.assertEqual(llm.calls, 1)
+
+    def test_async_malformed_response_is_not_cached(self):
+        """测试异步版本同样不缓存无法解析的响应"""
+        compare = lambda old_text, items: asyncio.run(_compare_chunk_async(old_text, items))
+        llm, first, second = self._compare_twice(["```json\n[{\"field\": ", self.VALID], compare)
+        self.assertIsNone(first)
+        self.assertEqual(len(second), 1)
+        self.assertEqual(llm.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
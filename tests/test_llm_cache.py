@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# Add codes directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'codes'))
+
+from llm_cache import LLMCache
+
+
+class TestLLMCache(unittest.TestCase):
+    """测试 LLM 响应缓存"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "llm_cache.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_key_depends_on_model_prompt_and_temperature(self):
+        """测试缓存键随模型、prompt、温度变化"""
+        messages = [("system", "sys"), ("user", "hello")]
+        key = LLMCache.make_key("m1", messages, 0.1)
+
+        self.assertEqual(key, LLMCache.make_key("m1", list(messages), 0.1))
+        self.assertNotEqual(key, LLMCache.make_key("m2", messages, 0.1))
+        self.assertNotEqual(key, LLMCache.make_key("m1", messages, 0.2))
+        self.assertNotEqual(key, LLMCache.make_key("m1", [("system", "sys"), ("user", "hi")], 0.1))
+
+    def test_hit_and_miss_counters(self):
+        """测试命中/未命中计数"""
+        cache = LLMCache(db_path=self.db_path)
+        self.assertIsNone(cache.get("k"))
+        cache.set("k", "[]")
+        self.assertEqual(cache.get("k"), "[]")
+
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["size"], 1)
+
+    def test_persisted_across_instances(self):
+        """测试缓存持久化在 SQLite 中"""
+        LLMCache(db_path=self.db_path).set("k", "value")
+        self.assertEqual(LLMCache(db_path=self.db_path).get("k"), "value")
+
+    def test_ttl_expiry(self):
+        """测试过期条目不会被返回"""
+        cache = LLMCache(db_path=self.db_path, ttl_seconds=60)
+        cache.set("k", "value")
+
+        with patch("llm_cache.time.time", return_value=time.time() + 120):
+            self.assertIsNone(cache.get("k"))
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_size_eviction_keeps_recently_used(self):
+        """测试超出容量时淘汰最久未访问的条目"""
+        cache = LLMCache(db_path=self.db_path, max_entries=2)
+        base = time.time()
+        with patch("llm_cache.time.time", return_value=base):
+            cache.set("a", "1")
+        with patch("llm_cache.time.time", return_value=base + 1):
+            cache.set("b", "2")
+        with patch("llm_cache.time.time", return_value=base + 2):
+            cache.get("a")
+        with patch("llm_cache.time.time", return_value=base + 3):
+            cache.set("c", "3")
+
+        self.assertEqual(cache.get("a"), "1")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "3")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import dataclasses
+import os
+import sys
+import unittest
+
+# Add codes directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'codes'))
+
+from models import ChangeItem, ConflictDecision, NewsItem, SourceType
+
+
+@unittest.skipIf(sys.version_info < (3, 10), "dataclass(slots=True) 需要 Python 3.10+")
+class TestSlottedModels(unittest.TestCase):
+    """测试模型使用 __slots__ 且公开字段不变"""
+
+    def test_instances_have_no_dict(self):
+        """测试实例没有 __dict__，不能添加未声明的属性"""
+        item = NewsItem(title="t", content="c", source=SourceType.MEDIA)
+        self.assertFalse(hasattr(item, "__dict__"))
+        with self.assertRaises(AttributeError):
+            item.extra = 1
+
+    def test_public_fields_unchanged(self):
+        """测试字段与默认值保持不变"""
+        self.assertEqual(
+            [f.name for f in dataclasses.fields(ChangeItem)],
+            ["field_name", "old", "new", "status", "source", "insight", "confidence"],
+        )
+        a = ConflictDecision(field_name="f", final_value="v", chosen_source=SourceType.OFFICIAL)
+        b = ConflictDecision(field_name="f", final_value="v", chosen_source=SourceType.OFFICIAL)
+        a.pending_sources.append(SourceType.RUMOR)
+        self.assertEqual(b.pending_sources, [])
+        self.assertEqual(a.reason, "")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add codes directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'codes'))
+
+import incremental_analysis
+from database_layer import DatabaseClient
+from incremental_analysis import _format_new_item
+from models import NewsItem, SourceType
+from orchestrator import run_pipeline, run_pipeline_async, run_pipelines
+from prompt_budget import estimate_tokens
+from storage_layer import LocalStorageBackend, StorageClient
+from watermark import WATERMARK_STATE, Watermark
+
+# 在测试替换之前保留真实实现
+REAL_AINVOKE_LLM = incremental_analysis._ainvoke_llm
+
+
+class FakeLLM:
+    """替代 _invoke_llm：对比请求返回一条以第 0 条资讯为证据的变动，总结请求返回固定文本"""
+
+    def __init__(self):
+        self.compare_calls = []
+        self.fail = False
+        self.reply = None
+
+    def __call__(self, messages, validate=None):
+        if messages[0][0] != "system":
+            return "行业整体平稳。"
+        self.compare_calls.append(messages[-1][1])
+        if self.fail:
+            raise RuntimeError("LLM unavailable")
+        if self.reply is not None:
+            return self.reply
+        return json.dumps([{
+            "field": "产能", "old": "1", "new": "2", "status": "increased",
+            "insight": "产能提升", "evidence": [0],
+        }], ensure_ascii=False)
+
+
+class StubScraper:
+    """每次 fetch 返回同一组资讯的新副本（与真实采集一样每次都是新对象）"""
+
+    def __init__(self, titles):
+        self.titles = list(titles)
+
+    def fetch(self, keyword):
+        return [
+            NewsItem(
+                title=t, content=f"{t} 的详细内容", source=SourceType.MEDIA,
+                url=f"https://example.com/{t}", published_at="2026-01-20", feed="media-feed",
+            )
+            for t in self.titles
+        ]
+
+
+class PipelineTestCase(unittest.TestCase):
+    """编排层测试基类：临时存储 + 临时数据库 + 假 LLM"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.storage, self.database = self._make_clients("sync")
+        self.llm = FakeLLM()
+
+        async def _ainvoke(messages, validate=None):
+            return self.llm(messages)
+
+        for target, value in (
+            ("incremental_analysis.get_llm", lambda: object()),
+            ("incremental_analysis._invoke_llm", self.llm),
+            ("incremental_analysis._ainvoke_llm", _ainvoke),
+            ("incremental_analysis.get_llm_cache", lambda: None),
+        ):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _make_clients(self, name):
+        root = os.path.join(self.tmp_dir, name)
+        storage = StorageClient(LocalStorageBackend(base_dir=root))
+        database = DatabaseClient(db_path=os.path.join(root, "radar.db"))
+        self.addCleanup(database.close)
+        return storage, database
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _run(self, titles):
+        return run_pipeline("半导体", scraper=StubScraper(titles), storage=self.storage, database=self.database)
+
+    def _watermark(self):
+        return Watermark(self.storage.load_state("半导体", WATERMARK_STATE))
+
+
+class TestPipelineWatermark(PipelineTestCase):
+    """测试 过滤 -> 对比 -> 保存快照 -> 推进水位 的顺序"""
+
+    def test_second_run_only_processes_new_items(self):
+        """测试第二次运行只对比新增资讯，已处理的资讯不再送入 LLM"""
+        first = self._run(["a", "b"])
+        self.assertEqual(first["new_items_count"], 2)
+        self.assertEqual(len(self.llm.compare_calls), 1)
+
+        second = self._run(["a", "b", "c"])
+        self.assertEqual(second["new_items_count"], 1)
+        self.assertNotIn("b 的详细内容", self.llm.compare_calls[-1].split("【新采集的行业资讯】")[1])
+        self.assertEqual(
+            [i.title for i in self.storage.load_latest_snapshot("半导体").items], ["c", "a", "b"]
+        )
+
+        third = self._run(["a", "b", "c"])
+        self.assertEqual(third["new_items_count"], 0)
+        self.assertEqual(len(self.llm.compare_calls), 2)
+        self.assertEqual(len(self.storage.list_snapshots("半导体")), 2)
+
+    def test_llm_failure_does_not_advance_watermark(self):
+        """测试 LLM 失败时不保存快照也不推进水位，恢复后重新对比同一批资讯"""
+        self.llm.fail = True
+        result = self._run(["a"])
+        self.assertEqual(result["decisions"], [])
+        self.assertIsNone(self.storage.load_state("半导体", WATERMARK_STATE))
+        self.assertIsNone(self.storage.load_latest_snapshot("半导体"))
+
+        self.llm.fail = False
+        retry = self._run(["a"])
+        self.assertEqual(retry["new_items_count"], 1)
+        self.assertEqual(len(retry["decisions"]), 1)
+        self.assertEqual(len(self.llm.compare_calls), 2)
+        self.assertFalse(self._watermark().is_new(StubScraper(["a"]).fetch("半导体")[0]))
+
+    def test_malformed_reply_does_not_advance_watermark(self):
+        """测试 LLM 返回无法解析的响应时视为对比失败，不保存快照也不推进水位"""
+        for reply in ("抱歉，我无法给出 JSON", '{"field": "产能"}', '[{"field": "产能"'):
+            with self.subTest(reply=reply):
+                self.llm.reply = reply
+                result = self._run(["a"])
+                self.assertEqual(result["decisions"], [])
+                self.assertIsNone(self.storage.load_state("半导体", WATERMARK_STATE))
+                self.assertIsNone(self.storage.load_latest_snapshot("半导体"))
+
+        self.llm.reply = None
+        retry = self._run(["a"])
+        self.assertEqual(retry["new_items_count"], 1)
+        self.assertEqual(len(retry["decisions"]), 1)
+        self.assertFalse(self._watermark().is_new(StubScraper(["a"]).fetch("半导体")[0]))
+
+    def test_items_dropped_by_prompt_budget_are_retried(self):
+        """测试超出 prompt 预算被丢弃的资讯不记入水位与快照，下次运行重新对比"""
+        items = StubScraper(["a", "b"]).fetch("半导体")
+        # 预算只够放下一条资讯
+        budget = estimate_tokens(_format_new_item(items[0], len(items))) + 1
+        with patch("incremental_analysis.LLM_PROMPT_NEW_TOKEN_BUDGET", budget):
+            self._run(["a", "b"])
+        watermark = self._watermark()
+        kept = [i for i in items if not watermark.is_new(i)]
+        self.assertEqual(len(kept), 1)
+        self.assertEqual(len(self.storage.load_latest_snapshot("半导体").items), 1)
+
+        retry = self._run(["a", "b"])
+        self.assertEqual(retry["new_items_count"], 1)
+
+    def test_snapshot_failure_does_not_advance_watermark(self):
+        """测试保存快照失败时整次运行失败，水位保持不变"""
+        with patch.object(self.storage, "save_snapshot", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self._run(["a"])
+        self.assertIsNone(self.storage.load_state("半导体", WATERMARK_STATE))
+
+
+class TestRunPipelineAsync(PipelineTestCase):
+    """测试 run_pipeline_async 与 run_pipeline 的返回结果与持久化状态一致"""
+
+    def setUp(self):
+        super().setUp()
+        self.async_storage, self.async_database = self._make_clients("async")
+
+    def _run_both(self, titles):
+        scraper = StubScraper(titles)
+        sync_result = run_pipeline("半导体", scraper=scraper, storage=self.storage, database=self.database)
+        async_result = asyncio.run(
+            run_pipeline_async("半导体", scraper=scraper, storage=self.async_storage, database=self.async_database)
+        )
+        for result in (sync_result, async_result):
+            result.pop("run_id")
+        self.assertEqual(async_result, sync_result)
+        return async_result
+
+    def _assert_same_state(self):
+        sync_snapshot = self.storage.load_latest_snapshot("半导体")
+        async_snapshot = self.async_storage.load_latest_snapshot("半导体")
+        self.assertEqual(async_snapshot.items, sync_snapshot.items)
+        self.assertEqual(
+            len(self.async_storage.list_snapshots("半导体")), len(self.storage.list_snapshots("半导体"))
+        )
+        self.assertEqual(
+            self.async_storage.load_state("半导体", WATERMARK_STATE),
+            self.storage.load_state("半导体", WATERMARK_STATE),
+        )
+        strip = lambda rows: [{k: v for k, v in row.items() if k != "updated_at"} for row in rows]
+        self.assertEqual(
+            strip(self.async_database.get_latest_states("半导体")),
+            strip(self.database.get_latest_states("半导体")),
+        )
+
+    def test_matches_run_pipeline(self):
+        """测试异步版本在多次运行中与同步版本结果一致（含水位过滤与快照合并）"""
+        first = self._run_both(["a", "b"])
+        self.assertEqual(first["new_items_count"], 2)
+        self.assertEqual(len(first["decisions"]), 1)
+        self._assert_same_state()
+
+        second = self._run_both(["a", "b", "c"])
+        self.assertEqual(second["new_items_count"], 1)
+        self._assert_same_state()
+
+        third = self._run_both(["a", "b", "c"])
+        self.assertEqual(third["new_items_count"], 0)
+        self._assert_same_state()
+        self.assertEqual(len(self.async_storage.list_snapshots("半导体")), 2)
+
+    def test_matches_run_pipeline_without_watermark(self):
+        """测试关闭水位时异步版本同样每次全量对比、保存快照且不写水位"""
+        with patch("orchestrator.WATERMARK_ENABLED", False):
+            self._run_both(["a", "b"])
+            second = self._run_both(["a", "b"])
+        self.assertEqual(second["new_items_count"], 2)
+        self._assert_same_state()
+        self.assertIsNone(self.async_storage.load_state("半导体", WATERMARK_STATE))
+        self.assertEqual(len(self.async_storage.list_snapshots("半导体")), 2)
+
+    def test_llm_failure_does_not_advance_watermark(self):
+        """测试异步版本 LLM 失败时同样不保存快照也不推进水位"""
+        self.llm.fail = True
+        result = asyncio.run(run_pipeline_async(
+            "半导体", scraper=StubScraper(["a"]), storage=self.async_storage, database=self.async_database
+        ))
+        self.assertEqual(result["decisions"], [])
+        self.assertIsNone(self.async_storage.load_state("半导体", WATERMARK_STATE))
+        self.assertIsNone(self.async_storage.load_latest_snapshot("半导体"))
+
+
+class LoopBoundChatModel:
+    """模拟 httpx.AsyncClient：连接绑定创建它的事件循环，在其他事件循环中使用即失败"""
+
+    def __init__(self, reply):
+        self.loop = asyncio.get_running_loop()
+        self.reply = reply
+
+    async def ainvoke(self, messages):
+        if asyncio.get_running_loop() is not self.loop:
+            raise RuntimeError("Event loop is closed")
+        return SimpleNamespace(content=self.reply(messages))
+
+
+class TestAsyncLLMClientPerLoop(PipelineTestCase):
+    """测试异步 LLM 客户端按事件循环创建，多次 asyncio.run 之间不复用已关闭循环的连接"""
+
+    def test_run_pipeline_async_twice_in_one_process(self):
+        created = []
+
+        def _create_llm(async_http=False):
+            created.append(LoopBoundChatModel(self.llm))
+            return created[-1]
+
+        # 使用真实的 _ainvoke_llm / get_async_llm，只替换底层客户端的创建
+        with patch("incremental_analysis._ainvoke_llm", REAL_AINVOKE_LLM), \
+                patch("incremental_analysis._create_llm", _create_llm):
+            for titles in (["a"], ["a", "b"]):
+                result = asyncio.run(run_pipeline_async(
+                    "半导体", scraper=StubScraper(titles), storage=self.storage, database=self.database
+                ))
+                self.assertEqual(len(result["decisions"]), 1)
+                self.assertEqual(result["global_summary"], "行业整体平稳。")
+
+        self.assertEqual(len(self.llm.compare_calls), 2)
+        self.assertEqual(len(created), 2)
+        self.assertIsNot(created[0].loop, created[1].loop)
+
+
+class TestRunPipelines(unittest.TestCase):
+    """测试批量编排：共享客户端、并发扇出与单个 keyword 的失败隔离"""
+
+    def setUp(self):
+        self.calls = []
+        self.lock = threading.Lock()
+        for name in ("StorageClient", "ScraperAgent", "DatabaseClient"):
+            patcher = patch(f"orchestrator.{name}")
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _fake_pipeline(self, barrier=None, fail=()):
+        def _run(keyword, scraper=None, storage=None, database=None):
+            with self.lock:
+                self.calls.append((keyword, scraper, storage, database, threading.current_thread().name))
+            if barrier is not None:
+                barrier.wait()
+            if keyword in fail:
+                raise RuntimeError(f"{keyword} failed")
+            return {"keyword": keyword, "run_id": "r", "decisions": []}
+        return _run
+
+    def test_failure_is_isolated_per_keyword(self):
+        """测试单个 keyword 失败只影响自己的结果项，结果顺序与去重后的输入一致"""
+        with patch("orchestrator.run_pipeline", self._fake_pipeline(fail={"光伏"})):
+            batch = run_pipelines(["半导体", "光伏", "半导体", "", "锂电"], max_workers=2)
+        self.assertEqual([r["keyword"] for r in batch["results"]], ["半导体", "光伏", "锂电"])
+        self.assertEqual([r["status"] for r in batch["results"]], ["success", "error", "success"])
+        self.assertEqual(batch["results"][1]["error_type"], "RuntimeError")
+        self.assertEqual((batch["succeeded"], batch["failed"]), (2, 1))
+
+    def test_keywords_share_clients_and_run_concurrently(self):
+        """测试所有 keyword 共用同一组客户端，并在不同线程中同时执行"""
+        # 三个 keyword 必须同时到达屏障才能继续，串行执行会超时并记为失败
+        barrier = threading.Barrier(3, timeout=5)
+        with patch("orchestrator.run_pipeline", self._fake_pipeline(barrier=barrier)):
+            batch = run_pipelines(["a", "b", "c"], max_workers=3)
+        self.assertEqual(batch["succeeded"], 3)
+        self.assertEqual(len({call[1:4] for call in self.calls}), 1)
+        self.assertEqual(len({call[4] for call in self.calls}), 3)
+
+    def test_empty_keywords(self):
+        """测试没有有效 keyword 时不创建客户端"""
+        import orchestrator
+        self.assertEqual(run_pipelines(["", ""]), {"results": [], "succeeded": 0, "failed": 0})
+        orchestrator.StorageClient.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
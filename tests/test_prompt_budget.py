@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import os
+import sys
+import unittest
+
+# Add codes directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'codes'))
+
+from incremental_analysis import build_old_text
+from models import NewsItem, ReportSnapshot, SourceType
+from prompt_budget import estimate_tokens, pack_items, score_items, truncate_item
+
+
+def _format(item):
+    return f"[{item.source.value}] {item.title}: {item.content}"
+
+
+def _item(title, source=SourceType.MEDIA, content="内容" * 20, published_at=None):
+    return NewsItem(title=title, content=content, source=source, published_at=published_at)
+
+
+class TestScoreItems(unittest.TestCase):
+    """测试资讯排序得分"""
+
+    def test_source_weight_recency_and_novelty(self):
+        """测试官方来源、较新与相对旧快照更新颖的资讯得分更高"""
+        official, rumor = score_items([_item("a", SourceType.OFFICIAL), _item("b", SourceType.RUMOR)])
+        self.assertGreater(official, rumor)
+
+        recent, stale = score_items([
+            _item("a", published_at="2026-01-20T00:00:00"),
+            _item("b", published_at="2026-01-10T00:00:00"),
+        ])
+        self.assertGreater(recent, stale)
+
+        known = _item("产能", content="某公司第三季度产能提升至每月十万片，良率稳定在九成以上。")
+        fresh = _item("价格", content="存储芯片现货价格连续三周下跌，渠道库存明显回升。")
+        repeated, novel = score_items([known, fresh], reference=[known])
+        self.assertGreater(novel, repeated)
+
+
+class TestPackItems(unittest.TestCase):
+    """测试按 token 预算打包资讯"""
+
+    def test_within_budget_keeps_everything(self):
+        """测试未超预算时全部保留且不丢弃"""
+        items = [_item("a"), _item("b")]
+        kept, report = pack_items(items, budget=10_000, format_item=_format)
+        self.assertEqual(kept, items)
+        self.assertEqual(report.dropped, [])
+
+    def test_over_budget_drops_lowest_scores_and_keeps_order(self):
+        """测试超预算时丢弃低分资讯，保留的资讯维持原有顺序且总量不超预算"""
+        items = [
+            _item("传闻", SourceType.RUMOR),
+            _item("公告", SourceType.OFFICIAL),
+            _item("报道", SourceType.MEDIA),
+        ]
+        budget = sum(estimate_tokens(_format(i)) + 1 for i in items[1:])
+        kept, report = pack_items(items, budget=budget, format_item=_format)
+
+        self.assertEqual([i.title for i in kept], ["公告", "报道"])
+        self.assertEqual(report.dropped, ["传闻"])
+        self.assertLessEqual(report.used_tokens, budget)
+
+    def test_long_items_are_truncated(self):
+        """测试超过单条上限的资讯截断正文"""
+        item = _item("长文", content="很长的正文" * 500)
+        truncated = truncate_item(item, 100, _format)
+        self.assertLessEqual(estimate_tokens(_format(truncated)), 100)
+        self.assertTrue(truncated.content.endswith("（截断）"))
+        self.assertEqual(item.content, "很长的正文" * 500)
+
+        kept, report = pack_items([item], budget=0, format_item=_format, max_item_tokens=100)
+        self.assertEqual(report.truncated, ["长文"])
+        self.assertEqual(kept[0].title, "长文")
+
+
+class TestBuildOldText(unittest.TestCase):
+    """测试旧快照文本拼装"""
+
+    def test_empty_snapshot_placeholder(self):
+        """测试无旧快照时使用占位文本"""
+        self.assertEqual(build_old_text(None), "尚未记录历史指标。")
+
+    def test_old_text_lists_items(self):
+        """测试旧快照条目逐行列出"""
+        snapshot = ReportSnapshot(keyword="k", collected_at="t", items=[_item("a", content="1"), _item("b", content="2")])
+        self.assertEqual(build_old_text(snapshot), "- a: 1\n- b: 2")
+
+
+if __name__ == '__main__':
+    unittest.main()
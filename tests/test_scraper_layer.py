@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# Add codes directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'codes'))
+
+from models import SourceType
+from scraper_layer import (
+    JsonFeedAdapter,
+    PlaceholderAdapter,
+    PooledHttpClient,
+    ScraperAgent,
+    adapters_from_config,
+    get_shared_client,
+    get_shared_executor,
+)
+from storage_layer import LocalStorageBackend, StorageClient
+
+
+class StubServer:
+    """本地桩 HTTP 服务：按路径返回预设的 (状态码, JSON, 延迟秒数)，并统计 TCP 连接数"""
+
+    def __init__(self, routes, etags=None):
+        self.routes = routes
+        self.etags = etags or {}
+        self.connections = 0
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                stub.connections += 1
+
+            def do_GET(self):
+                path = urlsplit(self.path).path
+                stub.requests.append((self.path, dict(self.headers)))
+                status, payload, delay = stub.routes.get(path, (404, {}, 0))
+                time.sleep(delay)
+                etag = stub.etags.get(path)
+                if etag is not None and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                if etag is not None:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _feed(title):
+    return {"items": [{"title": title, "summary": f"{title} 内容", "link": f"https://example.com/{title}"}]}
+
+
+class TestScraperAgent(unittest.TestCase):
+    """测试多数据源并发抓取"""
+
+    def setUp(self):
+        self.server = StubServer({
+            "/official": (200, _feed("公告"), 0.3),
+            "/media": (200, [{"title": "报道", "content": "c", "published_at": "2026-01-01"}], 0.3),
+            "/broken": (500, {}, 0),
+            "/slow": (200, _feed("迟到"), 2.0),
+            "/steady": (200, _feed("稳定"), 0.6),
+        })
+        self.client = PooledHttpClient()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def _adapter(self, path, source=SourceType.MEDIA, timeout=1.0):
+        return JsonFeedAdapter(path.strip("/"), self.server.base_url + path + "?q={keyword}", source, timeout)
+
+    def test_sources_are_fetched_concurrently(self):
+        """测试总耗时约等于最慢的数据源，而不是各数据源之和"""
+        agent = ScraperAgent([
+            self._adapter("/official", SourceType.OFFICIAL),
+            self._adapter("/media"),
+        ], client=self.client)
+
+        start = time.monotonic()
+        items = agent.fetch("半导体")
+        elapsed = time.monotonic() - start
+        agent.close()
+
+        self.assertLess(elapsed, 0.55)
+        self.assertEqual([(i.title, i.source) for i in items], [("公告", SourceType.OFFICIAL), ("报道", SourceType.MEDIA)])
+        self.assertEqual(items[0].url, "https://example.com/公告")
+        self.assertIn("q=%E5%8D%8A%E5%AF%BC%E4%BD%93", self.server.requests[0][0])
+
+    def test_partial_failures_are_tolerated(self):
+        """测试单个数据源报错或超时不影响其余数据源"""
+        agent = ScraperAgent([
+            self._adapter("/official", SourceType.OFFICIAL),
+            self._adapter("/broken"),
+            self._adapter("/slow", timeout=0.5),
+        ], client=self.client)
+
+        start = time.monotonic()
+        items = agent.fetch("半导体")
+        elapsed = time.monotonic() - start
+        agent.close()
+
+        self.assertEqual([i.title for i in items], ["公告"])
+        self.assertEqual(items[0].feed, "official")
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(set(agent.last_report.errors), {"broken", "slow"})
+        self.assertIn("timeout", agent.last_report.errors["slow"])
+        self.assertEqual(agent.last_report.item_counts, {"official": 1})
+
+    def test_all_sources_failing_raises(self):
+        """测试全部数据源失败时抛出异常，由编排层触发告警"""
+        agent = ScraperAgent([self._adapter("/broken")], client=self.client)
+        with self.assertRaises(RuntimeError):
+            agent.fetch("半导体")
+        agent.close()
+
+    def test_connections_are_pooled(self):
+        """测试多次请求复用同一条 keep-alive 连接"""
+        agent = ScraperAgent([self._adapter("/broken")], client=self.client, max_workers=1)
+        adapter = self._adapter("/official")
+        for _ in range(3):
+            adapter.fetch("半导体", self.client)
+        agent.close()
+        self.assertEqual(self.server.connections, 1)
+
+    def test_agents_share_default_pools(self):
+        """测试未注入客户端时各采集器共用进程级连接池与线程池，close() 不会关闭共享线程池"""
+        first = ScraperAgent([self._adapter("/official")])
+        second = ScraperAgent([self._adapter("/media")])
+        self.assertIs(first.client, get_shared_client())
+        self.assertIs(first.client, second.client)
+        self.assertIs(first._executor, get_shared_executor())
+        self.assertIs(first._executor, second._executor)
+
+        first.close()
+        self.assertEqual([i.title for i in second.fetch("半导体")], ["报道"])
+
+    def test_injected_pools_are_owned_by_caller(self):
+        """测试注入的线程池与连接池被多个采集器共用，且不会被采集器关闭"""
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+        agents = [
+            ScraperAgent([self._adapter(path)], client=self.client, executor=executor)
+            for path in ("/official", "/media")
+        ]
+        for agent in agents:
+            agent.fetch("半导体")
+            agent.close()
+
+        self.assertEqual(executor.submit(lambda: 1).result(), 1)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_queue_time_on_shared_executor_does_not_count_towards_timeout(self):
+        """测试多个 keyword 共享线程池时，排队等待的时间不计入数据源超时"""
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+        # 2 个线程 × 2 个采集器 × 2 个数据源（各 0.6s）：后提交的数据源需排队约 0.6s，
+        # 若从提交时计时会超过 1.0s 的超时
+        agents = [
+            ScraperAgent([self._adapter("/steady"), self._adapter("/steady")], client=self.client, executor=executor)
+            for _ in range(2)
+        ]
+        results, errors = {}, {}
+
+        def _fetch(index):
+            try:
+                results[index] = agents[index].fetch(f"kw{index}")
+            except Exception as e:
+                errors[index] = e
+
+        threads = [threading.Thread(target=_fetch, args=(i,)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual(errors, {})
+        self.assertEqual([len(results[i]) for i in range(2)], [2, 2])
+        self.assertEqual([agent.last_report.errors for agent in agents], [{}, {}])
+
+    def test_max_workers_creates_private_executor(self):
+        """测试指定 max_workers 时单独创建线程池，并在 close() 时关闭"""
+        agent = ScraperAgent([self._adapter("/media")], client=self.client, max_workers=1)
+        self.assertIsNot(agent._executor, get_shared_executor())
+        agent.close()
+        with self.assertRaises(RuntimeError):
+            agent._executor.submit(lambda: None)
+
+    def test_adapters_from_config(self):
+        """测试按配置创建适配器，未配置时使用占位数据源"""
+        self.assertIsInstance(adapters_from_config([])[0], PlaceholderAdapter)
+        adapters = adapters_from_config([{"name": "cninfo", "url": "http://x/{keyword}", "source": "official"}])
+        self.assertEqual((adapters[0].name, adapters[0].source_type), ("cninfo", SourceType.OFFICIAL))
+
+
+class TestConditionalFetch(unittest.TestCase):
+    """测试条件请求与持久化的抓取缓存"""
+
+    def setUp(self):
+        self.server = StubServer(
+            {"/etag": (200, _feed("公告"), 0), "/plain": (200, _feed("报道"), 0)},
+            etags={"/etag": '"v1"'},
+        )
+        self.tmp_dir = tempfile.mkdtemp()
+        self.storage = StorageClient(LocalStorageBackend(base_dir=self.tmp_dir))
+        self.adapters = [
+            JsonFeedAdapter("etag", self.server.base_url + "/etag", SourceType.OFFICIAL),
+            JsonFeedAdapter("plain", self.server.base_url + "/plain"),
+        ]
+
+    def tearDown(self):
+        self.server.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _fetch(self):
+        # 每次新建 ScraperAgent，验证缓存经由存储层持久化
+        agent = ScraperAgent(self.adapters, storage=self.storage)
+        try:
+            return agent.fetch("半导体"), agent.last_report
+        finally:
+            agent.close()
+
+    def test_unchanged_pages_are_not_parsed_again(self):
+        """测试 304 与内容哈希未变时复用缓存条目，不再解析"""
+        first, report = self._fetch()
+        self.assertEqual(report.cache, {"fetched": 2, "not_modified": 0, "unchanged": 0})
+        self.assertIsNotNone(self.storage.load_state("半导体", "fetch_cache"))
+
+        with unittest.mock.patch.object(JsonFeedAdapter, "parse", side_effect=AssertionError("parsed")):
+            second, report = self._fetch()
+
+        self.assertEqual(report.cache, {"fetched": 0, "not_modified": 1, "unchanged": 1})
+        self.assertEqual(second, first)
+        last_etag_request = [headers for path, headers in self.server.requests if path == "/etag"][-1]
+        self.assertEqual(last_etag_request.get("If-None-Match"), '"v1"')
+
+    def test_changed_content_is_parsed(self):
+        """测试内容变化时重新解析并更新缓存"""
+        self._fetch()
+        self.server.routes["/plain"] = (200, _feed("新报道"), 0)
+
+        items, report = self._fetch()
+
+        self.assertEqual(report.cache["fetched"], 1)
+        self.assertEqual([i.title for i in items], ["公告", "新报道"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import os
+import sys
+import unittest
+
+# Add codes directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'codes'))
+
+from models import NewsItem, ReportSnapshot, SourceType
+from serialization import item_from_dict, items_from_dicts, parse_source, snapshot_from_dict, snapshot_to_dict
+
+
+class TestSerialization(unittest.TestCase):
+    """测试快照序列化层"""
+
+    def test_snapshot_round_trip(self):
+        """测试快照与字典互相转换后保持一致"""
+        snapshot = ReportSnapshot(keyword="半导体", collected_at="20260101_000000", items=[
+            NewsItem(title="a", content="b", source=SourceType.OFFICIAL, url="u", published_at="p"),
+            NewsItem(title="c", content="d", source=SourceType.RUMOR),
+        ])
+        data = snapshot_to_dict(snapshot)
+
+        self.assertEqual(data["items"][0]["source"], "official")
+        self.assertEqual(snapshot_from_dict(data), snapshot)
+
+    def test_source_parsing(self):
+        """测试来源解析：字符串与枚举均可，未知或脏数据回退为 MEDIA"""
+        self.assertIs(parse_source("rumor"), SourceType.RUMOR)
+        self.assertIs(parse_source(SourceType.OFFICIAL), SourceType.OFFICIAL)
+        self.assertIs(parse_source("unknown"), SourceType.MEDIA)
+        self.assertIs(parse_source(None), SourceType.MEDIA)
+        self.assertIs(parse_source(["official"]), SourceType.MEDIA)
+
+    def test_missing_fields_use_defaults(self):
+        """测试缺失字段使用默认值，单条与批量路径结果一致"""
+        data = [{"title": "t", "source": "bogus"}, {"source": ["x"]}]
+        items = items_from_dicts(data)
+
+        self.assertEqual(items, [item_from_dict(d) for d in data])
+        self.assertEqual(items[0], NewsItem(title="t", content="", source=SourceType.MEDIA))
+        self.assertIsNone(items[1].url)
+
+
+if __name__ == '__main__':
+    unittest.main()
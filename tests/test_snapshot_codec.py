@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import io
+import os
+import sys
+import unittest
+
+# Add codes directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'codes'))
+
+from snapshot_codec import codec_for_key, get_codec, split_extension
+
+
+SAMPLE = {
+    "keyword": "半导体",
+    "collected_at": "20260101_000000",
+    "items": [{"title": "芯片", "content": "产能利用率 92%" * 50, "source": "media"}],
+}
+
+
+class TestSnapshotCodec(unittest.TestCase):
+    """测试快照编解码器"""
+
+    def test_json_and_gzip_round_trip(self):
+        """测试 json / json.gz 编码后可还原"""
+        for name in ("json", "json.gz"):
+            codec = get_codec(name)
+            self.assertEqual(codec.decode(codec.encode(SAMPLE)), SAMPLE)
+
+    def test_ndjson_round_trip_and_streaming(self):
+        """测试 NDJSON 编码可还原完整快照与增量快照，并可逐行读取"""
+        delta = {
+            "keyword": "半导体", "collected_at": "20260102_000000", "base": "k", "depth": 1,
+            "item_hashes": ["h1", "h2", "h1"], "new_items": {"h2": SAMPLE["items"][0]},
+        }
+        for name in ("ndjson", "ndjson.gz"):
+            codec = get_codec(name)
+            self.assertEqual(codec.decode(codec.encode(SAMPLE)), SAMPLE)
+            self.assertEqual(codec.decode(codec.encode(delta)), delta)
+
+        records = list(get_codec("ndjson.gz").iter_records(io.BytesIO(get_codec("ndjson.gz").encode(delta))))
+        self.assertEqual(records[0]["base"], "k")
+        self.assertEqual([r["hash"] for r in records[1:]], ["h1", "h2", "h1"])
+        self.assertNotIn("item", records[1])
+
+    def test_gzip_is_smaller_and_deterministic(self):
+        """测试 gzip 编码体积更小且相同内容字节一致"""
+        raw = get_codec("json").encode(SAMPLE)
+        packed = get_codec("json.gz").encode(SAMPLE)
+        self.assertLess(len(packed), len(raw))
+        self.assertEqual(packed, get_codec("json.gz").encode(SAMPLE))
+
+    def test_codec_is_selected_by_extension(self):
+        """测试按扩展名识别格式，.json.gz 不会被误识别为 .json"""
+        self.assertEqual(split_extension("report_20260101_000000.json.gz"), ("report_20260101_000000", ".json.gz"))
+        self.assertEqual(codec_for_key("a/report_1.json").name, "json")
+        self.assertEqual(codec_for_key("a/report_1.json.gz").name, "json.gz")
+        self.assertEqual(codec_for_key("a/report_1.ndjson.gz").name, "ndjson.gz")
+        self.assertIsNone(split_extension("latest.txt"))
+
+    def test_unknown_codec_raises(self):
+        """测试未知格式名报错"""
+        with self.assertRaises(ValueError):
+            get_codec("xml")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,511 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# Add codes directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'codes'))
+
+from models import NewsItem, SourceType
+from snapshot_codec import get_codec
+from storage_layer import LocalStorageBackend, OSSStorageBackend, keyword_partition
+
+
+def _items(title="标题"):
+    return [NewsItem(title=title, content="内容", source=SourceType.MEDIA, url="https://example.com")]
+
+
+def _save_during_rebuild(backend, save):
+    """在 rebuild_manifest 列举快照期间从另一线程保存快照，返回该快照的 key"""
+    scan = backend._scan_snapshot_keys
+    scanning = threading.Event()
+
+    def slow_scan():
+        keys = scan()
+        scanning.set()
+        # 给并发保存留出时间：无锁时其清单追加会落在即将被替换的旧清单上
+        time.sleep(0.2)
+        return keys
+
+    saved = []
+    writer = threading.Thread(target=lambda: scanning.wait(5) and saved.append(save()))
+    writer.start()
+    with patch.object(backend, "_scan_snapshot_keys", slow_scan):
+        backend.rebuild_manifest()
+    writer.join(5)
+    return saved[0]
+
+
+class TestLocalStorageBackend(unittest.TestCase):
+    """测试本地存储后端的按 keyword 分区布局"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.backend = LocalStorageBackend(base_dir=self.tmp_dir, codec=get_codec("json.gz"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _save(self, keyword, ts, title="标题"):
+        with patch("storage_layer.now_ts", return_value=ts):
+            return self.backend.save_snapshot(keyword, _items(title))
+
+    def test_save_during_manifest_rebuild_is_not_lost(self):
+        """测试重建清单期间并发保存的快照仍记录在清单中"""
+        self._save("半导体", "20260101_000000")
+        key = _save_during_rebuild(self.backend, lambda: self._save("光伏", "20260102_000000"))
+        self.assertEqual(self.backend.list_snapshots("光伏"), [os.path.relpath(key, self.tmp_dir)])
+        self.assertEqual(len(self.backend.list_snapshots()), 2)
+
+    def test_history_keyword_partition_is_listed(self):
+        """测试名为 "history" 的 keyword 分区在重建清单后仍可列举，旧版 history/ 副本仍被忽略"""
+        key = self._save("history", "20260101_000000")
+        self._save("半导体", "20260102_000000")
+        os.remove(os.path.join(self.tmp_dir, "manifest.jsonl"))
+
+        self.assertEqual(self.backend.list_snapshots("history"), [os.path.relpath(key, self.tmp_dir)])
+        self.assertEqual(len(self.backend.list_snapshots()), 2)
+
+    def test_legacy_history_copies_are_not_listed(self):
+        """测试旧版本根目录 history/ 下的重复副本不参与重建清单"""
+        self._save("半导体", "20260102_000000")
+        os.makedirs(os.path.join(self.tmp_dir, "history"))
+        with open(os.path.join(self.tmp_dir, "history", "report_20250101_000000.json"), "w") as f:
+            json.dump({"keyword": "半导体", "collected_at": "20250101_000000", "items": []}, f)
+        os.remove(os.path.join(self.tmp_dir, "manifest.jsonl"))
+
+        self.assertEqual(len(self.backend.list_snapshots()), 1)
+        self.assertEqual(self.backend.list_snapshots("history"), [])
+
+    def test_rebuilt_manifest_matches_appended_entries(self):
+        """测试保存时追加的清单行与重建后的清单行字段一致（均记录分区目录名）"""
+        self._save("a/b", "20260101_000000")
+        self._save("半导体", "20260102_000000")
+        manifest = os.path.join(self.tmp_dir, "manifest.jsonl")
+        with open(manifest, encoding="utf-8") as f:
+            appended = [json.loads(line) for line in f]
+
+        self.backend.rebuild_manifest()
+        with open(manifest, encoding="utf-8") as f:
+            rebuilt = [json.loads(line) for line in f]
+
+        self.assertEqual(rebuilt, appended)
+        self.assertEqual(appended[0]["partition"], keyword_partition("a/b"))
+        self.assertEqual(len(self.backend.list_snapshots("a/b")), 1)
+
+    def test_legacy_manifest_entries_are_filtered_by_key(self):
+        """测试旧版清单行（keyword 字段为原始关键词或分区名）仍按 key 所在分区过滤"""
+        key = self._save("a/b", "20260101_000000")
+        rel_key = os.path.relpath(key, self.tmp_dir).replace(os.sep, "/")
+        with open(os.path.join(self.tmp_dir, "manifest.jsonl"), "w", encoding="utf-8") as f:
+            f.write(json.dumps({"key": rel_key, "keyword": "a/b", "collected_at": "20260101_000000"}) + "\n")
+
+        self.assertEqual(self.backend.list_snapshots("a/b"), [rel_key])
+        self.assertEqual(self.backend.list_snapshots("a_b"), [])
+
+    def test_keyword_partition_is_path_safe(self):
+        """测试分区名不包含路径分隔符"""
+        self.assertEqual(keyword_partition("半导体"), "半导体")
+        self.assertNotIn("/", keyword_partition("a/b"))
+        self.assertEqual(keyword_partition(""), "_default")
+
+    def test_similar_keywords_do_not_share_a_partition(self):
+        """测试清洗后同名的 keyword（"a/b"、"a b"、"a_b"）各自独立分区，互不覆盖"""
+        keywords = ["a/b", "a b", "a_b", "a~b", "_default", ""]
+        self.assertEqual(len({keyword_partition(k) for k in keywords}), len(keywords))
+
+        for i, keyword in enumerate(keywords[:3]):
+            self._save(keyword, f"2026010{i + 1}_000000", keyword)
+        for keyword in keywords[:3]:
+            snapshot = self.backend.load_latest_snapshot(keyword)
+            self.assertEqual(snapshot.keyword, keyword)
+            self.assertEqual(snapshot.items[0].title, keyword)
+            self.assertEqual(len(self.backend.list_snapshots(keyword)), 1)
+
+    def test_snapshot_of_another_keyword_is_ignored(self):
+        """测试 latest 指针指向其他 keyword 的快照时视为没有快照（如旧版共用分区）"""
+        self._save("a_b", "20260101_000000", "a_b")
+        os.makedirs(os.path.join(self.tmp_dir, keyword_partition("a/b")))
+        shutil.copy(
+            os.path.join(self.tmp_dir, "a_b", "latest.json"),
+            os.path.join(self.tmp_dir, keyword_partition("a/b"), "latest.json"),
+        )
+        self.assertIsNone(self.backend.load_latest_snapshot("a/b"))
+
+    def test_legacy_lossy_partition_is_still_readable(self):
+        """测试旧版清洗后的分区（如 a/b -> a_b）中属于该 keyword 的快照仍可读取"""
+        with patch("storage_layer.keyword_partition", return_value="a_b"):
+            self._save("a/b", "20260101_000000", "旧")
+        self.assertEqual(self.backend.load_latest_snapshot("a/b").items[0].title, "旧")
+        self.assertIsNone(self.backend.load_latest_snapshot("a b"))
+
+    def test_snapshots_are_partitioned_by_keyword(self):
+        """测试不同 keyword 的快照互不干扰"""
+        self._save("半导体", "20260101_000000", "芯片")
+        self._save("光伏", "20260102_000000", "组件")
+
+        self.assertEqual(self.backend.load_latest_snapshot("半导体").items[0].title, "芯片")
+        self.assertEqual(self.backend.load_latest_snapshot("光伏").items[0].title, "组件")
+        self.assertEqual(self.backend.list_snapshots("半导体"), ["半导体/report_20260101_000000.json.gz"])
+        self.assertEqual(len(self.backend.list_snapshots()), 2)
+        self.assertEqual(self.backend.load_latest_snapshot().keyword, "光伏")
+
+    def test_latest_pointer_avoids_listing(self):
+        """测试加载最新快照时读取 latest 指针而不列举分区"""
+        self._save("半导体", "20260101_000000", "旧")
+        self._save("半导体", "20260102_000000", "新")
+
+        with patch.object(self.backend, "_list_keys", side_effect=AssertionError("should not list")):
+            snapshot = self.backend.load_latest_snapshot("半导体")
+        self.assertEqual(snapshot.items[0].title, "新")
+
+    def test_missing_pointer_falls_back_to_listing(self):
+        """测试指针缺失时回退为列举分区"""
+        self._save("半导体", "20260101_000000", "旧")
+        self._save("半导体", "20260102_000000", "新")
+        os.remove(os.path.join(self.tmp_dir, "半导体", "latest.json"))
+
+        self.assertEqual(self.backend.load_latest_snapshot("半导体").items[0].title, "新")
+
+    def test_legacy_flat_snapshots_are_readable(self):
+        """测试旧布局（根目录下的 report_*.json）按 keyword 读取"""
+        for ts, keyword in [("20250101_000000", "半导体"), ("20250102_000000", "光伏")]:
+            with open(os.path.join(self.tmp_dir, f"report_{ts}.json"), "w", encoding="utf-8") as f:
+                json.dump({"keyword": keyword, "collected_at": ts, "items": [
+                    {"title": keyword, "content": "c", "source": "official"}
+                ]}, f, ensure_ascii=False)
+
+        snapshot = self.backend.load_latest_snapshot("半导体")
+        self.assertEqual(snapshot.collected_at, "20250101_000000")
+        self.assertEqual(snapshot.items[0].source, SourceType.OFFICIAL)
+        self.assertIsNone(self.backend.load_latest_snapshot("锂电池"))
+
+    def test_snapshot_is_written_once_and_compressed(self):
+        """测试快照只写一份（不再复制到 history/）且按编码格式压缩"""
+        path = self._save("半导体", "20260101_000000", "芯片")
+
+        self.assertTrue(path.endswith(".json.gz"))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir, "history")))
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(2), b"\x1f\x8b")
+
+    def test_legacy_json_and_new_codec_coexist(self):
+        """测试分区内旧版 .json 与新格式快照混合时按时间取最新"""
+        os.makedirs(os.path.join(self.tmp_dir, "半导体"))
+        with open(os.path.join(self.tmp_dir, "半导体", "report_20250101_000000.json"), "w", encoding="utf-8") as f:
+            json.dump({"keyword": "半导体", "collected_at": "20250101_000000", "items": []}, f)
+        self._save("半导体", "20260101_000000", "新")
+        os.remove(os.path.join(self.tmp_dir, "半导体", "latest.json"))
+
+        self.assertEqual(len(self.backend.list_snapshots("半导体")), 2)
+        self.assertEqual(self.backend.load_latest_snapshot("半导体").items[0].title, "新")
+
+
+class TestDeltaSnapshots(unittest.TestCase):
+    """测试条目级内容寻址的增量快照"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.backend = LocalStorageBackend(base_dir=self.tmp_dir, codec=get_codec("json"))
+        self.backend.keyframe_interval = 3
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _save(self, ts, titles):
+        items = [NewsItem(title=t, content="内容", source=SourceType.MEDIA) for t in titles]
+        with patch("storage_layer.now_ts", return_value=ts):
+            path = self.backend.save_snapshot("半导体", items)
+        with open(path, "rb") as f:
+            return os.path.relpath(path, self.tmp_dir).replace(os.sep, "/"), json.loads(f.read())
+
+    def test_only_new_item_bodies_are_stored(self):
+        """测试增量快照只保存新增条目正文，加载时完整还原（含顺序）"""
+        self._save("20260101_000000", ["a", "b", "c"])
+        _, data = self._save("20260102_000000", ["c", "a", "d"])
+
+        self.assertEqual(len(data["item_hashes"]), 3)
+        self.assertEqual([i["title"] for i in data["new_items"].values()], ["d"])
+        snapshot = self.backend.load_latest_snapshot("半导体")
+        self.assertEqual([i.title for i in snapshot.items], ["c", "a", "d"])
+
+    def test_bodies_are_resolved_through_the_chain_and_keyframes_bound_it(self):
+        """测试沿 base 链补齐正文，且达到关键帧间隔时写完整快照"""
+        self._save("20260101_000000", ["a"])
+        self._save("20260102_000000", ["a", "b"])
+        _, third = self._save("20260103_000000", ["a", "b", "c"])
+        _, fourth = self._save("20260104_000000", ["a", "b", "c"])
+
+        self.assertEqual(third["depth"], 2)
+        self.assertEqual([i["title"] for i in third["new_items"].values()], ["c"])
+        self.assertIsNone(fourth["base"])
+        self.assertEqual(len(fourth["new_items"]), 3)
+        keys = self.backend.list_snapshots("半导体")
+        self.assertEqual([i.title for i in self.backend._load_snapshot(keys[2]).items], ["a", "b", "c"])
+
+    def test_diff_is_a_set_operation_on_hashes(self):
+        """测试快照对比只读取两份快照的指纹集合"""
+        old_key, old = self._save("20260101_000000", ["a", "b"])
+        new_key, new = self._save("20260102_000000", ["b", "c"])
+
+        diff = self.backend.diff_snapshots(old_key, new_key)
+        self.assertEqual(diff["added"], list(new["new_items"]))
+        self.assertEqual(diff["removed"], [h for h in old["item_hashes"] if h not in new["item_hashes"]])
+
+    def test_saves_within_the_same_second_get_distinct_keys(self):
+        """测试同一秒内连续保存不会覆盖上一份快照，也不会以自身为 base"""
+        first_key, _ = self._save("20260101_000000", ["a", "b"])
+        second_key, second = self._save("20260101_000000", ["a", "c"])
+
+        self.assertNotEqual(first_key, second_key)
+        self.assertEqual(second["base"], first_key)
+        self.assertEqual([i.title for i in self.backend.load_latest_snapshot("半导体").items], ["a", "c"])
+        self.assertEqual([i.title for i in self.backend._load_snapshot(first_key).items], ["a", "b"])
+
+        # 不固定时间戳的连续保存
+        items = [NewsItem(title=t, content="内容", source=SourceType.MEDIA) for t in ["x", "a"]]
+        self.backend.save_snapshot("光伏", items)
+        self.backend.save_snapshot("光伏", items[:1])
+        self.assertEqual(len(set(self.backend.list_snapshots("光伏"))), 2)
+        self.assertEqual([i.title for i in self.backend.load_latest_snapshot("光伏").items], ["x"])
+
+    def test_cyclic_base_chain_raises(self):
+        """测试 base 链成环时抛出异常而不是无限循环"""
+        key, data = self._save("20260101_000000", ["a"])
+        data.update(base=key, depth=1, new_items={})
+        with open(os.path.join(self.tmp_dir, *key.split("/")), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+        with self.assertRaises(ValueError):
+            self.backend._load_snapshot(key)
+        with self.assertRaises(ValueError):
+            list(self.backend.iter_snapshot_items(key))
+
+    def test_delta_on_top_of_legacy_full_snapshot(self):
+        """测试以旧版完整快照为 base 的增量快照可以还原"""
+        os.makedirs(os.path.join(self.tmp_dir, "半导体"))
+        legacy_key = "半导体/report_20250101_000000.json"
+        with open(os.path.join(self.tmp_dir, *legacy_key.split("/")), "w", encoding="utf-8") as f:
+            json.dump({"keyword": "半导体", "collected_at": "20250101_000000", "items": [
+                {"title": "a", "content": "内容", "source": "media"}
+            ]}, f, ensure_ascii=False)
+        with open(os.path.join(self.tmp_dir, "半导体", "latest.json"), "w") as f:
+            json.dump({"key": legacy_key}, f)
+
+        _, data = self._save("20260101_000000", ["a", "b"])
+
+        self.assertEqual(data["base"], legacy_key)
+        self.assertEqual(len(data["new_items"]), 1)
+        self.assertEqual([i.title for i in self.backend.load_latest_snapshot("半导体").items], ["a", "b"])
+
+
+class TestStreamingSnapshots(unittest.TestCase):
+    """测试 NDJSON 快照的逐条流式读取"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.backend = LocalStorageBackend(base_dir=self.tmp_dir, codec=get_codec("ndjson.gz"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _save(self, ts, titles):
+        items = [NewsItem(title=t, content="内容", source=SourceType.OFFICIAL) for t in titles]
+        with patch("storage_layer.now_ts", return_value=ts):
+            self.backend.save_snapshot("半导体", items)
+        return self.backend.list_snapshots("半导体")[-1]
+
+    def test_iter_items_of_delta_snapshot(self):
+        """测试增量快照先产出新增条目，再沿 base 链产出继承条目"""
+        self._save("20260101_000000", ["a", "b"])
+        key = self._save("20260102_000000", ["b", "c", "a"])
+
+        titles = [i.title for i in self.backend.iter_snapshot_items(key)]
+
+        self.assertEqual(titles[0], "c")
+        self.assertEqual(sorted(titles), ["a", "b", "c"])
+        self.assertEqual(next(self.backend.iter_snapshot_items(key)).source, SourceType.OFFICIAL)
+        self.assertEqual([i.title for i in self.backend.load_latest_snapshot("半导体").items], ["b", "c", "a"])
+
+    def test_iter_items_is_lazy(self):
+        """测试条目按需解码（取第一条时不构建其余条目）"""
+        key = self._save("20260101_000000", [str(i) for i in range(1000)])
+
+        with patch("storage_layer.item_from_dict", wraps=__import__("storage_layer").item_from_dict) as convert:
+            first = next(self.backend.iter_snapshot_items(key))
+        self.assertEqual(first.title, "0")
+        self.assertEqual(convert.call_count, 1)
+
+    def test_oss_stream_uses_ranged_reads(self):
+        """测试 OSS 流式读取通过多次 Range 请求完成"""
+        bucket = FakeBucket()
+        backend = OSSStorageBackend(bucket=bucket, prefix="radar/", codec=get_codec("ndjson"))
+        with patch("storage_layer.now_ts", return_value="20260101_000000"):
+            backend.save_snapshot("半导体", [NewsItem(title=str(i), content="内容" * 20, source=SourceType.MEDIA)
+                                            for i in range(50)])
+        key = backend.list_snapshots("半导体")[0]
+
+        bucket.get_calls = 0
+        with patch("storage_layer.SNAPSHOT_STREAM_CHUNK_SIZE", 256):
+            titles = [i.title for i in backend.iter_snapshot_items(key)]
+
+        self.assertEqual(titles, [str(i) for i in range(50)])
+        self.assertGreater(bucket.get_calls, 5)
+
+
+class _NotFound(Exception):
+    status = 404
+
+
+class _PositionConflict(Exception):
+    status = 409
+
+
+class _Obj:
+    def __init__(self, key):
+        self.key = key
+
+
+class _ListResult:
+    def __init__(self, object_list, is_truncated, next_marker):
+        self.object_list = object_list
+        self.is_truncated = is_truncated
+        self.next_marker = next_marker
+
+
+class FakeBucket:
+    """本地内存版 OSS bucket，实现存储层用到的 oss2.Bucket 接口子集"""
+
+    def __init__(self, page_size=2):
+        self.objects = {}
+        self.page_size = page_size
+        self.list_calls = 0
+        self.get_calls = 0
+
+    def get_object(self, key, byte_range=None):
+        self.get_calls += 1
+        if key not in self.objects:
+            raise _NotFound(key)
+        data = self.objects[key]
+        if byte_range is not None:
+            data = data[byte_range[0]:byte_range[1] + 1]
+        return type("Resp", (), {"read": lambda self_: data})()
+
+    def put_object(self, key, data):
+        self.objects[key] = bytes(data)
+
+    def append_object(self, key, position, data):
+        current = self.objects.get(key, b"")
+        if position != len(current):
+            raise _PositionConflict(key)
+        self.objects[key] = current + bytes(data)
+
+    def head_object(self, key):
+        if key not in self.objects:
+            raise _NotFound(key)
+        return type("Head", (), {"content_length": len(self.objects[key])})()
+
+    def delete_object(self, key):
+        self.objects.pop(key, None)
+
+    def object_exists(self, key):
+        return key in self.objects
+
+    def list_objects(self, prefix="", delimiter="", marker="", max_keys=100):
+        self.list_calls += 1
+        keys = sorted(
+            k for k in self.objects
+            if k.startswith(prefix) and k > marker
+            and not (delimiter and delimiter in k[len(prefix):])
+        )
+        page = keys[:self.page_size]
+        truncated = len(keys) > self.page_size
+        return _ListResult([_Obj(k) for k in page], truncated, page[-1] if truncated else "")
+
+
+class TestOSSStorageManifest(unittest.TestCase):
+    """测试 OSS 后端的清单索引与分页列举（使用本地 FakeBucket）"""
+
+    def setUp(self):
+        self.bucket = FakeBucket()
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("OSS_PREFIX", None)
+            self.backend = OSSStorageBackend(bucket=self.bucket, prefix="radar/", codec=get_codec("json.gz"))
+
+    def _save(self, keyword, ts):
+        with patch("storage_layer.now_ts", return_value=ts):
+            return self.backend.save_snapshot(keyword, _items(keyword))
+
+    def test_list_snapshots_reads_manifest_only(self):
+        """测试列举快照只读取清单，不发起 LIST 请求"""
+        self._save("半导体", "20260101_000000")
+        self._save("光伏", "20260102_000000")
+        self._save("半导体", "20260103_000000")
+
+        self.bucket.list_calls = 0
+        self.bucket.get_calls = 0
+        keys = self.backend.list_snapshots()
+
+        self.assertEqual(self.bucket.list_calls, 0)
+        self.assertEqual(self.bucket.get_calls, 1)
+        self.assertEqual(len(keys), 3)
+
+    def test_keyword_and_date_filters(self):
+        """测试按 keyword 与日期范围过滤"""
+        self._save("半导体", "20260101_000000")
+        self._save("光伏", "20260102_000000")
+        self._save("半导体", "20260103_120000")
+
+        self.assertEqual(
+            self.backend.list_snapshots("半导体"),
+            ["半导体/report_20260101_000000.json.gz", "半导体/report_20260103_120000.json.gz"],
+        )
+        self.assertEqual(
+            self.backend.list_snapshots(start="20260102", end="20260102"),
+            ["光伏/report_20260102_000000.json.gz"],
+        )
+        self.assertEqual(
+            self.backend.list_snapshots("半导体", start="20260103_000000"),
+            ["半导体/report_20260103_120000.json.gz"],
+        )
+
+    def test_missing_manifest_is_rebuilt_from_paginated_listing(self):
+        """测试清单缺失时通过分页列举重建"""
+        for i in range(5):
+            self._save("半导体", f"2026010{i + 1}_000000")
+        del self.bucket.objects["radar/manifest.jsonl"]
+
+        keys = self.backend.list_snapshots("半导体")
+
+        self.assertEqual(len(keys), 5)
+        self.assertGreater(self.bucket.list_calls, 1)  # page_size=2，需要多次分页
+        self.assertIn("radar/manifest.jsonl", self.bucket.objects)
+
+    def test_save_during_manifest_rebuild_is_not_lost(self):
+        """测试重建清单期间并发保存的快照仍记录在清单中（OSS 删除后追加的默认实现）"""
+        self._save("半导体", "20260101_000000")
+        key = _save_during_rebuild(self.backend, lambda: self._save("光伏", "20260102_000000"))
+        self.assertEqual(self.backend.list_snapshots("光伏"), [key[len("radar/"):]])
+        self.assertEqual(len(self.backend.list_snapshots()), 2)
+
+    def test_existing_snapshots_are_indexed_on_first_save(self):
+        """测试升级前已有快照在首次保存时被纳入清单"""
+        self.bucket.put_object(
+            "radar/半导体/report_20250101_000000.json",
+            json.dumps({"keyword": "半导体", "collected_at": "20250101_000000", "items": []}).encode("utf-8"),
+        )
+        self._save("半导体", "20260101_000000")
+
+        self.assertEqual(len(self.backend.list_snapshots("半导体")), 2)
+        self.assertEqual(self.backend.load_latest_snapshot("半导体").collected_at, "20260101_000000")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Add codes directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'codes'))
+
+import trigger_layer
+
+
+class TestHandleBatch(unittest.TestCase):
+    """测试批量模式的 keywords 校验与结果汇总"""
+
+    def _batch(self, keywords, **kwargs):
+        with patch("trigger_layer.run_pipelines") as run_pipelines, patch("trigger_layer.notify_failure"):
+            run_pipelines.return_value = kwargs.get("batch", {"results": [], "succeeded": 0, "failed": 0})
+            response = trigger_layer.handler({"keywords": keywords}, None)
+        return response, run_pipelines
+
+    def test_rejects_non_string_keywords(self):
+        """测试 keywords 含非字符串项时整批拒绝，不调用编排层"""
+        for keywords in (["半导体", None], ["半导体", 42], ["半导体", {"k": "v"}], [["光伏"]]):
+            with self.subTest(keywords=keywords):
+                response, run_pipelines = self._batch(keywords)
+                self.assertEqual(response["status"], "error")
+                self.assertIn("keywords must be non-empty strings", response["error"])
+                run_pipelines.assert_not_called()
+
+    def test_rejects_blank_keywords(self):
+        """测试 keywords 含空白字符串时整批拒绝"""
+        response, run_pipelines = self._batch(["半导体", "  "])
+        self.assertEqual(response["status"], "error")
+        run_pipelines.assert_not_called()
+
+    def test_valid_keywords_are_stripped(self):
+        """测试合法 keywords 去除首尾空白后交给 run_pipelines，并按结果汇总状态"""
+        batch = {
+            "results": [
+                {"status": "success", "keyword": "半导体", "run_id": "r1", "decisions": []},
+                {"status": "error", "keyword": "光伏", "error": "boom", "error_type": "RuntimeError"},
+            ],
+            "succeeded": 1,
+            "failed": 1,
+        }
+        response, run_pipelines = self._batch([" 半导体 ", "光伏"], batch=batch)
+        run_pipelines.assert_called_once_with(["半导体", "光伏"], max_workers=None)
+        self.assertEqual(response["status"], "partial")
+        self.assertEqual([r["status"] for r in response["results"]], ["success", "error"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add codes directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'codes'))
+
+from models import NewsItem, SourceType
+from storage_layer import LocalStorageBackend
+from watermark import (
+    BloomFilter,
+    Watermark,
+    load_watermark,
+    merge_snapshot_items,
+    parse_published_at,
+    save_watermark,
+)
+
+
+def _item(n, source=SourceType.MEDIA, published_at="2026-01-20T08:00:00Z", feed=None):
+    return NewsItem(
+        title=f"标题{n}",
+        content=f"内容{n}",
+        source=source,
+        url=f"https://example.com/news/{n}",
+        published_at=published_at,
+        feed=feed,
+    )
+
+
+class TestBloomFilter(unittest.TestCase):
+    """测试布隆过滤器"""
+
+    def test_membership_and_round_trip(self):
+        """测试已加入的键必定命中，且序列化后结果不变"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(500):
+            bloom.add(f"https://example.com/{i}")
+        restored = BloomFilter.from_dict(bloom.to_dict())
+        self.assertTrue(all(f"https://example.com/{i}" in restored for i in range(500)))
+        false_positives = sum(f"https://other.com/{i}" in restored for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+
+class TestWatermark(unittest.TestCase):
+    """测试按来源的增量水位"""
+
+    def test_only_new_items_pass_after_advance(self):
+        """测试推进水位后只放行新 URL，同批次重复 URL 只保留一条"""
+        watermark = Watermark()
+        first = [_item(1), _item(2), _item(1)]
+        self.assertEqual(len(watermark.filter_new(first)), 2)
+        watermark.advance(first)
+
+        fresh = watermark.filter_new([_item(1), _item(2), _item(3)])
+        self.assertEqual([i.title for i in fresh], ["标题3"])
+
+    def test_watermark_is_per_source(self):
+        """测试同一 URL 在其他来源下仍视为新资讯"""
+        watermark = Watermark()
+        watermark.advance([_item(1, source=SourceType.MEDIA)])
+        self.assertEqual(len(watermark.filter_new([_item(1, source=SourceType.OFFICIAL)])), 1)
+
+    def test_watermark_is_per_feed(self):
+        """测试同类型的两个数据源各自记录水位：更新较慢的数据源不被其他数据源的水位过滤"""
+        watermark = Watermark(lookback_hours=24)
+        watermark.advance([_item(1, published_at="2026-01-20T08:00:00Z", feed="fast")])
+
+        slow = _item(2, published_at="2026-01-15T08:00:00Z", feed="slow")
+        stale = _item(3, published_at="2026-01-15T08:00:00Z", feed="fast")
+        self.assertEqual(watermark.filter_new([slow, stale]), [slow])
+        self.assertEqual(watermark.filter_new([_item(1, feed="slow")]), [_item(1, feed="slow")])
+
+    def test_items_older_than_lookback_are_dropped(self):
+        """测试发布时间早于水位减回看窗口的资讯直接视为旧资讯，窗口内的新 URL 仍放行"""
+        watermark = Watermark(lookback_hours=24)
+        watermark.advance([_item(1, published_at="2026-01-20T08:00:00Z")])
+        stale = _item(2, published_at="2026-01-18T08:00:00Z")
+        late = _item(3, published_at="Mon, 19 Jan 2026 20:00:00 GMT")
+        self.assertEqual(watermark.filter_new([stale, late]), [late])
+
+    def test_round_trip_through_storage_state(self):
+        """测试水位通过存储层状态持久化"""
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            backend = LocalStorageBackend(base_dir=tmp_dir)
+            watermark = load_watermark(backend, "半导体")
+            self.assertEqual(watermark.feeds, {})
+            watermark.advance([_item(1)])
+            save_watermark(backend, "半导体", watermark)
+
+            restored = load_watermark(backend, "半导体")
+            self.assertEqual(restored.filter_new([_item(1), _item(2)]), [_item(2)])
+            self.assertEqual(restored.feeds["media"].latest, parse_published_at("2026-01-20T08:00:00+00:00"))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+class TestMergeSnapshotItems(unittest.TestCase):
+    """测试新增资讯与旧快照合并"""
+
+    def test_new_items_first_deduplicated_and_capped(self):
+        """测试新增资讯排在前面、按指纹去重并截断"""
+        old = [_item(1), _item(2), _item(3)]
+        merged = merge_snapshot_items(old, [_item(4), _item(1)], max_items=3)
+        self.assertEqual([i.title for i in merged], ["标题4", "标题1", "标题2"])
+        self.assertEqual(len(merge_snapshot_items(old, [_item(4)], max_items=0)), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()